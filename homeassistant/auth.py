@@ -423,7 +423,8 @@ class AuthStore:
         """Initialize the auth store."""
         self.hass = hass
         self._users = None
-        self._store = hass.helpers.storage.Store(STORAGE_VERSION, STORAGE_KEY)
+        self._store = hass.helpers.storage.Store(
+            STORAGE_VERSION, STORAGE_KEY, private=True, compact=True)
 
     async def async_get_users(self):
         """Retrieve all users."""
@@ -554,6 +555,11 @@ class AuthStore:
 
     async def async_save(self):
         """Save users."""
+        self._store.async_delay_save(self._data_to_save, 1)
+
+    @callback
+    def _data_to_save(self):
+        """Return the data to store."""
         users = [
             {
                 'id': user.id,
@@ -610,4 +616,4 @@ class AuthStore:
             'refresh_tokens': refresh_tokens,
         }
 
-        await self._store.async_save(data, delay=1)
+        return data
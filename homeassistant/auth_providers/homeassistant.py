@@ -34,7 +34,8 @@ class Data:
     def __init__(self, hass):
         """Initialize the user data store."""
         self.hass = hass
-        self._store = hass.helpers.storage.Store(STORAGE_VERSION, STORAGE_KEY)
+        self._store = hass.helpers.storage.Store(
+            STORAGE_VERSION, STORAGE_KEY, private=True)
         self._data = None
 
     async def async_load(self):
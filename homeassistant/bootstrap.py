@@ -1,4 +1,5 @@
 """Provide methods to bootstrap a Home Assistant instance."""
+import asyncio
 import logging
 import logging.handlers
 import os
@@ -6,12 +7,13 @@ import sys
 from time import time
 from collections import OrderedDict
 
-from typing import Any, Optional, Dict
+from typing import Any, Optional, Dict, Iterable, List, Set  # noqa: F401
 
 import voluptuous as vol
 
 from homeassistant import (
-    core, config as conf_util, config_entries, components as core_components)
+    core, config as conf_util, config_entries, components as core_components,
+    loader)
 from homeassistant.components import persistent_notification
 from homeassistant.const import EVENT_HOMEASSISTANT_CLOSE
 from homeassistant.setup import async_setup_component
@@ -28,6 +30,9 @@ ERROR_LOG_FILENAME = 'home-assistant.log'
 # hass.data key for logging information.
 DATA_LOGGING = 'logging'
 
+# Components that are set up before all others, e.g. to record the events
+# of the remaining setups and to restore states. Other components start
+# once these and their dependencies are set up.
 FIRST_INIT_COMPONENT = set((
     'system_log', 'recorder', 'mqtt', 'mqtt_eventstream', 'logger',
     'introduction', 'frontend', 'history'))
@@ -133,20 +138,7 @@ async def async_from_config_dict(config: Dict[str, Any],
 
     _LOGGER.info("Home Assistant core initialized")
 
-    # stage 1
-    for component in components:
-        if component not in FIRST_INIT_COMPONENT:
-            continue
-        hass.async_add_job(async_setup_component(hass, component, config))
-
-    await hass.async_block_till_done()
-
-    # stage 2
-    for component in components:
-        if component in FIRST_INIT_COMPONENT:
-            continue
-        hass.async_add_job(async_setup_component(hass, component, config))
-
+    await async_setup_components(hass, components, config)
     await hass.async_block_till_done()
 
     stop = time()
@@ -156,6 +148,73 @@ async def async_from_config_dict(config: Dict[str, Any],
     return hass
 
 
+def component_dependency_graph(hass: core.HomeAssistant,
+                               components: Iterable[str]) \
+                               -> Dict[str, List[str]]:
+    """Return the dependencies of components and all their dependencies.
+
+    Components are ordered such that dependencies precede the components
+    depending on them. Components that cannot be resolved are included
+    without dependencies, their setup reports the error.
+    """
+    graph = OrderedDict()  # type: Dict[str, List[str]]
+
+    for component in components:
+        load_order = loader.load_order_component(hass, component)
+
+        if not load_order:
+            graph.setdefault(component, [])
+            continue
+
+        for domain in load_order:
+            if domain not in graph:
+                graph[domain] = list(getattr(
+                    loader.get_component(hass, domain), 'DEPENDENCIES', []))
+
+    return graph
+
+
+async def async_setup_components(hass: core.HomeAssistant,
+                                 components: Iterable[str],
+                                 config: Dict[str, Any]) -> None:
+    """Set up components, each as soon as its dependencies are set up.
+
+    Components of FIRST_INIT_COMPONENT and their dependencies are set up
+    before all other components.
+
+    This method is a coroutine.
+    """
+    components = sorted(
+        components, key=lambda domain: domain not in FIRST_INIT_COMPONENT)
+    graph = component_dependency_graph(hass, components)
+    tasks = {}  # type: Dict[str, asyncio.Future]
+
+    first_init = set()  # type: Set[str]
+    for domain in components:
+        if domain in FIRST_INIT_COMPONENT:
+            first_init.update(
+                loader.load_order_component(hass, domain) or [domain])
+
+    async def async_setup_when_ready(domain, dependencies):
+        """Set up a component once its dependencies are done."""
+        if dependencies:
+            # Failed dependencies are reported by the setup of the component
+            await asyncio.wait(dependencies, loop=hass.loop)
+
+        return await async_setup_component(hass, domain, config)
+
+    for domain, dependencies in graph.items():
+        if domain not in first_init:
+            # First init components precede the others in the graph
+            dependencies = list(first_init) + dependencies
+
+        tasks[domain] = hass.async_add_job(async_setup_when_ready(
+            domain, [tasks[dep] for dep in set(dependencies) if dep in tasks]))
+
+    if tasks:
+        await asyncio.wait(tasks.values(), loop=hass.loop)
+
+
 def from_config_file(config_path: str,
                      hass: Optional[core.HomeAssistant] = None,
                      verbose: bool = False,
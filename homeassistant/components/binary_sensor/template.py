@@ -16,12 +16,13 @@ from homeassistant.components.binary_sensor import (
 from homeassistant.const import (
     ATTR_FRIENDLY_NAME, ATTR_ENTITY_ID, CONF_VALUE_TEMPLATE,
     CONF_ICON_TEMPLATE, CONF_ENTITY_PICTURE_TEMPLATE,
-    CONF_SENSORS, CONF_DEVICE_CLASS, EVENT_HOMEASSISTANT_START)
+    CONF_SENSORS, CONF_DEVICE_CLASS, EVENT_HOMEASSISTANT_START, MATCH_ALL)
 from homeassistant.exceptions import TemplateError
 import homeassistant.helpers.config_validation as cv
 from homeassistant.helpers.entity import async_generate_entity_id
 from homeassistant.helpers.event import (
-    async_track_state_change, async_track_same_state)
+    async_track_state_change, async_track_same_state,
+    TemplateDependencyTracker)
 
 _LOGGER = logging.getLogger(__name__)
 
@@ -56,8 +57,8 @@ def async_setup_platform(hass, config, async_add_devices, discovery_info=None):
         icon_template = device_config.get(CONF_ICON_TEMPLATE)
         entity_picture_template = device_config.get(
             CONF_ENTITY_PICTURE_TEMPLATE)
-        entity_ids = (device_config.get(ATTR_ENTITY_ID) or
-                      value_template.extract_entities())
+        # Without entity ids, the states accessed by renders are tracked
+        entity_ids = device_config.get(ATTR_ENTITY_ID)
         friendly_name = device_config.get(ATTR_FRIENDLY_NAME, device)
         device_class = device_config.get(CONF_DEVICE_CLASS)
         delay_on = device_config.get(CONF_DELAY_ON)
@@ -107,6 +108,7 @@ class BinarySensorTemplate(BinarySensorDevice):
         self._entities = entity_ids
         self._delay_on = delay_on
         self._delay_off = delay_off
+        self._tracker = None
 
     @asyncio.coroutine
     def async_added_to_hass(self):
@@ -119,8 +121,13 @@ class BinarySensorTemplate(BinarySensorDevice):
         @callback
         def template_bsensor_startup(event):
             """Update template on startup."""
-            async_track_state_change(
-                self.hass, self._entities, template_bsensor_state_listener)
+            if self._entities is None:
+                self._tracker = TemplateDependencyTracker(
+                    self.hass, template_bsensor_state_listener)
+            else:
+                async_track_state_change(
+                    self.hass, self._entities,
+                    template_bsensor_state_listener)
 
             self.hass.async_add_job(self.async_check_state)
 
@@ -160,9 +167,28 @@ class BinarySensorTemplate(BinarySensorDevice):
     @callback
     def _async_render(self):
         """Get the state of template."""
+        render_infos = []
+
+        def render(template):
+            """Render a template, recording the states it accessed."""
+            render_info = template.async_render_to_info()
+            render_infos.append(render_info)
+            if render_info.exception is not None:
+                raise render_info.exception
+            return render_info.result
+
+        try:
+            return self._async_render_templates(render)
+        finally:
+            if self._tracker is not None:
+                self._tracker.async_update(render_infos)
+
+    @callback
+    def _async_render_templates(self, render):
+        """Get the state of template, rendering templates with render."""
         state = None
         try:
-            state = (self._template.async_render().lower() == 'true')
+            state = (render(self._template).lower() == 'true')
         except TemplateError as ex:
             if ex.args and ex.args[0].startswith(
                     "UndefinedError: 'None' has no attribute"):
@@ -179,7 +205,7 @@ class BinarySensorTemplate(BinarySensorDevice):
                 continue
 
             try:
-                setattr(self, property_name, template.async_render())
+                setattr(self, property_name, render(template))
             except TemplateError as ex:
                 friendly_property_name = property_name[1:].replace('_', ' ')
                 if ex.args and ex.args[0].startswith(
@@ -217,6 +243,11 @@ class BinarySensorTemplate(BinarySensorDevice):
             return
 
         period = self._delay_on if state else self._delay_off
+        entity_ids = self._entities
+        if entity_ids is None:
+            entity_ids = self._tracker.entity_ids \
+                if self._tracker is not None else MATCH_ALL
+
         async_track_same_state(
-            self.hass, period, set_state, entity_ids=self._entities,
+            self.hass, period, set_state, entity_ids=entity_ids,
             async_check_same_func=lambda *args: self._async_render() == state)
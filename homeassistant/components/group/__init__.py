@@ -27,6 +27,8 @@ DOMAIN = 'group'
 
 ENTITY_ID_FORMAT = DOMAIN + '.{}'
 
+DATA_EXPANDED_GROUPS = 'group_expanded'
+
 CONF_ENTITIES = 'entities'
 CONF_VIEW = 'view'
 CONF_CONTROL = 'control'
@@ -191,34 +193,85 @@ def expand_entity_ids(hass, entity_ids):
     Async friendly.
     """
     found_ids = []
+    seen = set()
     for entity_id in entity_ids:
         if not isinstance(entity_id, str):
             continue
 
         entity_id = entity_id.lower()
 
-        try:
-            # If entity_id points at a group, expand it
-            domain, _ = ha.split_entity_id(entity_id)
+        # If entity_id points at a group, expand it
+        domain, _ = ha.split_entity_id(entity_id)
 
-            if domain == DOMAIN:
-                child_entities = get_entity_ids(hass, entity_id)
-                if entity_id in child_entities:
-                    child_entities = list(child_entities)
-                    child_entities.remove(entity_id)
-                found_ids.extend(
-                    ent_id for ent_id
-                    in expand_entity_ids(hass, child_entities)
-                    if ent_id not in found_ids)
+        if domain == DOMAIN:
+            members = _expand_group(hass, entity_id)
+        else:
+            members = (entity_id,)
 
-            else:
-                if entity_id not in found_ids:
-                    found_ids.append(entity_id)
+        for member in members:
+            if member not in seen:
+                seen.add(member)
+                found_ids.append(member)
+
+    return found_ids
+
+
+def _group_members(hass, entity_id):
+    """Return the entity_id attribute of a group state."""
+    group = hass.states.get(entity_id)
+
+    if group is None:
+        return None
+
+    return group.attributes.get(ATTR_ENTITY_ID)
+
+
+def _expand_group(hass, group_id):
+    """Return the members of a group with nested groups replaced.
+
+    The result is cached together with the member attributes of the groups
+    it was expanded from. It stays valid as long as these groups keep
+    the same attribute object, which states with unchanged attributes share.
+
+    Async friendly.
+    """
+    cache = hass.data.get(DATA_EXPANDED_GROUPS)
+    if cache is None:
+        cache = hass.data[DATA_EXPANDED_GROUPS] = {}
+
+    cached = cache.get(group_id)
+    if cached is not None and all(
+            _group_members(hass, entity_id) is members
+            for entity_id, members in cached[0]):
+        return cached[1]
 
-        except AttributeError:
-            # Raised by split_entity_id if entity_id is not a string
-            pass
+    groups = []
+    found_ids = []
+    seen = set()
+
+    def expand(entity_id):
+        """Add the members of a group, skipping groups already expanded."""
+        members = _group_members(hass, entity_id)
+        groups.append((entity_id, members))
+        seen.add(entity_id)
+
+        for member in members or ():
+            if not isinstance(member, str):
+                continue
 
+            member = member.lower()
+            if member in seen:
+                continue
+
+            if ha.split_entity_id(member)[0] == DOMAIN:
+                expand(member)
+            else:
+                seen.add(member)
+                found_ids.append(member)
+
+    expand(group_id)
+    found_ids = tuple(found_ids)
+    cache[group_id] = (tuple(groups), found_ids)
     return found_ids
 
 
@@ -407,6 +460,8 @@ class Group(Entity):
         self.user_defined = user_defined
         self._order = order
         self._assumed_state = False
+        self._on_members = set()
+        self._assumed_members = set()
         self._async_unsub_state_changed = None
 
     @staticmethod
@@ -570,7 +625,7 @@ class Group(Entity):
         if self._async_unsub_state_changed is None:
             return
 
-        self._async_update_group_state(new_state)
+        self._async_update_group_state(entity_id, new_state)
         await self.async_update_ha_state()
 
     @property
@@ -587,62 +642,48 @@ class Group(Entity):
         return states
 
     @callback
-    def _async_update_group_state(self, tr_state=None):
+    def _async_update_group_state(self, entity_id=None, tr_state=None):
         """Update group state.
 
-        Optionally you can provide the only state changed since last update
-        allowing this method to take shortcuts.
+        Optionally you can provide the only member that changed since last
+        update, with its new state or None if it was removed. Only this
+        member is then checked instead of all members.
 
         This method must be run in the event loop.
         """
-        # To store current states of group entities. Might not be needed.
-        states = None
-        gr_state = self._state
-        gr_on = self.group_on
-        gr_off = self.group_off
-
-        # We have not determined type of group yet
-        if gr_on is None:
-            if tr_state is None:
-                states = self._tracking_states
+        if entity_id is None or self.group_on is None:
+            states = self._tracking_states
 
+            # We have not determined type of group yet
+            if self.group_on is None:
                 for state in states:
-                    gr_on, gr_off = \
-                        _get_group_on_off(state.state)
+                    gr_on, gr_off = _get_group_on_off(state.state)
                     if gr_on is not None:
+                        self.group_on, self.group_off = gr_on, gr_off
                         break
-            else:
-                gr_on, gr_off = _get_group_on_off(tr_state.state)
 
-            if gr_on is not None:
-                self.group_on, self.group_off = gr_on, gr_off
+            self._on_members = set(
+                state.entity_id for state in states
+                if state.state == self.group_on)
+            self._assumed_members = set(
+                state.entity_id for state in states
+                if state.attributes.get(ATTR_ASSUMED_STATE))
 
-        # We cannot determine state of the group
-        if gr_on is None:
-            return
-
-        if tr_state is None or ((gr_state == gr_on and
-                                 tr_state.state == gr_off) or
-                                tr_state.state not in (gr_on, gr_off)):
-            if states is None:
-                states = self._tracking_states
-
-            if any(state.state == gr_on for state in states):
-                self._state = gr_on
+        else:
+            if tr_state is not None and tr_state.state == self.group_on:
+                self._on_members.add(entity_id)
             else:
-                self._state = gr_off
+                self._on_members.discard(entity_id)
 
-        elif tr_state.state in (gr_on, gr_off):
-            self._state = tr_state.state
-
-        if tr_state is None or self._assumed_state and \
-           not tr_state.attributes.get(ATTR_ASSUMED_STATE):
-            if states is None:
-                states = self._tracking_states
+            if tr_state is not None and \
+                    tr_state.attributes.get(ATTR_ASSUMED_STATE):
+                self._assumed_members.add(entity_id)
+            else:
+                self._assumed_members.discard(entity_id)
 
-            self._assumed_state = any(
-                state.attributes.get(ATTR_ASSUMED_STATE) for state
-                in states)
+        # We cannot determine state of the group
+        if self.group_on is None:
+            return
 
-        elif tr_state.attributes.get(ATTR_ASSUMED_STATE):
-            self._assumed_state = True
+        self._state = self.group_on if self._on_members else self.group_off
+        self._assumed_state = bool(self._assumed_members)
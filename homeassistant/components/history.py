@@ -4,22 +4,34 @@ Provide pre-made queries on top of the recorder component.
 For more details about this component, please refer to the documentation at
 https://home-assistant.io/components/history/
 """
+import asyncio
 from collections import defaultdict
+import concurrent.futures
 from datetime import timedelta
 from itertools import groupby
+import json
 import logging
+import threading
 import time
 
+from aiohttp import web
 import voluptuous as vol
 
 from homeassistant.const import (
-    HTTP_BAD_REQUEST, CONF_DOMAINS, CONF_ENTITIES, CONF_EXCLUDE, CONF_INCLUDE)
+    HTTP_BAD_REQUEST, HTTP_INTERNAL_SERVER_ERROR, CONF_DOMAINS, CONF_ENTITIES,
+    CONF_EXCLUDE, CONF_INCLUDE, CONTENT_TYPE_JSON)
+from homeassistant.core import EXECUTOR_DATABASE, in_executor, split_entity_id
 import homeassistant.util.dt as dt_util
 from homeassistant.components import recorder, script
 from homeassistant.components.http import HomeAssistantView
 from homeassistant.const import ATTR_HIDDEN
-from homeassistant.components.recorder.util import session_scope, execute
+from homeassistant.components.recorder.statistics import (
+    PERIOD_HOUR, PERIODS)
+from homeassistant.components.recorder.util import (
+    session_scope, execute, execute_states, stream_states)
 import homeassistant.helpers.config_validation as cv
+from homeassistant.remote import JSONEncoder
+from homeassistant.util.async_ import run_coroutine_threadsafe
 
 _LOGGER = logging.getLogger(__name__)
 
@@ -37,6 +49,11 @@ CONFIG_SCHEMA = vol.Schema({
 SIGNIFICANT_DOMAINS = ('thermostat', 'climate')
 IGNORE_DOMAINS = ('zone', 'scene',)
 
+# Number of rows fetched from the database cursor at once when streaming
+STREAM_BATCH_SIZE = 1000
+# Number of serialized entities buffered between database and response
+STREAM_QUEUE_SIZE = 10
+
 
 def last_recorder_run(hass):
     """Retrieve the last closed recorder run from the database."""
@@ -52,71 +69,318 @@ def last_recorder_run(hass):
         return res
 
 
+@in_executor(EXECUTOR_DATABASE)
 def get_significant_states(hass, start_time, end_time=None, entity_ids=None,
-                           filters=None, include_start_time_state=True):
+                           filters=None, include_start_time_state=True,
+                           statistics_period=None):
     """
     Return states changes during UTC period start_time - end_time.
 
     Significant states are all states where there is a state change,
     as well as all states from certain domains (for instance
     thermostat so that we get current temperature in our graphs).
+
+    If statistics_period is given, the states of entities during the
+    periods with recorded statistics are replaced by statistics points.
     """
     timer_start = time.perf_counter()
     from homeassistant.components.recorder.models import States
 
+    entity_statistics = {}
+    covered = None
+    if statistics_period is not None:
+        entity_statistics = get_statistics(
+            hass, start_time, end_time, entity_ids, statistics_period)
+        covered = _statistics_spans(entity_statistics, statistics_period)
+
+    entity_filter = None
+    if filters:
+        entity_filter = filters.entity_filter(entity_ids)
+    states = _recent_state_changes(
+        hass, start_time, end_time, entity_filter, SIGNIFICANT_DOMAINS,
+        covered)
+
+    if states is None:
+        with session_scope(hass=hass) as session:
+            query = _significant_states_query(
+                session, start_time, end_time, entity_ids, filters,
+                covered)
+            states = execute_states(query.order_by(States.last_updated))
+
+    states = (
+        state for state in states
+        if (_is_significant(state) and
+            not state.attributes.get(ATTR_HIDDEN, False)))
+
+    if _LOGGER.isEnabledFor(logging.DEBUG):
+        elapsed = time.perf_counter() - timer_start
+        _LOGGER.debug(
+            'get_significant_states took %fs', elapsed)
+
+    result = states_to_json(
+        hass, states, start_time, entity_ids, filters,
+        include_start_time_state)
+    for entity_id, points in entity_statistics.items():
+        result[entity_id] = _with_statistics(result[entity_id], points)
+    return result
+
+
+@in_executor(EXECUTOR_DATABASE)
+def get_statistics(hass, start_time, end_time=None, entity_ids=None,
+                   period=PERIOD_HOUR):
+    """Return recorded statistics during UTC period start_time - end_time.
+
+    Only periods that are over and lie within the requested period are
+    returned. Returns a dict with per entity a list of points in the format
+    of downsample_states, using the attributes of the last recorded state.
+    """
+    from homeassistant.components.recorder.models import Statistics
+
+    end = dt_util.utcnow()
+    if end_time is not None:
+        end = min(end, end_time)
+    length = timedelta(seconds=PERIODS[period])
+
     with session_scope(hass=hass) as session:
-        query = session.query(States).filter(
-            (States.domain.in_(SIGNIFICANT_DOMAINS) |
-             (States.last_changed == States.last_updated)) &
-            (States.last_updated > start_time))
+        query = session.query(Statistics).filter(
+            (Statistics.period == PERIODS[period]) &
+            (Statistics.start >= start_time) &
+            (Statistics.start <= end - length))
 
-        if filters:
-            query = filters.apply(query, entity_ids)
+        if entity_ids is not None:
+            query = query.filter(Statistics.entity_id.in_(entity_ids))
+
+        rows = execute(query.order_by(
+            Statistics.entity_id, Statistics.start))
+
+    run = recorder.run_information(hass, end)
+    result = {}
+
+    for entity_id, entity_rows in groupby(
+            rows, lambda row: row['entity_id']):
+        attributes = {}
+        if run is not None:
+            for state in get_states(hass, end, [entity_id], run):
+                attributes = dict(state.attributes)
+
+        result[entity_id] = [{
+            'entity_id': entity_id,
+            'state': str(row['mean']),
+            'attributes': attributes,
+            'last_changed': row['start'],
+            'last_updated': row['start'],
+            'min': row['min'],
+            'max': row['max'],
+            'mean': row['mean'],
+            'last': row['last'],
+            'count': row['count'],
+        } for row in entity_rows]
+
+    return result
+
+
+def _statistics_spans(entity_statistics, period):
+    """Return per entity the time span covered by its statistics points."""
+    length = timedelta(seconds=PERIODS[period])
+    return {
+        entity_id: (points[0]['last_updated'],
+                    points[-1]['last_updated'] + length)
+        for entity_id, points in entity_statistics.items()}
+
+
+def _is_covered(state, covered):
+    """Return if the state lies in the statistics span of its entity."""
+    span = covered.get(state.entity_id)
+    return span is not None and span[0] <= state.last_updated < span[1]
 
-        if end_time is not None:
-            query = query.filter(States.last_updated < end_time)
 
-        query = query.order_by(States.last_updated)
+def _with_statistics(entity_states, points):
+    """Insert the statistics points of an entity between its states."""
+    first = points[0]['last_updated']
+    index = 0
+    while index < len(entity_states) and \
+            entity_states[index].last_updated <= first:
+        index += 1
+    return entity_states[:index] + points + entity_states[index:]
+
+
+def stream_significant_states(hass, start_time, end_time=None,
+                              entity_ids=None, filters=None,
+                              include_start_time_state=True, max_points=None,
+                              statistics_period=None):
+    """Yield the significant states during a period, one entity at a time.
+
+    Unlike get_significant_states the rows are read from the database cursor
+    while the states are consumed. Each item is the list of states of a
+    single entity, entities are ordered by entity_id. If max_points is set
+    numeric states are downsampled with downsample_states. Periods with
+    statistics for statistics_period are returned as statistics points.
+    """
+    from homeassistant.components.recorder.models import States
+
+    if max_points and end_time is None:
+        end_time = dt_util.utcnow()
+
+    # Lists fetched up front, merged into the stream by entity_id
+    prefetched = {}
+    if include_start_time_state:
+        for state in get_states(hass, start_time, entity_ids, filters=filters):
+            state.last_changed = start_time
+            state.last_updated = start_time
+            prefetched[state.entity_id] = [state]
+
+    entity_statistics = {}
+    covered = None
+    if statistics_period is not None:
+        entity_statistics = get_statistics(
+            hass, start_time, end_time, entity_ids, statistics_period)
+        covered = _statistics_spans(entity_statistics, statistics_period)
+
+    prefetched_ids = sorted(set(prefetched).union(entity_statistics),
+                            reverse=True)
+
+    def entity_result(entity_id, entity_states):
+        """Return the states of one entity, downsampled if requested."""
+        points = entity_statistics.get(entity_id)
+        if points:
+            entity_states = _with_statistics(entity_states, points)
+        if max_points:
+            return list(downsample_states(
+                entity_states, start_time, end_time, max_points))
+        return entity_states
+
+    with session_scope(hass=hass) as session:
+        query = _significant_states_query(
+            session, start_time, end_time, entity_ids, filters, covered)
+        query = query.order_by(States.entity_id, States.last_updated)
 
         states = (
-            state for state in execute(query)
+            state for state in stream_states(query, STREAM_BATCH_SIZE)
             if (_is_significant(state) and
                 not state.attributes.get(ATTR_HIDDEN, False)))
 
-    if _LOGGER.isEnabledFor(logging.DEBUG):
-        elapsed = time.perf_counter() - timer_start
-        _LOGGER.debug(
-            'get_significant_states took %fs', elapsed)
+        for ent_id, group in groupby(states, lambda state: state.entity_id):
+            # Entities without states in the period come first
+            while prefetched_ids and prefetched_ids[-1] < ent_id:
+                entity_id = prefetched_ids.pop()
+                yield entity_result(entity_id, prefetched.get(entity_id, []))
 
-    return states_to_json(
-        hass, states, start_time, entity_ids, filters,
-        include_start_time_state)
+            entity_states = []
+            if prefetched_ids and prefetched_ids[-1] == ent_id:
+                entity_states.extend(prefetched.get(prefetched_ids.pop(), []))
+            entity_states.extend(group)
+
+            yield entity_result(ent_id, entity_states)
+
+    while prefetched_ids:
+        entity_id = prefetched_ids.pop()
+        yield entity_result(entity_id, prefetched.get(entity_id, []))
+
+
+def downsample_states(states, start_time, end_time, max_points):
+    """Reduce numeric states of one entity to at most max_points buckets.
+
+    The period is split in max_points buckets of equal width. Consecutive
+    numeric states within a bucket are replaced by a single point at the
+    time of the first state, holding the mean as state and the min, max and
+    mean values. Buckets with a single state, non numeric states and points
+    that are already aggregated are returned unchanged.
+    """
+    bucket_width = (end_time - start_time) / max_points
+    bucket = []
+    bucket_index = None
+
+    def flush():
+        """Return the point for the current bucket."""
+        if len(bucket) == 1:
+            return bucket[0][1]
+
+        values = [value for value, _ in bucket]
+        mean = sum(values) / len(values)
+        last = bucket[-1][1]
+        first_updated = bucket[0][1].last_updated
+        return {
+            'entity_id': last.entity_id,
+            'state': str(mean),
+            'attributes': dict(last.attributes),
+            'last_changed': first_updated,
+            'last_updated': first_updated,
+            'min': min(values),
+            'max': max(values),
+            'mean': mean,
+            'count': len(values),
+        }
+
+    for state in states:
+        if isinstance(state, dict):
+            value = None
+        else:
+            try:
+                value = float(state.state)
+            except ValueError:
+                value = None
+
+        index = None
+        if value is not None:
+            index = max(0, int((state.last_updated - start_time) /
+                               bucket_width))
 
+        if bucket and index != bucket_index:
+            yield flush()
+            bucket = []
 
+        if value is None:
+            yield state
+            continue
+
+        bucket_index = index
+        bucket.append((value, state))
+
+    if bucket:
+        yield flush()
+
+
+def _point_entity_id(point):
+    """Return the entity_id of a state or aggregated point."""
+    if isinstance(point, dict):
+        return point['entity_id']
+    return point.entity_id
+
+
+@in_executor(EXECUTOR_DATABASE)
 def state_changes_during_period(hass, start_time, end_time=None,
                                 entity_id=None):
     """Return states changes during UTC period start_time - end_time."""
     from homeassistant.components.recorder.models import States
 
-    with session_scope(hass=hass) as session:
-        query = session.query(States).filter(
-            (States.last_changed == States.last_updated) &
-            (States.last_updated > start_time))
+    entity_filter = None
+    if entity_id is not None:
+        entity_id = entity_id.lower()
+        entity_filter = entity_id.__eq__
 
-        if end_time is not None:
-            query = query.filter(States.last_updated < end_time)
+    entity_ids = [entity_id] if entity_id is not None else None
 
-        if entity_id is not None:
-            query = query.filter_by(entity_id=entity_id.lower())
+    states = _recent_state_changes(hass, start_time, end_time, entity_filter)
 
-        entity_ids = [entity_id] if entity_id is not None else None
+    if states is None:
+        with session_scope(hass=hass) as session:
+            query = session.query(States).filter(
+                (States.last_changed == States.last_updated) &
+                (States.last_updated > start_time))
 
-        states = execute(
-            query.order_by(States.last_updated))
+            if end_time is not None:
+                query = query.filter(States.last_updated < end_time)
+
+            if entity_id is not None:
+                query = query.filter_by(entity_id=entity_id)
+
+            states = execute_states(
+                query.order_by(States.last_updated))
 
     return states_to_json(hass, states, start_time, entity_ids)
 
 
+@in_executor(EXECUTOR_DATABASE)
 def get_last_state_changes(hass, number_of_states, entity_id):
     """Return the last number_of_states."""
     from homeassistant.components.recorder.models import States
@@ -132,7 +396,7 @@ def get_last_state_changes(hass, number_of_states, entity_id):
 
         entity_ids = [entity_id] if entity_id is not None else None
 
-        states = execute(
+        states = execute_states(
             query.order_by(States.last_updated.desc()).limit(number_of_states))
 
     return states_to_json(hass, reversed(states),
@@ -141,6 +405,7 @@ def get_last_state_changes(hass, number_of_states, entity_id):
                           include_start_time_state=False)
 
 
+@in_executor(EXECUTOR_DATABASE)
 def get_states(hass, utc_point_in_time, entity_ids=None, run=None,
                filters=None):
     """Return the states at a specific point in time."""
@@ -153,6 +418,12 @@ def get_states(hass, utc_point_in_time, entity_ids=None, run=None,
         if run is None:
             return []
 
+    if not entity_ids or len(entity_ids) != 1:
+        states = _recent_states(hass, utc_point_in_time, run, filters,
+                                entity_ids)
+        if states is not None:
+            return states
+
     from sqlalchemy import and_, func
 
     with session_scope(hass=hass) as session:
@@ -211,10 +482,88 @@ def get_states(hass, utc_point_in_time, entity_ids=None, run=None,
         if filters:
             query = filters.apply(query, entity_ids)
 
-        return [state for state in execute(query)
+        return [state for state in execute_states(query)
                 if not state.attributes.get(ATTR_HIDDEN, False)]
 
 
+def _recent_state_changes(hass, start_time, end_time, entity_filter,
+                          all_updates_domains=(), covered=None):
+    """Return the state changes during a period from the recorder cache.
+
+    The states are grouped by entity and ordered by last_updated. States in
+    the spans of covered are skipped. Returns None if the cache does not
+    cover the period.
+    """
+    recent_states = hass.data[recorder.DATA_INSTANCE].recent_states
+    if recent_states is None:
+        return None
+
+    changes = recent_states.get_changes(
+        start_time, end_time, entity_filter, all_updates_domains)
+    if changes is None:
+        return None
+
+    return [state for entity_states in changes.values()
+            for state in entity_states
+            if not covered or not _is_covered(state, covered)]
+
+
+def _recent_states(hass, utc_point_in_time, run, filters, entity_ids):
+    """Return the states at a point in time from the recorder cache.
+
+    Matches the query of get_states for multiple entities. Returns None if
+    the cache does not cover the run.
+    """
+    instance = hass.data[recorder.DATA_INSTANCE]
+    if instance.recent_states is None or run is not instance.run_info:
+        return None
+
+    entity_filter = filters.entity_filter(entity_ids) if filters else None
+
+    def recorded_entity(entity_id):
+        """Filter the entities like the database query."""
+        return split_entity_id(entity_id)[0] not in IGNORE_DOMAINS and \
+            (entity_filter is None or entity_filter(entity_id))
+
+    states = instance.recent_states.get_states(
+        utc_point_in_time, run.start, recorded_entity)
+    if states is None:
+        return None
+
+    return [state for state in states
+            if not state.attributes.get(ATTR_HIDDEN, False)]
+
+
+def _significant_states_query(session, start_time, end_time, entity_ids,
+                              filters, covered=None):
+    """Return the query for significant states during a period.
+
+    States in the spans of covered, per entity the start and end of its
+    statistics, are skipped.
+    """
+    from homeassistant.components.recorder.models import States
+
+    query = session.query(States).filter(
+        (States.domain.in_(SIGNIFICANT_DOMAINS) |
+         (States.last_changed == States.last_updated)) &
+        (States.last_updated > start_time))
+
+    if filters:
+        query = filters.apply(query, entity_ids)
+
+    if end_time is not None:
+        query = query.filter(States.last_updated < end_time)
+
+    if covered:
+        for entity_id, (span_start, span_end) in covered.items():
+            query = query.filter(~(
+                (States.entity_id == entity_id) &
+                (States.last_updated >= span_start) &
+                (States.last_updated < span_end)))
+
+    return query
+
+
 def states_to_json(
         hass,
         states,
@@ -273,6 +622,7 @@ async def async_setup(hass, config):
     use_include_order = conf.get(CONF_ORDER)
 
     hass.http.register_view(HistoryPeriodView(filters, use_include_order))
+    hass.http.register_view(HistoryStreamView(filters, use_include_order))
     await hass.components.frontend.async_register_built_in_panel(
         'history', 'history', 'hass:poll-box')
 
@@ -325,17 +675,48 @@ class HistoryPeriodView(HomeAssistantView):
             entity_ids = entity_ids.lower().split(',')
         include_start_time_state = 'skip_initial_state' not in request.query
 
+        max_points = request.query.get('max_points')
+        if max_points is not None:
+            try:
+                max_points = int(max_points)
+            except ValueError:
+                max_points = 0
+            if max_points < 1:
+                return self.json_message(
+                    'Invalid max_points', HTTP_BAD_REQUEST)
+
+        statistics_period = request.query.get('statistics')
+        if statistics_period is not None and statistics_period not in PERIODS:
+            return self.json_message('Invalid statistics', HTTP_BAD_REQUEST)
+
+        return await self._async_history_response(
+            request, start_time, end_time, entity_ids,
+            include_start_time_state, max_points, statistics_period,
+            timer_start)
+
+    async def _async_history_response(
+            self, request, start_time, end_time, entity_ids,
+            include_start_time_state, max_points, statistics_period,
+            timer_start):
+        """Return the history for the parsed request parameters."""
         hass = request.app['hass']
 
         result = await hass.async_add_job(
             get_significant_states, hass, start_time, end_time,
-            entity_ids, self.filters, include_start_time_state)
+            entity_ids, self.filters, include_start_time_state,
+            statistics_period)
         result = list(result.values())
         if _LOGGER.isEnabledFor(logging.DEBUG):
             elapsed = time.perf_counter() - timer_start
             _LOGGER.debug(
                 'Extracted %d states in %fs', sum(map(len, result)), elapsed)
 
+        if max_points:
+            result = [
+                list(downsample_states(
+                    state_list, start_time, end_time, max_points))
+                for state_list in result]
+
         # Optionally reorder the result to respect the ordering given
         # by any entities explicitly included in the configuration.
 
@@ -343,7 +724,7 @@ class HistoryPeriodView(HomeAssistantView):
             sorted_result = []
             for order_entity in self.filters.included_entities:
                 for state_list in result:
-                    if state_list[0].entity_id == order_entity:
+                    if _point_entity_id(state_list[0]) == order_entity:
                         sorted_result.append(state_list)
                         result.remove(state_list)
                         break
@@ -353,6 +734,101 @@ class HistoryPeriodView(HomeAssistantView):
         return await hass.async_add_job(self.json, result)
 
 
+class HistoryStreamView(HistoryPeriodView):
+    """Stream history period requests straight from the database.
+
+    The response has the same format as the history period view, but
+    entities are always ordered by entity_id.
+    """
+
+    url = '/api/history/stream'
+    name = 'api:history:view-stream'
+    extra_urls = ['/api/history/stream/{datetime}']
+
+    async def _async_history_response(
+            self, request, start_time, end_time, entity_ids,
+            include_start_time_state, max_points, statistics_period,
+            timer_start):
+        """Stream the history for the parsed request parameters."""
+        hass = request.app['hass']
+        chunks = asyncio.Queue(maxsize=STREAM_QUEUE_SIZE, loop=hass.loop)
+        cancelled = threading.Event()
+        stop_obj = object()
+
+        def put_chunk(chunk):
+            """Wait for room in the buffer unless the response is gone."""
+            future = run_coroutine_threadsafe(chunks.put(chunk), hass.loop)
+            while not cancelled.is_set():
+                try:
+                    future.result(timeout=1)
+                    return
+                except concurrent.futures.TimeoutError:
+                    pass
+            future.cancel()
+
+        def produce_chunks():
+            """Serialize the states of each entity into a chunk.
+
+            An error ends the stream in place of the stop marker.
+            """
+            try:
+                for entity_states in stream_significant_states(
+                        hass, start_time, end_time, entity_ids, self.filters,
+                        include_start_time_state, max_points,
+                        statistics_period):
+                    if cancelled.is_set():
+                        return
+                    put_chunk(json.dumps(
+                        entity_states, cls=JSONEncoder).encode('UTF-8'))
+            except Exception as err:  # pylint: disable=broad-except
+                put_chunk(err)
+            else:
+                put_chunk(stop_obj)
+
+        producer = hass.async_add_job(produce_chunks)
+        count = 0
+
+        try:
+            # Errors of the query are reported before the response starts
+            chunk = await chunks.get()
+            if isinstance(chunk, Exception):
+                _LOGGER.error("Error retrieving history: %s", chunk,
+                              exc_info=chunk)
+                return self.json_message(
+                    'Error retrieving history', HTTP_INTERNAL_SERVER_ERROR)
+
+            response = web.StreamResponse()
+            response.content_type = CONTENT_TYPE_JSON
+            response.enable_compression()
+            await response.prepare(request)
+
+            await response.write(b'[')
+            while chunk is not stop_obj:
+                if isinstance(chunk, Exception):
+                    # Abort instead of ending a truncated JSON array
+                    _LOGGER.error("Error streaming history: %s", chunk,
+                                  exc_info=chunk)
+                    request.transport.close()
+                    return response
+                if count:
+                    chunk = b',' + chunk
+                count += 1
+                await response.write(chunk)
+                chunk = await chunks.get()
+            await response.write(b']')
+        finally:
+            cancelled.set()
+
+        await producer
+
+        if _LOGGER.isEnabledFor(logging.DEBUG):
+            elapsed = time.perf_counter() - timer_start
+            _LOGGER.debug('Streamed %d entities in %fs', count, elapsed)
+
+        await response.write_eof()
+        return response
+
+
 class Filters(object):
     """Container for the configured include and exclude filters."""
 
@@ -412,6 +888,38 @@ class Filters(object):
             query = query.filter(~States.entity_id.in_(self.excluded_entities))
         return query
 
+    def entity_filter(self, entity_ids=None):
+        """Return a function that matches entity_ids like apply does."""
+        if entity_ids is not None:
+            entity_ids = set(entity_ids)
+            return entity_ids.__contains__
+
+        excluded_domains = set(self.excluded_domains)
+        included_domains = set(self.included_domains)
+        included_entities = set(self.included_entities)
+        excluded_entities = set(self.excluded_entities)
+
+        def matches(entity_id):
+            """Return if the entity is included."""
+            domain = split_entity_id(entity_id)[0]
+            if domain in IGNORE_DOMAINS or entity_id in excluded_entities:
+                return False
+            if excluded_domains and not included_domains:
+                return domain not in excluded_domains and \
+                    (not included_entities or entity_id in included_entities)
+            if included_domains and not excluded_domains:
+                return domain in included_domains or \
+                    entity_id in included_entities
+            if excluded_domains and included_domains:
+                return domain not in excluded_domains and \
+                    (domain in included_domains or
+                     entity_id in included_entities)
+            if included_entities:
+                return entity_id in included_entities
+            return True
+
+        return matches
+
 
 def _is_significant(state):
     """Test if state is significant for history charts.
@@ -18,7 +18,8 @@ from homeassistant.const import (
     EVENT_LOGBOOK_ENTRY, EVENT_STATE_CHANGED, HTTP_BAD_REQUEST, STATE_NOT_HOME,
     STATE_OFF, STATE_ON)
 from homeassistant.core import DOMAIN as HA_DOMAIN
-from homeassistant.core import State, callback, split_entity_id
+from homeassistant.core import (
+    EXECUTOR_DATABASE, State, callback, in_executor, split_entity_id)
 import homeassistant.helpers.config_validation as cv
 import homeassistant.util.dt as dt_util
 
@@ -36,6 +37,9 @@ DOMAIN = 'logbook'
 
 GROUP_BY_MINUTES = 15
 
+# Number of events read from the database at once when paginating
+EVENTS_BATCH_SIZE = 1000
+
 CONFIG_SCHEMA = vol.Schema({
     DOMAIN: vol.Schema({
         CONF_EXCLUDE: vol.Schema({
@@ -119,7 +123,12 @@ class LogbookView(HomeAssistantView):
         self.config = config
 
     async def get(self, request, datetime=None):
-        """Retrieve logbook entries."""
+        """Retrieve logbook entries.
+
+        Without a limit all entries of the period are returned. With a limit
+        a page of entries is returned together with the cursor to pass to
+        fetch the next page.
+        """
         if datetime:
             datetime = dt_util.parse_datetime(datetime)
 
@@ -129,13 +138,52 @@ class LogbookView(HomeAssistantView):
             datetime = dt_util.start_of_local_day()
 
         start_day = dt_util.as_utc(datetime)
-        end_day = start_day + timedelta(days=1)
+
+        end_day = request.query.get('end_time')
+        if end_day:
+            end_day = dt_util.parse_datetime(end_day)
+            if end_day is None:
+                return self.json_message('Invalid end_time', HTTP_BAD_REQUEST)
+            end_day = dt_util.as_utc(end_day)
+        else:
+            end_day = start_day + timedelta(days=1)
+
+        entity_id = request.query.get('entity_id')
+        if entity_id is not None:
+            entity_id = entity_id.lower()
+
+        limit = request.query.get('limit')
+        if limit is not None:
+            try:
+                limit = int(limit)
+            except ValueError:
+                limit = 0
+            if limit < 1:
+                return self.json_message('Invalid limit', HTTP_BAD_REQUEST)
+
+        cursor = request.query.get('cursor')
+        if cursor is not None:
+            cursor = dt_util.parse_datetime(cursor)
+            if cursor is None:
+                return self.json_message('Invalid cursor', HTTP_BAD_REQUEST)
+            cursor = dt_util.as_utc(cursor)
+
         hass = request.app['hass']
 
+        @in_executor(EXECUTOR_DATABASE)
         def json_events():
             """Fetch events and generate JSON."""
-            return self.json(list(
-                _get_events(hass, self.config, start_day, end_day)))
+            if limit is None and cursor is None:
+                return self.json(list(_get_events(
+                    hass, self.config, start_day, end_day, entity_id)))
+
+            entries, next_cursor = _get_events_page(
+                hass, self.config, cursor or start_day, end_day,
+                limit, entity_id, include_start=cursor is not None)
+            return self.json({
+                'entries': entries,
+                'cursor': next_cursor,
+            })
 
         return await hass.async_add_job(json_events)
 
@@ -173,9 +221,7 @@ def humanify(events):
     domain_prefixes = tuple('{}.'.format(dom) for dom in CONTINUOUS_DOMAINS)
 
     # Group events in batches of GROUP_BY_MINUTES
-    for _, g_events in groupby(
-            events,
-            lambda event: event.time_fired.minute // GROUP_BY_MINUTES):
+    for _, g_events in groupby(events, _event_group):
 
         events_batch = list(g_events)
 
@@ -264,26 +310,85 @@ def humanify(events):
                     entity_id)
 
 
-def _get_events(hass, config, start_day, end_day):
+def _event_group(event):
+    """Return the key of the GROUP_BY_MINUTES batch of an event."""
+    return event.time_fired.minute // GROUP_BY_MINUTES
+
+
+def _get_events(hass, config, start_day, end_day, entity_id=None):
     """Get events for a period of time."""
-    from homeassistant.components.recorder.models import Events, States
     from homeassistant.components.recorder.util import (
-        execute, session_scope)
+        execute_events, session_scope)
 
     with session_scope(hass=hass) as session:
-        query = session.query(Events).order_by(Events.time_fired) \
-            .outerjoin(States, (Events.event_id == States.event_id))  \
-            .filter(Events.event_type.in_(ALL_EVENT_TYPES)) \
-            .filter((Events.time_fired > start_day)
-                    & (Events.time_fired < end_day)) \
-            .filter((States.last_updated == States.last_changed)
-                    | (States.state_id.is_(None)))
-        events = execute(query)
-    return humanify(_exclude_events(events, config))
-
-
-def _exclude_events(events, config):
-    """Get list of filtered events."""
+        query = _events_query(session, config, start_day, end_day, entity_id)
+        events = execute_events(query)
+    return humanify(_exclude_events(events, config, entity_id))
+
+
+def _get_events_page(hass, config, start_time, end_time, limit,
+                     entity_id=None, include_start=False):
+    """Get a page of at least limit entries for a period of time.
+
+    Events are read from the database in batches and the page ends at the
+    boundary of a humanify group, so entries are the same as when fetching
+    the whole period. Returns the entries and the time to continue from, or
+    None if there are no more entries.
+    """
+    from homeassistant.components.recorder.util import (
+        session_scope, stream_events)
+
+    entries = []
+    filter_event = _event_filter(config, entity_id)
+
+    with session_scope(hass=hass) as session:
+        query = _events_query(
+            session, config, start_time, end_time, entity_id, include_start)
+        events = (
+            event for event in stream_events(query, EVENTS_BATCH_SIZE)
+            if filter_event(event))
+
+        for _, g_events in groupby(events, _event_group):
+            events_batch = list(g_events)
+            if len(entries) >= limit:
+                return entries, events_batch[0].time_fired
+            entries.extend(humanify(events_batch))
+
+    return entries, None
+
+
+def _events_query(session, config, start_day, end_day, entity_id=None,
+                  include_start=False):
+    """Return the query for the events logged during a period of time."""
+    from homeassistant.components.recorder.models import Events, States
+
+    if include_start:
+        after_start = Events.time_fired >= start_day
+    else:
+        after_start = Events.time_fired > start_day
+
+    query = session.query(Events).order_by(Events.time_fired) \
+        .outerjoin(States, (Events.event_id == States.event_id))  \
+        .filter(Events.event_type.in_(ALL_EVENT_TYPES)) \
+        .filter(after_start & (Events.time_fired < end_day)) \
+        .filter((States.last_updated == States.last_changed)
+                | (States.state_id.is_(None)))
+
+    states_filter = _states_filter(config)
+    if states_filter is not None:
+        query = query.filter(states_filter | States.state_id.is_(None))
+
+    if entity_id is not None:
+        # Logbook entries store the entity_id in the event data only
+        query = query.filter(
+            (States.entity_id == entity_id) |
+            (Events.event_type == EVENT_LOGBOOK_ENTRY))
+
+    return query
+
+
+def _filter_lists(config):
+    """Return the excluded and included domains and entities."""
     excluded_entities = []
     excluded_domains = []
     included_entities = []
@@ -296,26 +401,77 @@ def _exclude_events(events, config):
     if include:
         included_entities = include[CONF_ENTITIES]
         included_domains = include[CONF_DOMAINS]
+    return (excluded_entities, excluded_domains, included_entities,
+            included_domains)
+
+
+def _states_filter(config):
+    """Return the SQL clause for the state changes kept by the filters.
+
+    Matches the domain and entity filtering of _exclude_events, so
+    excluded state changes are never loaded. Returns None without filters.
+    """
+    from homeassistant.components.recorder.models import States
+    from sqlalchemy import false
+
+    excluded_entities, excluded_domains, included_entities, \
+        included_domains = _filter_lists(config)
+
+    def is_in(column, values):
+        """Return the clause for column in values."""
+        return column.in_(values) if values else false()
+
+    included_entity = is_in(States.entity_id, included_entities)
+    clause = None
+
+    if excluded_domains and not included_domains:
+        clause = ~States.domain.in_(excluded_domains) | included_entity
+    elif included_domains and not excluded_domains:
+        clause = States.domain.in_(included_domains) | included_entity
+    elif excluded_domains and included_domains:
+        clause = ~States.domain.in_(excluded_domains) & (
+            States.domain.in_(included_domains) | included_entity)
+    elif included_entities:
+        clause = included_entity
+
+    if excluded_entities:
+        excluded = ~States.entity_id.in_(excluded_entities)
+        clause = excluded if clause is None else clause & excluded
 
-    filtered_events = []
-    for event in events:
+    return clause
+
+
+def _exclude_events(events, config, entity_id=None):
+    """Get list of filtered events."""
+    filter_event = _event_filter(config, entity_id)
+    return [event for event in events if filter_event(event)]
+
+
+def _event_filter(config, entity_id=None):
+    """Return a function telling if an event should be in the logbook."""
+    excluded_entities, excluded_domains, included_entities, \
+        included_domains = _filter_lists(config)
+    only_entity_id = entity_id
+
+    def filter_event(event):
+        """Return True if the event is not filtered out."""
         domain, entity_id = None, None
 
         if event.event_type == EVENT_STATE_CHANGED:
             entity_id = event.data.get('entity_id')
 
             if entity_id is None:
-                continue
+                return False
 
             # Do not report on new entities
             if event.data.get('old_state') is None:
-                continue
+                return False
 
             new_state = event.data.get('new_state')
 
             # Do not report on entity removal
             if not new_state:
-                continue
+                return False
 
             attributes = new_state.get('attributes', {})
 
@@ -324,52 +480,57 @@ def _exclude_events(events, config):
             last_changed = new_state.get('last_changed')
             last_updated = new_state.get('last_updated')
             if last_changed != last_updated:
-                continue
+                return False
 
             domain = split_entity_id(entity_id)[0]
 
             # Also filter auto groups.
             if domain == 'group' and attributes.get('auto', False):
-                continue
+                return False
 
             # exclude entities which are customized hidden
             hidden = attributes.get(ATTR_HIDDEN, False)
             if hidden:
-                continue
+                return False
 
         elif event.event_type == EVENT_LOGBOOK_ENTRY:
             domain = event.data.get(ATTR_DOMAIN)
             entity_id = event.data.get(ATTR_ENTITY_ID)
 
+        if only_entity_id is not None and entity_id != only_entity_id:
+            return False
+
         if domain or entity_id:
             # filter if only excluded is configured for this domain
             if excluded_domains and domain in excluded_domains and \
                     not included_domains:
                 if (included_entities and entity_id not in included_entities) \
                         or not included_entities:
-                    continue
+                    return False
             # filter if only included is configured for this domain
             elif not excluded_domains and included_domains and \
                     domain not in included_domains:
                 if (included_entities and entity_id not in included_entities) \
                         or not included_entities:
-                    continue
+                    return False
             # filter if included and excluded is configured for this domain
             elif excluded_domains and included_domains and \
                     (domain not in included_domains or
                      domain in excluded_domains):
                 if (included_entities and entity_id not in included_entities) \
                         or not included_entities or domain in excluded_domains:
-                    continue
+                    return False
             # filter if only included is configured for this entity
             elif not excluded_domains and not included_domains and \
                     included_entities and entity_id not in included_entities:
-                continue
+                return False
             # check if logbook entry is excluded for this entity
             if entity_id in excluded_entities:
-                continue
-        filtered_events.append(event)
-    return filtered_events
+                return False
+
+        return True
+
+    return filter_event
 
 
 def _entry_message_from_state(domain, state):
@@ -6,7 +6,8 @@ https://home-assistant.io/components/mqtt/
 """
 import asyncio
 from itertools import groupby
-from typing import Optional, Any, Union, Callable, List, cast  # noqa: F401
+from typing import (  # noqa: F401
+    Optional, Any, Union, Callable, Dict, List, cast)
 from operator import attrgetter
 import logging
 import os
@@ -14,6 +15,7 @@ import socket
 import time
 import ssl
 import re
+import threading
 import requests.certs
 import attr
 
@@ -89,6 +91,11 @@ ATTR_RETAIN = CONF_RETAIN
 
 MAX_RECONNECT_WAIT = 300  # seconds
 
+# Received messages waiting to be handled in the event loop
+MAX_PENDING_MESSAGES = 10000
+# Time the paho thread waits for room in a full buffer before dropping
+PENDING_MESSAGES_WAIT = 10  # seconds
+
 
 def valid_topic(value: Any) -> str:
     """Validate that this is a valid topic name/filter."""
@@ -481,6 +488,99 @@ class Message(object):
     retain = attr.ib(type=bool, default=False)
 
 
+class _SubscriptionTrie(object):
+    """Subscriptions indexed by the levels of their topic filter.
+
+    Matching a topic follows its levels through the trie, so the cost
+    depends on the depth of the topic instead of the number of
+    subscriptions.
+    """
+
+    __slots__ = ['children', 'subscriptions', 'subtree_subscriptions']
+
+    def __init__(self) -> None:
+        """Initialize an empty trie."""
+        self.children = {}  # type: Dict[str, _SubscriptionTrie]
+        # Subscriptions with a filter ending at this level
+        self.subscriptions = []  # type: List[Subscription]
+        # Subscriptions with a filter ending with '#' after this level
+        self.subtree_subscriptions = []  # type: List[Subscription]
+
+    def __bool__(self) -> bool:
+        """Return if the trie contains any subscriptions."""
+        return bool(self.children or self.subscriptions or
+                    self.subtree_subscriptions)
+
+    def add(self, subscription: Subscription) -> None:
+        """Add a subscription."""
+        levels = subscription.topic.split('/')
+        subtree = levels[-1] == '#'
+        if subtree:
+            levels.pop()
+
+        node = self
+        for level in levels:
+            child = node.children.get(level)
+            if child is None:
+                child = node.children[level] = _SubscriptionTrie()
+            node = child
+
+        if subtree:
+            node.subtree_subscriptions.append(subscription)
+        else:
+            node.subscriptions.append(subscription)
+
+    def remove(self, subscription: Subscription) -> None:
+        """Remove a subscription, pruning the levels left empty."""
+        levels = subscription.topic.split('/')
+        subtree = levels[-1] == '#'
+        if subtree:
+            levels.pop()
+
+        path = []
+        node = self
+        for level in levels:
+            path.append((node, level))
+            node = node.children[level]
+
+        if subtree:
+            node.subtree_subscriptions.remove(subscription)
+        else:
+            node.subscriptions.remove(subscription)
+
+        for parent, level in reversed(path):
+            if parent.children[level]:
+                break
+            del parent.children[level]
+
+    def match(self, topic: str) -> List[Subscription]:
+        """Return the subscriptions with a filter matching topic."""
+        matches = []  # type: List[Subscription]
+        nodes = [self]
+
+        for level in topic.split('/'):
+            next_nodes = []
+            for node in nodes:
+                matches.extend(node.subtree_subscriptions)
+                child = node.children.get(level)
+                if child is not None:
+                    next_nodes.append(child)
+                child = node.children.get('+')
+                if child is not None:
+                    next_nodes.append(child)
+
+            nodes = next_nodes
+            if not nodes:
+                return matches
+
+        for node in nodes:
+            matches.extend(node.subscriptions)
+            # A '#' filter also matches its parent level
+            matches.extend(node.subtree_subscriptions)
+
+        return matches
+
+
 class MQTT(object):
     """Home Assistant MQTT client."""
 
@@ -499,10 +599,20 @@ class MQTT(object):
         self.port = port
         self.keepalive = keepalive
         self.subscriptions = []  # type: List[Subscription]
+        self._subscription_trie = _SubscriptionTrie()
         self.birth_message = birth_message
         self._mqttc = None  # type: mqtt.Client
         self._paho_lock = asyncio.Lock(loop=hass.loop)
 
+        # Messages received by the paho thread, handled in batches
+        self._pending_messages = []  # type: List[Any]
+        self._pending_condition = threading.Condition()
+        self._handle_scheduled = False
+        self._handled_batches = 0
+        self._max_pending_messages = 0
+        self._overflows = 0
+        self._dropped_messages = 0
+
         if protocol == PROTOCOL_31:
             proto = mqtt.MQTTv31  # type: int
         else:
@@ -531,6 +641,17 @@ class MQTT(object):
         if will_message is not None:
             self._mqttc.will_set(*attr.astuple(will_message))
 
+    @property
+    def stats(self) -> Dict[str, Any]:
+        """Return statistics about the received messages buffer."""
+        return {
+            'pending_messages': len(self._pending_messages),
+            'max_pending_messages': self._max_pending_messages,
+            'handled_batches': self._handled_batches,
+            'overflows': self._overflows,
+            'dropped_messages': self._dropped_messages,
+        }
+
     async def async_publish(self, topic: str, payload: PublishPayloadType,
                             qos: int, retain: bool) -> None:
         """Publish a MQTT message.
@@ -587,6 +708,7 @@ class MQTT(object):
 
         subscription = Subscription(topic, msg_callback, qos, encoding)
         self.subscriptions.append(subscription)
+        self._subscription_trie.add(subscription)
 
         await self._async_perform_subscription(topic, qos)
 
@@ -596,6 +718,7 @@ class MQTT(object):
             if subscription not in self.subscriptions:
                 raise HomeAssistantError("Can't remove subscription twice")
             self.subscriptions.remove(subscription)
+            self._subscription_trie.remove(subscription)
 
             if any(other.topic == topic for other in self.subscriptions):
                 # Other subscriptions on topic remaining - don't unsubscribe.
@@ -653,26 +776,71 @@ class MQTT(object):
                 self.async_publish(*attr.astuple(self.birth_message)))
 
     def _mqtt_on_message(self, _mqttc, _userdata, msg) -> None:
-        """Message received callback."""
-        self.hass.add_job(self._mqtt_handle_message, msg)
+        """Message received callback.
+
+        Messages are buffered and handled in batches by a single job in the
+        event loop. When the buffer is full the paho thread waits for the
+        event loop to catch up, which stops reading from the broker.
+        """
+        with self._pending_condition:
+            if len(self._pending_messages) >= MAX_PENDING_MESSAGES:
+                self._overflows += 1
+                if not self._pending_condition.wait_for(
+                        lambda: (len(self._pending_messages) <
+                                 MAX_PENDING_MESSAGES),
+                        PENDING_MESSAGES_WAIT):
+                    self._dropped_messages += 1
+                    _LOGGER.warning("Dropped message on %s, %d messages "
+                                    "are waiting to be handled",
+                                    msg.topic, len(self._pending_messages))
+                    return
+
+            self._pending_messages.append(msg)
+            self._max_pending_messages = max(
+                self._max_pending_messages, len(self._pending_messages))
+
+            if self._handle_scheduled:
+                return
+            self._handle_scheduled = True
+
+        self.hass.add_job(self._mqtt_handle_messages)
+
+    @callback
+    def _mqtt_handle_messages(self) -> None:
+        """Handle the messages received since the last batch."""
+        with self._pending_condition:
+            messages = self._pending_messages
+            self._pending_messages = []
+            self._handle_scheduled = False
+            self._handled_batches += 1
+            self._pending_condition.notify_all()
+
+        for msg in messages:
+            self._mqtt_handle_message(msg)
 
     @callback
     def _mqtt_handle_message(self, msg) -> None:
         _LOGGER.debug("Received message on %s: %s", msg.topic, msg.payload)
 
-        for subscription in self.subscriptions:
-            if not _match_topic(subscription.topic, msg.topic):
-                continue
+        # Payload decoded once per encoding, None if it can't be decoded
+        payloads = {}  # type: Dict[str, Optional[str]]
 
+        for subscription in self._subscription_trie.match(msg.topic):
             payload = msg.payload  # type: SubscribePayloadType
             if subscription.encoding is not None:
-                try:
-                    payload = msg.payload.decode(subscription.encoding)
-                except (AttributeError, UnicodeDecodeError):
-                    _LOGGER.warning("Can't decode payload %s on %s "
-                                    "with encoding %s",
-                                    msg.payload, msg.topic,
-                                    subscription.encoding)
+                if subscription.encoding not in payloads:
+                    try:
+                        payloads[subscription.encoding] = \
+                            msg.payload.decode(subscription.encoding)
+                    except (AttributeError, UnicodeDecodeError):
+                        payloads[subscription.encoding] = None
+                        _LOGGER.warning("Can't decode payload %s on %s "
+                                        "with encoding %s",
+                                        msg.payload, msg.topic,
+                                        subscription.encoding)
+
+                payload = payloads[subscription.encoding]
+                if payload is None:
                     continue
 
             self.hass.async_run_job(subscription.callback,
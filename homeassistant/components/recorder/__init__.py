@@ -8,7 +8,7 @@ For more details about this component, please refer to the documentation at
 https://home-assistant.io/components/recorder/
 """
 import asyncio
-from collections import namedtuple
+from collections import OrderedDict, namedtuple
 import concurrent.futures
 from datetime import datetime, timedelta
 import logging
@@ -16,7 +16,7 @@ import queue
 import threading
 import time
 
-from typing import Any, Dict, Optional  # noqa: F401
+from typing import Any, Dict, List, Optional  # noqa: F401
 
 import voluptuous as vol
 
@@ -27,12 +27,15 @@ from homeassistant.const import (
 from homeassistant.core import CoreState, HomeAssistant, callback
 import homeassistant.helpers.config_validation as cv
 from homeassistant.helpers.entityfilter import generate_filter
+from homeassistant.helpers.storage import Store
 from homeassistant.helpers.typing import ConfigType
 import homeassistant.util.dt as dt_util
 from homeassistant.loader import bind_hass
 
-from . import migration, purge
-from .const import DATA_INSTANCE
+from . import migration, purge, statistics
+from .cache import RecentStates
+from .const import (
+    DATA_INSTANCE, LAST_STATES_STORAGE_KEY, LAST_STATES_STORAGE_VERSION)
 from .util import session_scope
 
 REQUIREMENTS = ['sqlalchemy==1.2.9']
@@ -58,9 +61,24 @@ CONF_DB_URL = 'db_url'
 CONF_PURGE_KEEP_DAYS = 'purge_keep_days'
 CONF_PURGE_INTERVAL = 'purge_interval'
 CONF_EVENT_TYPES = 'event_types'
+CONF_COMMIT_INTERVAL = 'commit_interval'
+CONF_COMMIT_MAX_EVENTS = 'commit_max_events'
+CONF_STATISTICS = 'statistics'
+CONF_CACHE_MAX_STATES = 'cache_max_states'
+
+DEFAULT_COMMIT_INTERVAL = 1
+DEFAULT_COMMIT_MAX_EVENTS = 1000
+DEFAULT_STATISTICS = [statistics.PERIOD_HOUR]
+DEFAULT_CACHE_MAX_STATES = 100000
+
+# States of this period are kept in memory to answer history queries
+CACHE_MAX_AGE = timedelta(days=1)
 
 CONNECT_RETRY_WAIT = 3
 
+# Number of recently written attributes to remember the database id of
+ATTRIBUTES_CACHE_SIZE = 2048
+
 FILTER_SCHEMA = vol.Schema({
     vol.Optional(CONF_EXCLUDE, default={}): vol.Schema({
         vol.Optional(CONF_DOMAINS): vol.All(cv.ensure_list, [cv.string]),
@@ -80,6 +98,16 @@ CONFIG_SCHEMA = vol.Schema({
         vol.Optional(CONF_PURGE_INTERVAL, default=1):
             vol.All(vol.Coerce(int), vol.Range(min=0)),
         vol.Optional(CONF_DB_URL): cv.string,
+        vol.Optional(CONF_COMMIT_INTERVAL, default=DEFAULT_COMMIT_INTERVAL):
+            vol.All(vol.Coerce(float), vol.Range(min=0)),
+        vol.Optional(CONF_COMMIT_MAX_EVENTS,
+                     default=DEFAULT_COMMIT_MAX_EVENTS):
+            vol.All(vol.Coerce(int), vol.Range(min=1)),
+        vol.Optional(CONF_STATISTICS, default=DEFAULT_STATISTICS):
+            vol.All(cv.ensure_list, [vol.In(statistics.PERIODS)]),
+        vol.Optional(CONF_CACHE_MAX_STATES,
+                     default=DEFAULT_CACHE_MAX_STATES):
+            vol.All(vol.Coerce(int), vol.Range(min=0)),
     })
 }, extra=vol.ALLOW_EXTRA)
 
@@ -116,6 +144,12 @@ async def async_setup(hass: HomeAssistant, config: ConfigType) -> bool:
     conf = config.get(DOMAIN, {})
     keep_days = conf.get(CONF_PURGE_KEEP_DAYS)
     purge_interval = conf.get(CONF_PURGE_INTERVAL)
+    commit_interval = conf.get(CONF_COMMIT_INTERVAL, DEFAULT_COMMIT_INTERVAL)
+    commit_max_events = conf.get(
+        CONF_COMMIT_MAX_EVENTS, DEFAULT_COMMIT_MAX_EVENTS)
+    statistics_periods = conf.get(CONF_STATISTICS, DEFAULT_STATISTICS)
+    cache_max_states = conf.get(
+        CONF_CACHE_MAX_STATES, DEFAULT_CACHE_MAX_STATES)
 
     db_url = conf.get(CONF_DB_URL, None)
     if not db_url:
@@ -126,7 +160,11 @@ async def async_setup(hass: HomeAssistant, config: ConfigType) -> bool:
     exclude = conf.get(CONF_EXCLUDE, {})
     instance = hass.data[DATA_INSTANCE] = Recorder(
         hass=hass, keep_days=keep_days, purge_interval=purge_interval,
-        uri=db_url, include=include, exclude=exclude)
+        uri=db_url, include=include, exclude=exclude,
+        commit_interval=commit_interval, commit_max_events=commit_max_events,
+        statistics_periods=statistics_periods,
+        cache_max_states=cache_max_states)
+    await instance.async_load_last_states()
     instance.async_initialize()
     instance.start()
 
@@ -149,13 +187,30 @@ class Recorder(threading.Thread):
 
     def __init__(self, hass: HomeAssistant, keep_days: int,
                  purge_interval: int, uri: str,
-                 include: Dict, exclude: Dict) -> None:
+                 include: Dict, exclude: Dict,
+                 commit_interval: float = DEFAULT_COMMIT_INTERVAL,
+                 commit_max_events: int = DEFAULT_COMMIT_MAX_EVENTS,
+                 statistics_periods: Optional[List[str]] = None,
+                 cache_max_states: int = DEFAULT_CACHE_MAX_STATES) -> None:
         """Initialize the recorder."""
+        from homeassistant.remote import JSONEncoder
+
         threading.Thread.__init__(self, name='Recorder')
 
         self.hass = hass
         self.keep_days = keep_days
         self.purge_interval = purge_interval
+        self.commit_interval = commit_interval
+        self.commit_max_events = commit_max_events
+        if statistics_periods is None:
+            statistics_periods = DEFAULT_STATISTICS
+        self.statistics_periods = statistics_periods
+        self.statistics = statistics.StatisticsCollector(
+            [statistics.PERIODS[period] for period in statistics_periods])
+        self.recent_states = None  # type: Optional[RecentStates]
+        if cache_max_states:
+            self.recent_states = RecentStates(
+                cache_max_states, CACHE_MAX_AGE.total_seconds())
         self.queue = queue.Queue()  # type: Any
         self.recording_start = dt_util.utcnow()
         self.db_url = uri
@@ -170,11 +225,86 @@ class Recorder(threading.Thread):
 
         self.get_session = None
 
+        self.last_states_store = Store(
+            hass, LAST_STATES_STORAGE_VERSION, LAST_STATES_STORAGE_KEY,
+            compact=True, encoder=JSONEncoder)
+        # States stored when Home Assistant stopped, kept until started
+        self.last_states = None  # type: Optional[List[Dict]]
+
+        self._commits = 0
+        self._committed_events = 0
+        self._last_commit_events = 0
+        self._last_commit_duration = None  # type: Optional[float]
+        self._max_commit_duration = None  # type: Optional[float]
+
+        # Rows deleted per table by the running purge
+        self._purge_progress = None  # type: Optional[Dict[str, int]]
+        self._purge_started = None  # type: Optional[float]
+
+        # Serialized attributes -> attributes_id, least recently used first
+        self._attributes_ids = OrderedDict()  # type: OrderedDict
+
+    @property
+    def stats(self) -> Dict[str, Any]:
+        """Return statistics about the commit pipeline and purge."""
+        return {
+            'queue_depth': self.queue.qsize(),
+            'commits': self._commits,
+            'committed_events': self._committed_events,
+            'last_commit_events': self._last_commit_events,
+            'last_commit_duration': self._last_commit_duration,
+            'max_commit_duration': self._max_commit_duration,
+            'purge_in_progress': self._purge_progress is not None,
+            'purge_deleted_rows': dict(self._purge_progress or {}),
+        }
+
+    async def async_load_last_states(self):
+        """Load the states stored when Home Assistant last stopped.
+
+        The stored states are marked as used right away. If Home Assistant
+        does not stop cleanly, the database holds newer states than the
+        store and restore_state reads them from the database instead.
+        """
+        stored = await self.last_states_store.async_load()
+
+        if stored is None or stored['states'] is None:
+            return
+
+        self.last_states = stored['states']
+        await self.last_states_store.async_save({'states': None})
+
     @callback
     def async_initialize(self):
         """Initialize the recorder."""
         self.hass.bus.async_listen(MATCH_ALL, self.event_listener)
 
+        # States of restored entities are only known once started
+        if self.hass.state == CoreState.running:
+            self._async_track_last_states()
+        else:
+            self.hass.bus.async_listen_once(
+                EVENT_HOMEASSISTANT_START, self._async_track_last_states)
+
+    @callback
+    def _async_track_last_states(self, event=None):
+        """Store the last states when Home Assistant stops."""
+        self.last_states = None
+        self.hass.bus.async_listen_once(
+            EVENT_HOMEASSISTANT_STOP, self._async_save_last_states)
+
+    async def _async_save_last_states(self, event):
+        """Store the current state of all recorded entities.
+
+        The states are serialized and written in the executor.
+        """
+        if EVENT_STATE_CHANGED in self.exclude_t:
+            states = []
+        else:
+            states = [state for state in self.hass.states.async_all()
+                      if self.entity_filter(state.entity_id)]
+
+        await self.last_states_store.async_save({'states': states})
+
     def do_adhoc_purge(self, **kwargs):
         """Trigger an adhoc purge retaining keep_days worth of data."""
         keep_days = kwargs.get(ATTR_KEEP_DAYS, self.keep_days)
@@ -184,9 +314,8 @@ class Recorder(threading.Thread):
 
     def run(self):
         """Start processing events to save."""
-        from .models import States, Events
+        from .models import Events
         from homeassistant.components import persistent_notification
-        from sqlalchemy import exc
 
         tries = 1
         connected = False
@@ -247,6 +376,11 @@ class Recorder(threading.Thread):
                     EVENT_HOMEASSISTANT_START, notify_hass_started)
 
         self.hass.add_job(register)
+
+        # Events are only committed once Home Assistant has started, the
+        # cache is complete before the first commit
+        self._load_recent_states()
+
         result = hass_started.result()
 
         # If shutdown happened before Home Assistant finished starting
@@ -276,16 +410,33 @@ class Recorder(threading.Thread):
 
             self.hass.helpers.event.track_point_in_time(async_purge, run)
 
+        # Events waiting to be committed in the next batch
+        pending = []
+        commit_deadline = None
+
         while True:
-            event = self.queue.get()
+            try:
+                if pending:
+                    event = self.queue.get(timeout=max(
+                        0, commit_deadline - time.monotonic()))
+                else:
+                    event = self.queue.get()
+            except queue.Empty:
+                self._commit_events(pending)
+                pending = []
+                continue
 
             if event is None:
+                self._commit_events(pending)
+                self._commit_statistics(self.statistics.flush())
                 self._close_run()
                 self._close_connection()
                 self.queue.task_done()
                 return
             elif isinstance(event, PurgeTask):
-                purge.purge_old_data(self, event.keep_days, event.repack)
+                self._commit_events(pending)
+                pending = []
+                self._purge_chunk(event)
                 self.queue.task_done()
                 continue
             elif event.event_type == EVENT_TIME_CHANGED:
@@ -301,35 +452,222 @@ class Recorder(threading.Thread):
                     self.queue.task_done()
                     continue
 
-            tries = 1
-            updated = False
-            while not updated and tries <= 10:
-                if tries != 1:
-                    time.sleep(CONNECT_RETRY_WAIT)
-                try:
-                    with session_scope(session=self.get_session()) as session:
-                        dbevent = Events.from_event(event)
-                        session.add(dbevent)
-                        session.flush()
+            if not pending:
+                commit_deadline = time.monotonic() + self.commit_interval
+
+            pending.append(event)
+
+            if len(pending) >= self.commit_max_events:
+                self._commit_events(pending)
+                pending = []
+
+    def _commit_events(self, events):
+        """Write a batch of events to the database in one transaction."""
+        from .models import States, Events
+        from sqlalchemy import exc
+
+        if not events:
+            return
 
+        timer_start = time.perf_counter()
+
+        # Completed statistics are written in the same transaction
+        completed_statistics = []
+        for event in events:
+            if event.event_type == EVENT_STATE_CHANGED:
+                new_state = event.data.get('new_state')
+                if new_state is not None:
+                    completed_statistics.extend(
+                        self.statistics.add_state(new_state))
+
+        tries = 1
+        updated = False
+        while not updated and tries <= 10:
+            if tries != 1:
+                time.sleep(CONNECT_RETRY_WAIT)
+            try:
+                with session_scope(session=self.get_session()) as session:
+                    dbevents = [Events.from_event(event) for event in events]
+                    session.add_all(dbevents)
+                    session.flush()
+
+                    new_attributes = {}
+                    recorded_states = []
+                    for event, dbevent in zip(events, dbevents):
                         if event.event_type == EVENT_STATE_CHANGED:
                             dbstate = States.from_event(event)
                             dbstate.event_id = dbevent.event_id
+                            recorded_states.append((
+                                dbstate.entity_id, dbstate.state,
+                                dbstate.attributes, dbstate.last_changed,
+                                dbstate.last_updated))
+                            self._share_attributes(
+                                session, dbstate, new_attributes)
                             session.add(dbstate)
-                    updated = True
 
-                except exc.OperationalError as err:
-                    _LOGGER.error("Error in database connectivity: %s. "
-                                  "(retrying in %s seconds)", err,
-                                  CONNECT_RETRY_WAIT)
-                    tries += 1
+                    statistics.write_statistics(
+                        session, completed_statistics)
+                    session.flush()
+                    new_attributes_ids = {
+                        shared_attrs: dbattributes.attributes_id
+                        for shared_attrs, dbattributes
+                        in new_attributes.items()}
+                updated = True
+
+            except exc.OperationalError as err:
+                _LOGGER.error("Error in database connectivity: %s. "
+                              "(retrying in %s seconds)", err,
+                              CONNECT_RETRY_WAIT)
+                tries += 1
+
+        if updated:
+            # Only remember attributes that made it into the database
+            for shared_attrs, attributes_id in new_attributes_ids.items():
+                self._cache_attributes_id(shared_attrs, attributes_id)
+
+            if self.recent_states is not None:
+                self.recent_states.add_all(recorded_states)
 
-            if not updated:
-                _LOGGER.error("Error in database update. Could not save "
-                              "after %d tries. Giving up", tries)
+        if not updated:
+            _LOGGER.error("Error in database update. Could not save "
+                          "after %d tries. Giving up", tries)
 
+        elapsed = time.perf_counter() - timer_start
+        self._commits += 1
+        self._committed_events += len(events)
+        self._last_commit_events = len(events)
+        self._last_commit_duration = elapsed
+        if self._max_commit_duration is None or \
+                elapsed > self._max_commit_duration:
+            self._max_commit_duration = elapsed
+
+        _LOGGER.debug("Committed %d events in %fs, %d events queued",
+                      len(events), elapsed, self.queue.qsize())
+
+        for _ in events:
             self.queue.task_done()
 
+    def _purge_chunk(self, task):
+        """Purge a chunk of old data, queue the task again until done.
+
+        Events that arrived meanwhile are written before the next chunk.
+        """
+        if self._purge_progress is None:
+            self._purge_progress = {}
+            self._purge_started = time.perf_counter()
+
+        if not purge.purge_old_data(self, task.keep_days, task.repack,
+                                    self._purge_progress):
+            _LOGGER.debug("Purge in progress, deleted rows: %s",
+                          self._purge_progress)
+            self.queue.put(task)
+            return
+
+        _LOGGER.info("Purge finished in %.3fs, deleted rows: %s",
+                     time.perf_counter() - self._purge_started,
+                     self._purge_progress)
+        self._purge_progress = None
+
+    def _commit_statistics(self, buckets):
+        """Write statistics buckets to the database."""
+        from sqlalchemy import exc
+
+        if not buckets:
+            return
+
+        try:
+            with session_scope(session=self.get_session()) as session:
+                statistics.write_statistics(session, buckets)
+        except exc.SQLAlchemyError as err:
+            _LOGGER.error("Error saving statistics: %s", err)
+
+    def _load_recent_states(self):
+        """Fill the recent states cache from the database.
+
+        Only the columns of the states are loaded. Until the cache is
+        filled, history queries are answered from the database.
+        """
+        from sqlalchemy import exc
+        from .models import States, process_timestamp, state_columns_query
+
+        if self.recent_states is None:
+            return
+
+        since = dt_util.utcnow() - CACHE_MAX_AGE
+        max_states = self.recent_states.max_states
+
+        try:
+            with session_scope(session=self.get_session()) as session:
+                rows = state_columns_query(session.query(States)) \
+                    .filter(States.last_updated > since) \
+                    .order_by(States.last_updated.desc()) \
+                    .limit(max_states).all()
+        except exc.SQLAlchemyError as err:
+            _LOGGER.error("Error loading recent states: %s", err)
+            return
+
+        recorded_states = [
+            (entity_id, state, shared_attrs or '{}',
+             process_timestamp(last_changed), process_timestamp(last_updated))
+            for entity_id, state, shared_attrs, last_changed, last_updated
+            in reversed(rows)]
+
+        # Older states did not fit, only states after the oldest are complete
+        if len(recorded_states) == max_states:
+            since = recorded_states[0][4]
+
+        # The cache covers no period until since is set by evict_until
+        self.recent_states.add_all(recorded_states)
+        self.recent_states.evict_until(since.timestamp())
+        _LOGGER.debug("Loaded %d recent states", len(recorded_states))
+
+    def _share_attributes(self, session, dbstate, new_attributes):
+        """Point dbstate to the shared row holding its attributes.
+
+        new_attributes maps serialized attributes to rows that were added in
+        the current transaction.
+        """
+        from .models import StateAttributes
+
+        shared_attrs = dbstate.attributes
+        dbstate.attributes = None
+
+        attributes_id = self._attributes_ids.get(shared_attrs)
+        if attributes_id is not None:
+            self._attributes_ids.move_to_end(shared_attrs)
+            dbstate.attributes_id = attributes_id
+            return
+
+        dbattributes = new_attributes.get(shared_attrs)
+
+        if dbattributes is None:
+            attributes_hash = StateAttributes.hash_shared_attrs(shared_attrs)
+            for candidate in session.query(StateAttributes).filter(
+                    StateAttributes.hash == attributes_hash):
+                if candidate.shared_attrs == shared_attrs:
+                    dbattributes = candidate
+                    break
+            else:
+                dbattributes = StateAttributes(
+                    hash=attributes_hash, shared_attrs=shared_attrs)
+                session.add(dbattributes)
+
+            new_attributes[shared_attrs] = dbattributes
+
+        dbstate.state_attributes = dbattributes
+
+    def _cache_attributes_id(self, shared_attrs, attributes_id):
+        """Remember the id of serialized attributes in the database."""
+        self._attributes_ids[shared_attrs] = attributes_id
+        self._attributes_ids.move_to_end(shared_attrs)
+
+        if len(self._attributes_ids) > ATTRIBUTES_CACHE_SIZE:
+            self._attributes_ids.popitem(last=False)
+
+    def _clear_attributes_cache(self):
+        """Forget cached attribute ids, call after purging attributes."""
+        self._attributes_ids.clear()
+
     @callback
     def event_listener(self, event):
         """Listen for new events and put them in the process queue."""
@@ -0,0 +1,255 @@
+"""Recently recorded states, kept in memory to answer history queries."""
+from array import array
+from bisect import bisect_left, bisect_right
+import json
+import logging
+import sys
+import threading
+
+from homeassistant.core import State, split_entity_id
+import homeassistant.util.dt as dt_util
+
+_LOGGER = logging.getLogger(__name__)
+
+# Fraction of the states evicted at once when the cache is full
+EVICT_FRACTION = 0.1
+
+
+class _EntityStates(object):
+    """Recorded states of one entity, ordered by last_updated.
+
+    Entries before head are evicted, they are dropped in bulk once they
+    take up half of the arrays.
+    """
+
+    __slots__ = ['last_updated', 'last_changed', 'states', 'attributes',
+                 'last_shared_attrs', 'last_attributes', 'head']
+
+    def __init__(self):
+        """Initialize an empty buffer."""
+        self.last_updated = array('d')
+        self.last_changed = array('d')
+        self.states = []
+        self.attributes = []
+        # Last added attributes, shared with following equal attributes
+        self.last_shared_attrs = None
+        self.last_attributes = None
+        self.head = 0
+
+    def __len__(self):
+        """Return the number of cached states."""
+        return len(self.last_updated) - self.head
+
+    def add(self, state, attributes, last_changed, last_updated):
+        """Add a state, keeping the entries ordered by last_updated."""
+        if self.last_updated and last_updated < self.last_updated[-1]:
+            index = bisect_right(self.last_updated, last_updated, self.head)
+            self.last_updated.insert(index, last_updated)
+            self.last_changed.insert(index, last_changed)
+            self.states.insert(index, state)
+            self.attributes.insert(index, attributes)
+            return
+
+        self.last_updated.append(last_updated)
+        self.last_changed.append(last_changed)
+        self.states.append(state)
+        self.attributes.append(attributes)
+
+    def evict_until(self, timestamp):
+        """Evict the states updated at or before timestamp."""
+        self.head = bisect_right(self.last_updated, timestamp, self.head)
+
+        if self.head * 2 >= len(self.last_updated):
+            del self.last_updated[:self.head]
+            del self.last_changed[:self.head]
+            del self.states[:self.head]
+            del self.attributes[:self.head]
+            self.head = 0
+
+    def index_after(self, timestamp):
+        """Return the index of the first state updated after timestamp."""
+        return bisect_right(self.last_updated, timestamp, self.head)
+
+    def index_from(self, timestamp):
+        """Return the index of the first state updated at or after it."""
+        return bisect_left(self.last_updated, timestamp, self.head)
+
+
+class RecentStates(object):
+    """Recorded states of the last max_age seconds, at most max_states.
+
+    The cache is complete for states updated after the since timestamp,
+    queries starting before since have to go to the database. The recorder
+    thread adds states after they are committed, history queries read them
+    from other threads.
+    """
+
+    def __init__(self, max_states, max_age):
+        """Initialize an empty cache that does not cover any period yet."""
+        self.max_states = max_states
+        self.max_age = max_age
+        self.since = None
+        self._entities = {}
+        self._count = 0
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        """Return the number of cached states."""
+        return self._count
+
+    def evict_until(self, timestamp):
+        """Evict the states updated at or before timestamp.
+
+        The first call marks the cache as complete after timestamp.
+        """
+        with self._lock:
+            self._evict_until(timestamp)
+
+    def add_all(self, recorded):
+        """Add recorded states and evict old states if needed.
+
+        Each recorded state is a tuple of entity_id, state, serialized
+        attributes, last_changed and last_updated.
+        """
+        now = dt_util.utcnow().timestamp()
+
+        with self._lock:
+            for entity_id, state, shared_attrs, last_changed, last_updated \
+                    in recorded:
+                self._add(entity_id, state, shared_attrs,
+                          last_changed.timestamp(), last_updated.timestamp())
+
+            if self.since is not None and \
+                    self.since < now - self.max_age * (1 + EVICT_FRACTION):
+                self._evict_until(now - self.max_age)
+
+            if self._count > self.max_states:
+                self._evict_oldest(
+                    self._count - int(self.max_states * (1 - EVICT_FRACTION)))
+
+    def _add(self, entity_id, state, shared_attrs, last_changed,
+             last_updated):
+        """Add a state to the buffer of its entity."""
+        if self.since is not None and last_updated <= self.since:
+            return
+
+        entity = self._entities.get(entity_id)
+        if entity is None:
+            entity = self._entities[entity_id] = _EntityStates()
+
+        if shared_attrs == entity.last_shared_attrs:
+            attributes = entity.last_attributes
+        else:
+            try:
+                attributes = json.loads(shared_attrs)
+            except ValueError:
+                # The database query skips these rows as well
+                return
+            entity.last_shared_attrs = shared_attrs
+            entity.last_attributes = attributes
+
+        entity.add(sys.intern(state), attributes, last_changed, last_updated)
+        self._count += 1
+
+    def _evict_until(self, timestamp):
+        """Evict all states updated at or before timestamp."""
+        if self.since is None or timestamp > self.since:
+            self.since = timestamp
+
+        for entity_id, entity in list(self._entities.items()):
+            self._count -= len(entity)
+            entity.evict_until(timestamp)
+            self._count += len(entity)
+            if not entity:
+                del self._entities[entity_id]
+
+    def _evict_oldest(self, count):
+        """Evict at least the count oldest states."""
+        timestamps = sorted(
+            timestamp for entity in self._entities.values()
+            for timestamp in entity.last_updated[entity.head:])
+        self._evict_until(timestamps[count - 1])
+        _LOGGER.debug("Recent states cache full, evicted states before %s",
+                      dt_util.utc_from_timestamp(self.since))
+
+    def get_changes(self, start_time, end_time=None, entity_filter=None,
+                    all_updates_domains=()):
+        """Return the states updated during a period per entity.
+
+        Only states where the state changed are returned, except for
+        entities of all_updates_domains. Returns None if the period is not
+        covered by the cache.
+        """
+        start = start_time.timestamp()
+        end = end_time.timestamp() if end_time is not None else None
+        slices = []
+
+        with self._lock:
+            if self.since is None or start < self.since:
+                return None
+
+            for entity_id, entity in self._entities.items():
+                if entity_filter is not None and not entity_filter(entity_id):
+                    continue
+
+                first = entity.index_after(start)
+                last = len(entity.last_updated) if end is None \
+                    else entity.index_from(end)
+                if first >= last:
+                    continue
+
+                slices.append((
+                    entity_id,
+                    split_entity_id(entity_id)[0] in all_updates_domains,
+                    entity.last_updated[first:last],
+                    entity.last_changed[first:last],
+                    entity.states[first:last],
+                    entity.attributes[first:last]))
+
+        result = {}
+        for entity_id, all_updates, last_updated, last_changed, states, \
+                attributes in sorted(slices, key=lambda item: item[0]):
+            entity_states = [
+                _to_state(entity_id, states[index], attributes[index],
+                          last_changed[index], last_updated[index])
+                for index in range(len(states))
+                if all_updates or last_changed[index] == last_updated[index]]
+            if entity_states:
+                result[entity_id] = entity_states
+
+        return result
+
+    def get_states(self, point_in_time, run_start, entity_filter=None):
+        """Return the last state before point_in_time of each entity.
+
+        Only states updated since run_start are considered. Returns None if
+        the cache does not cover the states since run_start.
+        """
+        point = point_in_time.timestamp()
+        start = run_start.timestamp()
+        latest = []
+
+        with self._lock:
+            if self.since is None or start <= self.since:
+                return None
+
+            for entity_id, entity in self._entities.items():
+                if entity_filter is not None and not entity_filter(entity_id):
+                    continue
+
+                index = entity.index_from(point) - 1
+                if index < entity.head or entity.last_updated[index] < start:
+                    continue
+
+                latest.append((
+                    entity_id, entity.states[index], entity.attributes[index],
+                    entity.last_changed[index], entity.last_updated[index]))
+
+        return [_to_state(*item) for item in sorted(latest)]
+
+
+def _to_state(entity_id, state, attributes, last_changed, last_updated):
+    """Create a state object from cached values."""
+    return State(entity_id, state, attributes,
+                 dt_util.utc_from_timestamp(last_changed),
+                 dt_util.utc_from_timestamp(last_updated))
@@ -1,3 +1,8 @@
 """Recorder constants."""
 
 DATA_INSTANCE = 'recorder_instance'
+
+# Store with the last state of each recorded entity when Home Assistant
+# stopped, read on startup by restore_state without waiting for the database
+LAST_STATES_STORAGE_KEY = 'recorder.last_states'
+LAST_STATES_STORAGE_VERSION = 1
@@ -114,6 +114,30 @@ def _drop_index(engine, table_name, index_name):
                         "critical operation.", index_name, table_name)
 
 
+def _add_columns(engine, table_name, columns_def):
+    """Add columns to a table."""
+    from sqlalchemy import text
+    from sqlalchemy.exc import OperationalError, ProgrammingError
+
+    _LOGGER.info("Adding columns %s to table %s. Note: this can take several "
+                 "minutes on large databases and slow computers. Please "
+                 "be patient!",
+                 ', '.join(column.split(' ')[0] for column in columns_def),
+                 table_name)
+
+    for column_def in columns_def:
+        try:
+            engine.execute(text("ALTER TABLE {table} ADD COLUMN {column}"
+                                .format(table=table_name, column=column_def)))
+        except (OperationalError, ProgrammingError) as err:
+            if not ('duplicate' in str(err).lower() or
+                    'already exists' in str(err).lower()):
+                raise
+
+            _LOGGER.warning("Column %s already exists on %s, continuing",
+                            column_def.split(' ')[0], table_name)
+
+
 def _apply_update(engine, new_version, old_version):
     """Perform operations to bring schema up to date."""
     if new_version == 1:
@@ -146,6 +170,17 @@ def _apply_update(engine, new_version, old_version):
     elif new_version == 5:
         # Create supporting index for States.event_id foreign key
         _create_index(engine, "states", "ix_states_event_id")
+    elif new_version == 6:
+        # Attributes are stored once in state_attributes, the table itself
+        # is created together with the other new tables
+        _add_columns(engine, "states", [
+            "attributes_id INTEGER REFERENCES state_attributes(attributes_id)"
+        ])
+        _create_index(engine, "states", "ix_states_attributes_id")
+    elif new_version == 7:
+        # The statistics table is created together with the other new
+        # tables, there is nothing to update.
+        pass
     else:
         raise ValueError("No schema migration defined for version {}"
                          .format(new_version))
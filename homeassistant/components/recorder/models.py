@@ -2,13 +2,18 @@
 import json
 from datetime import datetime
 import logging
+import sys
+from types import MappingProxyType
+import zlib
 
 from sqlalchemy import (
-    Boolean, Column, DateTime, ForeignKey, Index, Integer, String, Text,
-    distinct)
+    BigInteger, Boolean, Column, DateTime, Float, ForeignKey, Index, Integer,
+    String, Text, distinct, func, select)
 from sqlalchemy.ext.declarative import declarative_base
+from sqlalchemy.orm import relationship
 
 import homeassistant.util.dt as dt_util
+from homeassistant.const import EVENT_STATE_CHANGED
 from homeassistant.core import Event, EventOrigin, State, split_entity_id
 from homeassistant.remote import JSONEncoder
 
@@ -16,10 +21,13 @@ from homeassistant.remote import JSONEncoder
 # pylint: disable=invalid-name
 Base = declarative_base()
 
-SCHEMA_VERSION = 5
+SCHEMA_VERSION = 7
 
 _LOGGER = logging.getLogger(__name__)
 
+# Maximum number of distinct attributes kept decoded by states_from_rows
+ATTRIBUTES_CACHE_SIZE = 4096
+
 
 class Events(Base):  # type: ignore
     """Event history data."""
@@ -34,9 +42,26 @@ class Events(Base):  # type: ignore
 
     @staticmethod
     def from_event(event):
-        """Create an event database object from a native event."""
+        """Create an event database object from a native event.
+
+        The states of a state_changed event are stored without attributes,
+        the attributes of the new state are stored with its States row.
+        """
+        event_data = event.data
+        if event.event_type == EVENT_STATE_CHANGED:
+            event_data = dict(event_data)
+            for key in ('old_state', 'new_state'):
+                state = event_data.get(key)
+                if state is not None:
+                    event_data[key] = {
+                        'entity_id': state.entity_id,
+                        'state': state.state,
+                        'last_changed': state.last_changed,
+                        'last_updated': state.last_updated,
+                    }
+
         return Events(event_type=event.event_type,
-                      event_data=json.dumps(event.data, cls=JSONEncoder),
+                      event_data=json.dumps(event_data, cls=JSONEncoder),
                       origin=str(event.origin),
                       time_fired=event.time_fired)
 
@@ -47,7 +72,7 @@ class Events(Base):  # type: ignore
                 self.event_type,
                 json.loads(self.event_data),
                 EventOrigin(self.origin),
-                _process_timestamp(self.time_fired)
+                process_timestamp(self.time_fired)
             )
         except ValueError:
             # When json.loads fails
@@ -55,6 +80,20 @@ class Events(Base):  # type: ignore
             return None
 
 
+class StateAttributes(Base):   # type: ignore
+    """State attributes shared by all states with the same attributes."""
+
+    __tablename__ = 'state_attributes'
+    attributes_id = Column(Integer, primary_key=True)
+    hash = Column(BigInteger, index=True)
+    shared_attrs = Column(Text)
+
+    @staticmethod
+    def hash_shared_attrs(shared_attrs):
+        """Return the hash of serialized attributes."""
+        return zlib.crc32(shared_attrs.encode('utf-8'))
+
+
 class States(Base):   # type: ignore
     """State change history."""
 
@@ -65,6 +104,8 @@ class States(Base):   # type: ignore
     state = Column(String(255))
     attributes = Column(Text)
     event_id = Column(Integer, ForeignKey('events.event_id'), index=True)
+    attributes_id = Column(
+        Integer, ForeignKey('state_attributes.attributes_id'), index=True)
     last_changed = Column(DateTime(timezone=True), default=datetime.utcnow)
     last_updated = Column(DateTime(timezone=True), default=datetime.utcnow,
                           index=True)
@@ -76,6 +117,9 @@ class States(Base):   # type: ignore
         Index(
             'ix_states_entity_id_last_updated', 'entity_id', 'last_updated'),)
 
+    # Always fetch the shared attributes together with the state
+    state_attributes = relationship(StateAttributes, lazy='joined')
+
     @staticmethod
     def from_event(event):
         """Create object from a state_changed event."""
@@ -101,14 +145,24 @@ class States(Base):   # type: ignore
 
         return dbstate
 
+    @property
+    def shared_attrs(self):
+        """Return the serialized attributes of this state."""
+        if self.attributes is not None:
+            return self.attributes
+        elif self.state_attributes is not None:
+            return self.state_attributes.shared_attrs
+
+        return '{}'
+
     def to_native(self):
         """Convert to an HA state object."""
         try:
             return State(
                 self.entity_id, self.state,
-                json.loads(self.attributes),
-                _process_timestamp(self.last_changed),
-                _process_timestamp(self.last_updated)
+                json.loads(self.shared_attrs),
+                process_timestamp(self.last_changed),
+                process_timestamp(self.last_updated)
             )
         except ValueError:
             # When json.loads fails
@@ -116,6 +170,42 @@ class States(Base):   # type: ignore
             return None
 
 
+class Statistics(Base):   # type: ignore
+    """Aggregated values of a numeric entity during a period."""
+
+    __tablename__ = 'statistics'
+    id = Column(Integer, primary_key=True)
+    entity_id = Column(String(255))
+    # Length of the period in seconds
+    period = Column(Integer)
+    start = Column(DateTime(timezone=True))
+    min = Column(Float)
+    max = Column(Float)
+    mean = Column(Float)
+    last = Column(Float)
+    count = Column(Integer)
+    # Seconds covered by the values, weighting the mean
+    duration = Column(Float)
+
+    __table_args__ = (
+        Index('ix_statistics_entity_id_period_start',
+              'entity_id', 'period', 'start'),)
+
+    def to_native(self):
+        """Return a dict representation of this period."""
+        start = process_timestamp(self.start)
+        return {
+            'entity_id': self.entity_id,
+            'start': start,
+            'min': self.min,
+            'max': self.max,
+            'mean': self.mean,
+            'last': self.last,
+            'count': self.count,
+            'duration': self.duration,
+        }
+
+
 class RecorderRuns(Base):   # type: ignore
     """Representation of recorder run."""
 
@@ -164,7 +254,7 @@ class SchemaChanges(Base):   # type: ignore
     changed = Column(DateTime(timezone=True), default=datetime.utcnow)
 
 
-def _process_timestamp(ts):
+def process_timestamp(ts):
     """Process a timestamp into datetime object."""
     if ts is None:
         return None
@@ -172,3 +262,103 @@ def _process_timestamp(ts):
         return dt_util.UTC.localize(ts)
 
     return dt_util.as_utc(ts)
+
+
+def state_columns_query(query):
+    """Return the query selecting only the columns of native states.
+
+    Rows are tuples of entity_id, state, serialized attributes,
+    last_changed and last_updated, to be converted with states_from_rows.
+    """
+    shared_attrs = select([StateAttributes.shared_attrs]).where(
+        StateAttributes.attributes_id == States.attributes_id).as_scalar()
+
+    return query.with_entities(
+        States.entity_id, States.state,
+        func.coalesce(States.attributes, shared_attrs),
+        States.last_changed, States.last_updated)
+
+
+def states_from_rows(rows):
+    """Convert rows of state_columns_query to HA state objects.
+
+    The rows come from the database, so the states are created without
+    validating them again. States with the same serialized attributes
+    share a single decoded mapping.
+    """
+    attributes_cache = {}
+    entity_ids = {}
+
+    for entity_id, state, shared_attrs, last_changed, last_updated in rows:
+        if shared_attrs is None:
+            shared_attrs = '{}'
+
+        attributes = attributes_cache.get(shared_attrs)
+        if attributes is None:
+            try:
+                attributes = MappingProxyType(json.loads(shared_attrs))
+            except ValueError:
+                # When json.loads fails
+                _LOGGER.exception("Error converting row to state: %s",
+                                  entity_id)
+                continue
+            if len(attributes_cache) >= ATTRIBUTES_CACHE_SIZE:
+                attributes_cache.clear()
+            attributes_cache[shared_attrs] = attributes
+
+        ids = entity_ids.get(entity_id)
+        if ids is None:
+            ids = entity_ids[entity_id] = (
+                entity_id, sys.intern(split_entity_id(entity_id)[0]))
+
+        native = State.__new__(State)
+        native.entity_id, native.domain = ids
+        native.state = state
+        native.attributes = attributes
+        native._as_dict = None  # pylint: disable=protected-access
+        native.last_updated = _utc_timestamp(last_updated)
+        native.last_changed = native.last_updated \
+            if last_changed == last_updated else _utc_timestamp(last_changed)
+        yield native
+
+
+def event_columns_query(query):
+    """Return the query selecting only the columns of native events.
+
+    The query must be outer joined with the states of the events, their
+    serialized attributes are selected for events_from_rows.
+    """
+    shared_attrs = select([StateAttributes.shared_attrs]).where(
+        StateAttributes.attributes_id == States.attributes_id).as_scalar()
+
+    return query.with_entities(
+        Events.event_type, Events.event_data, Events.origin,
+        Events.time_fired, func.coalesce(States.attributes, shared_attrs))
+
+
+def events_from_rows(rows):
+    """Convert rows of event_columns_query to HA event objects.
+
+    The attributes of the new state of state_changed events are restored
+    from the joined state.
+    """
+    for event_type, event_data, origin, time_fired, shared_attrs in rows:
+        try:
+            data = json.loads(event_data)
+            new_state = data.get('new_state') \
+                if event_type == EVENT_STATE_CHANGED else None
+            if new_state and 'attributes' not in new_state:
+                new_state['attributes'] = json.loads(shared_attrs or '{}')
+            yield Event(event_type, data,
+                        EventOrigin(origin), _utc_timestamp(time_fired))
+        except ValueError:
+            # When json.loads fails
+            _LOGGER.exception("Error converting to event: %s", event_type)
+
+
+def _utc_timestamp(ts):
+    """Process a timestamp from a row, naive timestamps are in UTC."""
+    if ts.tzinfo is None:
+        return ts.replace(tzinfo=dt_util.UTC)
+
+    return dt_util.as_utc(ts)
@@ -8,55 +8,93 @@ from .util import session_scope
 
 _LOGGER = logging.getLogger(__name__)
 
+# Maximum number of rows deleted from a table in one transaction
+PURGE_BATCH_SIZE = 1000
 
-def purge_old_data(instance, purge_days, repack):
-    """Purge events and states older than purge_days ago."""
-    from .models import States, Events
-    from sqlalchemy import func
 
-    purge_before = dt_util.utcnow() - timedelta(days=purge_days)
-    _LOGGER.debug("Purging events before %s", purge_before)
-
-    with session_scope(session=instance.get_session()) as session:
-        delete_states = session.query(States) \
-                            .filter((States.last_updated < purge_before))
-
-        # For each entity, the most recent state is protected from deletion
-        # s.t. we can properly restore state even if the entity has not been
-        # updated in a long time
-        protected_states = session.query(func.max(States.state_id)) \
-            .group_by(States.entity_id).all()
-
-        protected_state_ids = tuple(state[0] for state in protected_states)
-
-        if protected_state_ids:
-            delete_states = delete_states \
-                .filter(~States.state_id.in_(protected_state_ids))
+def purge_old_data(instance, purge_days, repack, progress=None,
+                   batch_size=PURGE_BATCH_SIZE):
+    """Purge a chunk of events and states older than purge_days ago.
 
-        deleted_rows = delete_states.delete(synchronize_session=False)
-        _LOGGER.debug("Deleted %s states", deleted_rows)
+    Each table is purged in its own transaction of at most batch_size rows.
+    Returns True when all old data is purged, otherwise purge_old_data has
+    to be called again. The number of deleted rows per table is added to
+    the progress dict.
+    """
+    from .models import States, Events, StateAttributes, Statistics
+    from .statistics import PERIODS, PERIOD_HOUR
+    from sqlalchemy import exists
+    from sqlalchemy.orm import Query, aliased
 
-        delete_events = session.query(Events) \
-            .filter((Events.time_fired < purge_before))
+    if progress is None:
+        progress = {}
 
-        # We also need to protect the events belonging to the protected states.
-        # Otherwise, if the SQL server has "ON DELETE CASCADE" as default, it
-        # will delete the protected state when deleting its associated
-        # event. Also, we would be producing NULLed foreign keys otherwise.
-        if protected_state_ids:
-            protected_events = session.query(States.event_id) \
-                .filter(States.state_id.in_(protected_state_ids)) \
-                .filter(States.event_id.isnot(None)) \
-                .all()
-
-            protected_event_ids = tuple(state[0] for state in protected_events)
-
-            if protected_event_ids:
-                delete_events = delete_events \
-                    .filter(~Events.event_id.in_(protected_event_ids))
+    purge_before = dt_util.utcnow() - timedelta(days=purge_days)
+    _LOGGER.debug("Purging events before %s", purge_before)
 
-        deleted_rows = delete_events.delete(synchronize_session=False)
-        _LOGGER.debug("Deleted %s events", deleted_rows)
+    # Cached states must not outlive the rows they were read from
+    if instance.recent_states is not None:
+        instance.recent_states.evict_until(purge_before.timestamp())
+
+    def purge_chunk(table, key, query):
+        """Delete a chunk of rows, return True if none are left."""
+        with session_scope(session=instance.get_session()) as session:
+            row_ids = [row[0] for row in
+                       query.with_session(session).limit(batch_size)]
+            if row_ids:
+                session.query(table).filter(key.in_(row_ids)) \
+                    .delete(synchronize_session=False)
+
+        progress[table.__tablename__] = \
+            progress.get(table.__tablename__, 0) + len(row_ids)
+        _LOGGER.debug("Deleted %s rows from %s", len(row_ids),
+                      table.__tablename__)
+        return len(row_ids) < batch_size
+
+    # For each entity, the most recent state is protected from deletion
+    # s.t. we can properly restore state even if the entity has not been
+    # updated in a long time. Looking up a newer state of the same entity
+    # uses the entity_id, last_updated index instead of grouping all states.
+    newer_states = aliased(States)
+    delete_states = Query(States.state_id) \
+        .filter(States.last_updated < purge_before) \
+        .filter(exists().where(
+            (newer_states.entity_id == States.entity_id) &
+            (newer_states.last_updated > States.last_updated)))
+
+    if not purge_chunk(States, States.state_id, delete_states):
+        return False
+
+    # We also need to protect the events belonging to the remaining states.
+    # Otherwise, if the SQL server has "ON DELETE CASCADE" as default, it
+    # will delete the protected state when deleting its associated
+    # event. Also, we would be producing NULLed foreign keys otherwise.
+    delete_events = Query(Events.event_id) \
+        .filter(Events.time_fired < purge_before) \
+        .filter(~exists().where(States.event_id == Events.event_id))
+
+    if not purge_chunk(Events, Events.event_id, delete_events):
+        return False
+
+    # Shared attributes no longer used by any state
+    delete_attributes = Query(StateAttributes.attributes_id) \
+        .filter(~exists().where(
+            States.attributes_id == StateAttributes.attributes_id))
+
+    done = purge_chunk(
+        StateAttributes, StateAttributes.attributes_id, delete_attributes)
+    # pylint: disable=protected-access
+    instance._clear_attributes_cache()
+    if not done:
+        return False
+
+    # Hourly statistics are kept as long term history
+    delete_statistics = Query(Statistics.id) \
+        .filter(Statistics.period < PERIODS[PERIOD_HOUR]) \
+        .filter(Statistics.start < purge_before)
+
+    if not purge_chunk(Statistics, Statistics.id, delete_statistics):
+        return False
 
     # Execute sqlite vacuum command to free up space on disk
     _LOGGER.debug("DB engine driver: %s", instance.engine.driver)
@@ -68,3 +106,5 @@ def purge_old_data(instance, purge_days, repack):
             instance.engine.execute("VACUUM")
         except exc.OperationalError as err:
             _LOGGER.error("Error vacuuming SQLite: %s.", err)
+
+    return True
@@ -0,0 +1,170 @@
+"""Statistics of numeric entities, maintained while recording states."""
+from datetime import timedelta
+import logging
+import math
+
+import homeassistant.util.dt as dt_util
+
+_LOGGER = logging.getLogger(__name__)
+
+PERIOD_5MINUTE = '5minute'
+PERIOD_HOUR = 'hour'
+
+# Length of each statistics period in seconds
+PERIODS = {
+    PERIOD_5MINUTE: 300,
+    PERIOD_HOUR: 3600,
+}
+
+
+def period_start(moment, period):
+    """Return the start of the period of period seconds containing moment."""
+    timestamp = dt_util.as_timestamp(moment)
+    return dt_util.utc_from_timestamp(timestamp - timestamp % period)
+
+
+class StatisticsBucket(object):
+    """Aggregated values of one entity during one period.
+
+    The mean is weighted by the time each value was held. A bucket that
+    continues an earlier one starts with the last value of that bucket.
+    """
+
+    __slots__ = ['entity_id', 'period', 'start', 'min', 'max', 'count',
+                 'last', 'duration', '_weighted_sum', '_last_moment']
+
+    def __init__(self, entity_id, period, start, initial=None):
+        """Initialize a bucket, holding initial from its start if given."""
+        self.entity_id = entity_id
+        self.period = period
+        self.start = start
+        self.min = initial
+        self.max = initial
+        self.count = 0
+        self.last = initial
+        # Seconds covered by the values in the bucket
+        self.duration = 0.0
+        self._weighted_sum = 0.0
+        self._last_moment = start if initial is not None else None
+
+    @property
+    def end(self):
+        """Return the end of the period of the bucket."""
+        return self.start + timedelta(seconds=self.period)
+
+    def add(self, value, moment):
+        """Add a value the entity changed to at moment."""
+        self.close(moment)
+        if self.min is None or value < self.min:
+            self.min = value
+        if self.max is None or value > self.max:
+            self.max = value
+        self.count += 1
+        self.last = value
+
+    def close(self, moment):
+        """Hold the last value until moment."""
+        if self._last_moment is not None and moment > self._last_moment:
+            seconds = (moment - self._last_moment).total_seconds()
+            self._weighted_sum += self.last * seconds
+            self.duration += seconds
+        self._last_moment = moment
+
+    @property
+    def mean(self):
+        """Return the time-weighted mean of the values in the bucket."""
+        if not self.duration:
+            return self.last
+        return self._weighted_sum / self.duration
+
+
+class StatisticsCollector(object):
+    """Aggregate numeric states into one bucket per entity and period.
+
+    Buckets are returned once a state of a later period arrives, or when
+    flushing the collector.
+    """
+
+    def __init__(self, periods):
+        """Initialize the collector for periods of the given seconds."""
+        self.periods = periods
+        self._buckets = {}
+
+    def add_state(self, state):
+        """Add a state and return the buckets it completed."""
+        try:
+            value = float(state.state)
+        except ValueError:
+            return []
+
+        if math.isnan(value) or math.isinf(value):
+            return []
+
+        completed = []
+
+        for period in self.periods:
+            start = period_start(state.last_updated, period)
+            key = (state.entity_id, period)
+            bucket = self._buckets.get(key)
+
+            if bucket is None:
+                bucket = self._buckets[key] = StatisticsBucket(
+                    state.entity_id, period, start)
+            elif bucket.start != start:
+                bucket.close(bucket.end)
+                completed.append(bucket)
+                bucket = self._buckets[key] = StatisticsBucket(
+                    state.entity_id, period, start, bucket.last)
+
+            bucket.add(value, state.last_updated)
+
+        return completed
+
+    def flush(self, moment=None):
+        """Return and forget all buckets that are still open.
+
+        The last values are held until moment, by default now.
+        """
+        if moment is None:
+            moment = dt_util.utcnow()
+
+        buckets = list(self._buckets.values())
+        self._buckets.clear()
+        for bucket in buckets:
+            bucket.close(min(moment, bucket.end))
+        return buckets
+
+
+def write_statistics(session, buckets):
+    """Write buckets, merging them with stored rows of the same period.
+
+    A period can already be stored when Home Assistant restarted during
+    the period.
+    """
+    from .models import Statistics
+
+    for bucket in buckets:
+        row = session.query(Statistics).filter(
+            (Statistics.entity_id == bucket.entity_id) &
+            (Statistics.period == bucket.period) &
+            (Statistics.start == bucket.start)).first()
+
+        if row is None:
+            session.add(Statistics(
+                entity_id=bucket.entity_id, period=bucket.period,
+                start=bucket.start, min=bucket.min, max=bucket.max,
+                mean=bucket.mean, last=bucket.last, count=bucket.count,
+                duration=bucket.duration))
+            continue
+
+        duration = row.duration + bucket.duration
+        if duration:
+            row.mean = (row.mean * row.duration +
+                        bucket.mean * bucket.duration) / duration
+        else:
+            row.mean = bucket.mean
+        row.min = min(row.min, bucket.min)
+        row.max = max(row.max, bucket.max)
+        row.last = bucket.last
+        row.count += bucket.count
+        row.duration = duration
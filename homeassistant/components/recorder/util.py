@@ -78,3 +78,82 @@ def execute(qry):
                 raise
             else:
                 time.sleep(QUERY_RETRY_WAIT)
+
+
+def execute_states(qry):
+    """Query the columns of states and convert the rows to HA states.
+
+    Unlike execute, no ORM objects are created for the rows.
+    """
+    from .models import state_columns_query, states_from_rows
+
+    return _execute_rows(state_columns_query(qry), states_from_rows)
+
+
+def execute_events(qry):
+    """Query the columns of events and convert the rows to HA events.
+
+    The query must be outer joined with the states of the events.
+    """
+    from .models import event_columns_query, events_from_rows
+
+    return _execute_rows(event_columns_query(qry), events_from_rows)
+
+
+def stream_states(qry, batch_size):
+    """Yield the HA states of a query, fetching batch_size rows at a time."""
+    from .models import state_columns_query, states_from_rows
+
+    return states_from_rows(
+        _stream_rows(state_columns_query(qry), batch_size))
+
+
+def stream_events(qry, batch_size):
+    """Yield the HA events of a query, fetching batch_size rows at a time.
+
+    The query must be outer joined with the states of the events.
+    """
+    from .models import event_columns_query, events_from_rows
+
+    return events_from_rows(
+        _stream_rows(event_columns_query(qry), batch_size))
+
+
+def _execute_rows(qry, convert):
+    """Execute the statement of a query and convert the rows with convert.
+
+    This method also retries a few times in the case of stale connections.
+    """
+    from sqlalchemy.exc import SQLAlchemyError
+
+    for tryno in range(0, RETRIES):
+        try:
+            timer_start = time.perf_counter()
+            result = list(convert(qry.session.execute(qry.statement)))
+
+            if _LOGGER.isEnabledFor(logging.DEBUG):
+                elapsed = time.perf_counter() - timer_start
+                _LOGGER.debug('converting %d rows to native objects took %fs',
+                              len(result),
+                              elapsed)
+
+            return result
+        except SQLAlchemyError as err:
+            _LOGGER.error("Error executing query: %s", err)
+
+            if tryno == RETRIES - 1:
+                raise
+            else:
+                time.sleep(QUERY_RETRY_WAIT)
+
+
+def _stream_rows(qry, batch_size):
+    """Yield the rows of the statement of a query from the cursor."""
+    result = qry.session.execute(
+        qry.statement.execution_options(stream_results=True))
+
+    while True:
+        rows = result.fetchmany(batch_size)
+        if not rows:
+            return
+        yield from rows
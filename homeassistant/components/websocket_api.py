@@ -17,7 +17,7 @@ from voluptuous.humanize import humanize_error
 
 from homeassistant.const import (
     MATCH_ALL, EVENT_TIME_CHANGED, EVENT_HOMEASSISTANT_STOP,
-    __version__)
+    EVENT_STATE_CHANGED, __version__)
 from homeassistant.core import callback
 from homeassistant.loader import bind_hass
 from homeassistant.remote import JSONEncoder
@@ -35,6 +35,10 @@ DEPENDENCIES = ('http',)
 
 MAX_PENDING_MSG = 512
 
+DATA_EVENT_HUB = 'websocket_api_event_hub'
+
+FEATURE_COALESCE_MESSAGES = 'coalesce_messages'
+
 ERR_ID_REUSE = 1
 ERR_INVALID_FORMAT = 2
 ERR_NOT_FOUND = 3
@@ -52,7 +56,9 @@ TYPE_GET_STATES = 'get_states'
 TYPE_PING = 'ping'
 TYPE_PONG = 'pong'
 TYPE_RESULT = 'result'
+TYPE_SUBSCRIBE_ENTITIES = 'subscribe_entities'
 TYPE_SUBSCRIBE_EVENTS = 'subscribe_events'
+TYPE_SUPPORTED_FEATURES = 'supported_features'
 TYPE_UNSUBSCRIBE_EVENTS = 'unsubscribe_events'
 
 _LOGGER = logging.getLogger(__name__)
@@ -82,6 +88,13 @@ SCHEMA_SUBSCRIBE_EVENTS = BASE_COMMAND_MESSAGE_SCHEMA.extend({
 })
 
 
+SCHEMA_SUBSCRIBE_ENTITIES = BASE_COMMAND_MESSAGE_SCHEMA.extend({
+    vol.Required('type'): TYPE_SUBSCRIBE_ENTITIES,
+    vol.Optional('entity_ids', default=[]): cv.entity_ids,
+    vol.Optional('domains', default=[]): vol.All(cv.ensure_list, [cv.string]),
+})
+
+
 SCHEMA_UNSUBSCRIBE_EVENTS = BASE_COMMAND_MESSAGE_SCHEMA.extend({
     vol.Required('type'): TYPE_UNSUBSCRIBE_EVENTS,
     vol.Required('subscription'): cv.positive_int,
@@ -116,6 +129,12 @@ SCHEMA_PING = BASE_COMMAND_MESSAGE_SCHEMA.extend({
 })
 
 
+SCHEMA_SUPPORTED_FEATURES = BASE_COMMAND_MESSAGE_SCHEMA.extend({
+    vol.Required('type'): TYPE_SUPPORTED_FEATURES,
+    vol.Required('features'): {str: int},
+})
+
+
 # Define the possible errors that occur when connections are cancelled.
 # Originally, this was just asyncio.CancelledError, but issue #9546 showed
 # that futures.CancelledErrors can also occur in some situations.
@@ -155,6 +174,77 @@ def event_message(iden, event):
     }
 
 
+def event_message_json(iden, event_json):
+    """Return an event message, serialized around a serialized event."""
+    return '{"id": %d, "type": "%s", "event": %s}' % (
+        iden, TYPE_EVENT, event_json)
+
+
+def compressed_state(state):
+    """Return a compact representation of a state.
+
+    The last_updated timestamp is left out if it equals last_changed.
+    """
+    compressed = {
+        'state': state.state,
+        'attributes': dict(state.attributes),
+        'last_changed': state.last_changed.timestamp(),
+    }
+    if state.last_updated != state.last_changed:
+        compressed['last_updated'] = state.last_updated.timestamp()
+    return compressed
+
+
+def compressed_state_diff(old_state, new_state):
+    """Return the changes from old_state to new_state.
+
+    The changed values are under '+', the names of removed attributes
+    under '-'.
+    """
+    added = {}
+    removed = {}
+
+    if new_state.state != old_state.state:
+        added['state'] = new_state.state
+
+    if new_state.last_changed != old_state.last_changed:
+        added['last_changed'] = new_state.last_changed.timestamp()
+
+    if new_state.last_updated != new_state.last_changed:
+        added['last_updated'] = new_state.last_updated.timestamp()
+
+    old_attributes = old_state.attributes
+    new_attributes = new_state.attributes
+
+    if new_attributes is not old_attributes:
+        changed = {
+            key: value for key, value in new_attributes.items()
+            if key not in old_attributes or old_attributes[key] != value}
+        if changed:
+            added['attributes'] = changed
+
+        missing = [key for key in old_attributes if key not in new_attributes]
+        if missing:
+            removed['attributes'] = missing
+
+    diff = {'+': added}
+    if removed:
+        diff['-'] = removed
+    return diff
+
+
+def entities_message(iden, states):
+    """Return an entities message with the states of entities."""
+    return {
+        'id': iden,
+        'type': TYPE_EVENT,
+        'event': {
+            'add': {state.entity_id: compressed_state(state)
+                    for state in states},
+        },
+    }
+
+
 def error_message(iden, code, message):
     """Return an error result message."""
     return {
@@ -199,9 +289,13 @@ def async_register_command(hass, command, handler, schema):
 async def async_setup(hass, config):
     """Initialize the websocket API."""
     hass.http.register_view(WebsocketAPIView)
+    hass.data[DATA_EVENT_HUB] = EventSubscriptionHub(hass)
 
     async_register_command(hass, TYPE_SUBSCRIBE_EVENTS,
                            handle_subscribe_events, SCHEMA_SUBSCRIBE_EVENTS)
+    async_register_command(hass, TYPE_SUBSCRIBE_ENTITIES,
+                           handle_subscribe_entities,
+                           SCHEMA_SUBSCRIBE_ENTITIES)
     async_register_command(hass, TYPE_UNSUBSCRIBE_EVENTS,
                            handle_unsubscribe_events,
                            SCHEMA_UNSUBSCRIBE_EVENTS)
@@ -215,10 +309,156 @@ async def async_setup(hass, config):
                            handle_get_config, SCHEMA_GET_CONFIG)
     async_register_command(hass, TYPE_PING,
                            handle_ping, SCHEMA_PING)
+    async_register_command(hass, TYPE_SUPPORTED_FEATURES,
+                           handle_supported_features,
+                           SCHEMA_SUPPORTED_FEATURES)
 
     return True
 
 
+class EventSubscriptionHub:
+    """Forward events to the event subscriptions of all connections.
+
+    There is one bus listener per subscribed event type, each event is
+    serialized once and the result is shared by all subscriptions.
+    Entity subscriptions share one state changed listener, they are looked
+    up by entity_id, domain or MATCH_ALL.
+    """
+
+    def __init__(self, hass):
+        """Initialize the hub without subscriptions."""
+        self.hass = hass
+        self._subscriptions = {}
+        self._unsub_listeners = {}
+        self._last_event = None
+        self._last_event_json = None
+        self._entity_subscriptions = {}
+        self._unsub_state_listener = None
+
+    @callback
+    def async_subscribe(self, connection, iden, event_type):
+        """Forward events of event_type to the subscription iden.
+
+        Returns a function to remove the subscription.
+        """
+        subscriptions = self._subscriptions.get(event_type)
+
+        if subscriptions is None:
+            subscriptions = self._subscriptions[event_type] = set()
+            self._unsub_listeners[event_type] = self.hass.bus.async_listen(
+                event_type,
+                callback(partial(self._async_forward_event, subscriptions)))
+
+        key = (connection, iden)
+        subscriptions.add(key)
+
+        @callback
+        def async_unsubscribe():
+            """Remove the subscription."""
+            subscriptions.discard(key)
+
+            if not subscriptions and \
+                    self._subscriptions.get(event_type) is subscriptions:
+                del self._subscriptions[event_type]
+                self._unsub_listeners.pop(event_type)()
+
+        return async_unsubscribe
+
+    @callback
+    def async_subscribe_entities(self, connection, iden, entity_ids,
+                                 domains):
+        """Forward changes of entities to the subscription iden.
+
+        Changes of all entities are forwarded if neither entity_ids nor
+        domains are given. Returns a function to remove the subscription.
+        """
+        if self._unsub_state_listener is None:
+            self._unsub_state_listener = self.hass.bus.async_listen(
+                EVENT_STATE_CHANGED, self._async_forward_state_changed)
+
+        keys = list(entity_ids) + list(domains) or [MATCH_ALL]
+        subscription = (connection, iden)
+
+        for key in keys:
+            self._entity_subscriptions.setdefault(key, set()).add(
+                subscription)
+
+        @callback
+        def async_unsubscribe():
+            """Remove the subscription."""
+            for key in keys:
+                subscriptions = self._entity_subscriptions.get(key)
+                if subscriptions is None:
+                    continue
+                subscriptions.discard(subscription)
+                if not subscriptions:
+                    del self._entity_subscriptions[key]
+
+            if not self._entity_subscriptions and \
+                    self._unsub_state_listener is not None:
+                self._unsub_state_listener()
+                self._unsub_state_listener = None
+
+        return async_unsubscribe
+
+    @callback
+    def _async_forward_state_changed(self, event):
+        """Send the change of an entity to its entity subscriptions."""
+        entity_id = event.data['entity_id']
+        subscriptions = self._entity_subscriptions
+        targets = set()
+
+        for key in (entity_id, entity_id.split('.', 1)[0], MATCH_ALL):
+            if key in subscriptions:
+                targets.update(subscriptions[key])
+
+        if not targets:
+            return
+
+        old_state = event.data.get('old_state')
+        new_state = event.data.get('new_state')
+
+        if new_state is None:
+            change = {'remove': [entity_id]}
+        elif old_state is None:
+            change = {'add': {entity_id: compressed_state(new_state)}}
+        else:
+            change = {'change': {
+                entity_id: compressed_state_diff(old_state, new_state)}}
+
+        try:
+            change_json = JSON_DUMP(change)
+        except TypeError as err:
+            _LOGGER.error('Unable to serialize to JSON: %s\n%s', err, change)
+            return
+
+        for connection, iden in targets:
+            connection.send_message_outside(
+                event_message_json(iden, change_json))
+
+    @callback
+    def _async_forward_event(self, subscriptions, event):
+        """Send an event to subscriptions, serializing it only once."""
+        if event.event_type == EVENT_TIME_CHANGED:
+            return
+
+        # Events are seen twice with subscriptions to MATCH_ALL
+        if event is not self._last_event:
+            try:
+                self._last_event_json = JSON_DUMP(event.as_dict())
+            except TypeError as err:
+                _LOGGER.error('Unable to serialize to JSON: %s\n%s',
+                              err, event)
+                return
+            self._last_event = event
+
+        event_json = self._last_event_json
+
+        for connection, iden in list(subscriptions):
+            connection.send_message_outside(
+                event_message_json(iden, event_json))
+
+
 class WebsocketAPIView(HomeAssistantView):
     """View to serve a websockets endpoint."""
 
@@ -241,6 +481,7 @@ class ActiveConnection:
         self.wsock = None
         self.event_listeners = {}
         self.to_write = asyncio.Queue(maxsize=MAX_PENDING_MSG, loop=hass.loop)
+        self.coalesce_messages = False
         self._handle_task = None
         self._writer_task = None
 
@@ -253,19 +494,43 @@ class ActiveConnection:
         _LOGGER.error("WS %s: %s %s", id(self.wsock), message1, message2)
 
     async def _writer(self):
-        """Write outgoing messages."""
+        """Write outgoing messages.
+
+        Messages are dicts or already serialized JSON strings. If the client
+        supports it, all queued messages are sent as one JSON array.
+        """
         # Exceptions if Socket disconnected or cancelled by connection handler
         with suppress(RuntimeError, *CANCELLATION_ERRORS):
-            while not self.wsock.closed:
-                message = await self.to_write.get()
-                if message is None:
-                    break
-                self.debug("Sending", message)
-                try:
-                    await self.wsock.send_json(message, dumps=JSON_DUMP)
-                except TypeError as err:
-                    _LOGGER.error('Unable to serialize to JSON: %s\n%s',
-                                  err, message)
+            done = False
+            while not done and not self.wsock.closed:
+                messages = [await self.to_write.get()]
+
+                if self.coalesce_messages:
+                    while not self.to_write.empty():
+                        messages.append(self.to_write.get_nowait())
+
+                if None in messages:
+                    done = True
+                    messages = messages[:messages.index(None)]
+
+                encoded = []
+                for message in messages:
+                    self.debug("Sending", message)
+                    if not isinstance(message, str):
+                        try:
+                            message = JSON_DUMP(message)
+                        except TypeError as err:
+                            _LOGGER.error(
+                                'Unable to serialize to JSON: %s\n%s',
+                                err, message)
+                            continue
+                    encoded.append(message)
+
+                if len(encoded) > 1 and self.coalesce_messages:
+                    encoded = ['[{}]'.format(','.join(encoded))]
+
+                for message in encoded:
+                    await self.wsock.send_str(message)
 
     @callback
     def send_message_outside(self, message):
@@ -449,18 +714,38 @@ def handle_subscribe_events(hass, connection, msg):
 
     Async friendly.
     """
-    async def forward_events(event):
-        """Forward events to websocket."""
-        if event.event_type == EVENT_TIME_CHANGED:
-            return
+    connection.event_listeners[msg['id']] = \
+        hass.data[DATA_EVENT_HUB].async_subscribe(
+            connection, msg['id'], msg['event_type'])
+
+    connection.to_write.put_nowait(result_message(msg['id']))
+
+
+@callback
+def handle_subscribe_entities(hass, connection, msg):
+    """Handle subscribe entities command.
 
-        connection.send_message_outside(event_message(msg['id'], event))
+    Sends the current states of the entities, followed by their changes.
 
-    connection.event_listeners[msg['id']] = hass.bus.async_listen(
-        msg['event_type'], forward_events)
+    Async friendly.
+    """
+    entity_ids = set(msg['entity_ids'])
+    domains = set(msg['domains'])
+
+    connection.event_listeners[msg['id']] = \
+        hass.data[DATA_EVENT_HUB].async_subscribe_entities(
+            connection, msg['id'], entity_ids, domains)
 
     connection.to_write.put_nowait(result_message(msg['id']))
 
+    states = hass.states.async_all()
+    if entity_ids or domains:
+        states = [state for state in states
+                  if state.entity_id in entity_ids or
+                  state.domain in domains]
+
+    connection.to_write.put_nowait(entities_message(msg['id'], states))
+
 
 @callback
 def handle_unsubscribe_events(hass, connection, msg):
@@ -535,3 +820,14 @@ def handle_ping(hass, connection, msg):
     Async friendly.
     """
     connection.to_write.put_nowait(pong_message(msg['id']))
+
+
+@callback
+def handle_supported_features(hass, connection, msg):
+    """Handle supported features command.
+
+    Async friendly.
+    """
+    connection.coalesce_messages = bool(
+        msg['features'].get(FEATURE_COALESCE_MESSAGES))
+    connection.to_write.put_nowait(result_message(msg['id']))
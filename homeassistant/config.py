@@ -19,8 +19,10 @@ from homeassistant.const import (
     CONF_TIME_ZONE, CONF_ELEVATION, CONF_UNIT_SYSTEM_METRIC,
     CONF_UNIT_SYSTEM_IMPERIAL, CONF_TEMPERATURE_UNIT, TEMP_CELSIUS,
     __version__, CONF_CUSTOMIZE, CONF_CUSTOMIZE_DOMAIN, CONF_CUSTOMIZE_GLOB,
-    CONF_WHITELIST_EXTERNAL_DIRS, CONF_AUTH_PROVIDERS)
-from homeassistant.core import callback, DOMAIN as CONF_CORE
+    CONF_WHITELIST_EXTERNAL_DIRS, CONF_AUTH_PROVIDERS, CONF_EXECUTORS)
+from homeassistant.core import (
+    callback, DOMAIN as CONF_CORE, EXECUTOR_DEFAULT, EXECUTOR_DEVICE_IO,
+    EXECUTOR_DATABASE, EXECUTOR_FILE_IO)
 from homeassistant.exceptions import HomeAssistantError
 from homeassistant.loader import get_component, get_platform
 from homeassistant.util.yaml import load_yaml, SECRET_YAML
@@ -159,7 +161,11 @@ CORE_CONFIG_SCHEMA = CUSTOMIZE_CONFIG_SCHEMA.extend({
         vol.All(cv.ensure_list, [vol.IsDir()]),
     vol.Optional(CONF_PACKAGES, default={}): PACKAGES_CONFIG_SCHEMA,
     vol.Optional(CONF_AUTH_PROVIDERS):
-        vol.All(cv.ensure_list, [auth.AUTH_PROVIDER_SCHEMA])
+        vol.All(cv.ensure_list, [auth.AUTH_PROVIDER_SCHEMA]),
+    vol.Optional(CONF_EXECUTORS): {
+        vol.In([EXECUTOR_DEFAULT, EXECUTOR_DEVICE_IO, EXECUTOR_DATABASE,
+                EXECUTOR_FILE_IO]): vol.All(vol.Coerce(int), vol.Range(min=1)),
+    },
 })
 
 
@@ -298,7 +304,8 @@ def find_config_file(config_dir):
 def load_yaml_config_file(config_path):
     """Parse a YAML configuration file.
 
-    This method needs to run in an executor.
+    This method needs to run in an executor. Included files that did not
+    change since the last load are not parsed again.
     """
     try:
         conf_dict = load_yaml(config_path)
@@ -428,6 +435,9 @@ async def async_process_ha_core_config(hass, config):
     if CONF_TIME_ZONE in config:
         set_time_zone(config.get(CONF_TIME_ZONE))
 
+    for name, max_workers in config.get(CONF_EXECUTORS, {}).items():
+        hass.async_set_executor_limit(name, max_workers)
+
     # Init whitelist external dir
     hac.whitelist_external_dirs = set((hass.config.path('www'),))
     if CONF_WHITELIST_EXTERNAL_DIRS in config:
@@ -6,7 +6,6 @@ of entities and react to changes.
 """
 # pylint: disable=unused-import
 import asyncio
-from concurrent.futures import ThreadPoolExecutor
 import enum
 import logging
 import os
@@ -38,6 +37,7 @@ from homeassistant.util.async_ import (
     fire_coroutine_threadsafe)
 import homeassistant.util as util
 import homeassistant.util.dt as dt_util
+from homeassistant.util.executor import InstrumentedExecutor
 import homeassistant.util.location as location
 from homeassistant.util.unit_system import UnitSystem, METRIC_SYSTEM  # NOQA
 
@@ -54,6 +54,23 @@ ENTITY_ID_PATTERN = re.compile(r"^(\w+)\.(\w+)$")
 # How long to wait till things that run on startup have to finish.
 TIMEOUT_EVENT_START = 15
 
+# Executors that run blocking jobs
+EXECUTOR_DEFAULT = 'default'
+EXECUTOR_DEVICE_IO = 'device_io'
+EXECUTOR_DATABASE = 'database'
+EXECUTOR_FILE_IO = 'file_io'
+
+# Maximum number of threads of each executor, None for the Python default
+EXECUTOR_LIMITS = {
+    EXECUTOR_DEFAULT: None,
+    EXECUTOR_DEVICE_IO: 16,
+    EXECUTOR_DATABASE: 4,
+    EXECUTOR_FILE_IO: 2,
+}
+
+# Maximum number of device jobs of a single integration running at once
+INTEGRATION_EXECUTOR_LIMIT = 8
+
 _LOGGER = logging.getLogger(__name__)
 
 
@@ -83,6 +100,23 @@ def is_callback(func: Callable[..., Any]) -> bool:
     return getattr(func, '_hass_callback', False) is True
 
 
+def in_executor(
+        name: str) -> Callable[[Callable[..., T]], Callable[..., T]]:
+    """Annotation to run a blocking function in the executor name."""
+    def decorator(func: Callable[..., T]) -> Callable[..., T]:
+        """Mark the executor of the function."""
+        setattr(func, '_hass_executor', name)
+        return func
+
+    return decorator
+
+
+def get_executor_name(func: Callable[..., Any]) -> str:
+    """Return the name of the executor to run a blocking function in."""
+    name = getattr(func, '_hass_executor', None)
+    return name if isinstance(name, str) else EXECUTOR_DEFAULT
+
+
 @callback
 def async_loop_exception_handler(loop, context):
     """Handle all exception inside the core loop."""
@@ -118,12 +152,14 @@ class HomeAssistant(object):
         else:
             self.loop = loop or asyncio.get_event_loop()
 
-        executor_opts = {'max_workers': None}
-        if sys.version_info[:2] >= (3, 6):
-            executor_opts['thread_name_prefix'] = 'SyncWorker'
-
-        self.executor = ThreadPoolExecutor(**executor_opts)
+        self.executor = InstrumentedExecutor(
+            'SyncWorker', EXECUTOR_LIMITS[EXECUTOR_DEFAULT])
         self.loop.set_default_executor(self.executor)
+        # Executors by name, created when first used
+        self.executors = {EXECUTOR_DEFAULT: self.executor}
+        self.executor_limits = dict(EXECUTOR_LIMITS)
+        self.integration_executor_limit = INTEGRATION_EXECUTOR_LIMIT
+        self._integration_semaphores = {}  # type: Dict[str, Any]
         self.loop.set_exception_handler(async_loop_exception_handler)
         self._pending_tasks = []
         self._track_task = True
@@ -222,7 +258,9 @@ class HomeAssistant(object):
         elif asyncio.iscoroutinefunction(target):
             task = self.loop.create_task(target(*args))
         else:
-            task = self.loop.run_in_executor(None, target, *args)
+            task = self.loop.run_in_executor(
+                self.async_get_executor(get_executor_name(target)),
+                target, *args)
 
         # If a task is scheduled
         if self._track_task and task is not None:
@@ -235,8 +273,13 @@ class HomeAssistant(object):
             self,
             target: Callable[..., Any],
             *args: Any) -> asyncio.tasks.Task:
-        """Add an executor job from within the event loop."""
-        task = self.loop.run_in_executor(None, target, *args)
+        """Add an executor job from within the event loop.
+
+        The job runs in the executor marked with the in_executor annotation.
+        """
+        task = self.loop.run_in_executor(
+            self.async_get_executor(get_executor_name(target)),
+            target, *args)
 
         # If a task is scheduled
         if self._track_task:
@@ -244,6 +287,66 @@ class HomeAssistant(object):
 
         return task
 
+    @callback
+    def async_add_device_job(
+            self,
+            integration: Optional[str],
+            target: Callable[..., Any],
+            *args: Any) -> asyncio.tasks.Task:
+        """Add a job talking to a device from within the event loop.
+
+        At most integration_executor_limit jobs of the integration run in
+        the device I/O executor at once.
+        """
+        task = self.loop.create_task(
+            self._async_run_device_job(integration, target, args))
+
+        # If a task is scheduled
+        if self._track_task:
+            self._pending_tasks.append(task)
+
+        return task
+
+    async def _async_run_device_job(self, integration, target, args):
+        """Run a device job once the integration is below its limit."""
+        executor = self.async_get_executor(EXECUTOR_DEVICE_IO)
+
+        if integration is None:
+            return await self.loop.run_in_executor(executor, target, *args)
+
+        semaphore = self._integration_semaphores.get(integration)
+        if semaphore is None:
+            semaphore = self._integration_semaphores[integration] = \
+                asyncio.Semaphore(
+                    self.integration_executor_limit, loop=self.loop)
+
+        async with semaphore:
+            return await self.loop.run_in_executor(executor, target, *args)
+
+    @callback
+    def async_get_executor(self, name: str) -> InstrumentedExecutor:
+        """Return the executor name, creating it when first used."""
+        executor = self.executors.get(name)
+        if executor is None:
+            executor = self.executors[name] = InstrumentedExecutor(
+                'SyncWorker_{}'.format(name), self.executor_limits.get(name))
+        return executor
+
+    @callback
+    def async_set_executor_limit(self, name: str,
+                                 max_workers: Optional[int]) -> None:
+        """Set the maximum number of threads of the executor name."""
+        self.executor_limits[name] = max_workers
+        executor = self.executors.get(name)
+        if executor is not None and max_workers is not None:
+            executor.max_workers = max_workers
+
+    @callback
+    def async_executor_stats(self) -> Dict[str, Dict[str, Any]]:
+        """Return the statistics of each executor."""
+        return {name: executor.stats
+                for name, executor in self.executors.items()}
+
     @callback
     def async_track_tasks(self):
         """Track tasks so you can wait for all tasks to be done."""
@@ -306,7 +409,8 @@ class HomeAssistant(object):
         self.state = CoreState.not_running
         self.bus.async_fire(EVENT_HOMEASSISTANT_CLOSE)
         await self.async_block_till_done()
-        self.executor.shutdown()
+        for executor in self.executors.values():
+            executor.shutdown()
 
         self.exit_code = exit_code
         self.loop.stop()
@@ -374,6 +478,9 @@ class EventBus(object):
     def __init__(self, hass: HomeAssistant) -> None:
         """Initialize a new event bus."""
         self._listeners = {}  # type: Dict[str, List[Callable]]
+        # State changed listeners indexed by the entity_id they track
+        self._entity_listeners = {}  # type: Dict[str, List[Callable]]
+        self._entity_listener_count = 0
         self._hass = hass
 
     @callback
@@ -382,8 +489,15 @@ class EventBus(object):
 
         This method must be run in the event loop.
         """
-        return {key: len(self._listeners[key])
-                for key in self._listeners}
+        listeners = {key: len(self._listeners[key])
+                     for key in self._listeners}
+
+        if self._entity_listener_count:
+            listeners[EVENT_STATE_CHANGED] = \
+                listeners.get(EVENT_STATE_CHANGED, 0) + \
+                self._entity_listener_count
+
+        return listeners
 
     @property
     def listeners(self):
@@ -412,6 +526,14 @@ class EventBus(object):
                 event_type != EVENT_HOMEASSISTANT_CLOSE):
             listeners = match_all_listeners + listeners
 
+        # Only wake up the state listeners interested in this entity
+        if event_type == EVENT_STATE_CHANGED and self._entity_listeners \
+                and event_data:
+            entity_listeners = self._entity_listeners.get(
+                event_data.get('entity_id'))
+            if entity_listeners is not None:
+                listeners = listeners + entity_listeners
+
         event = Event(event_type, event_data, origin)
 
         if event_type != EVENT_TIME_CHANGED:
@@ -459,6 +581,49 @@ class EventBus(object):
 
         return remove_listener
 
+    @callback
+    def async_listen_state_changed(self, entity_ids, listener):
+        """Listen for state changed events of specific entities.
+
+        Listeners are indexed by entity_id, firing a state change will only
+        call the listeners that track the changed entity.
+
+        entity_ids should be an iterable of lowercase entity ids.
+
+        This method must be run in the event loop.
+        """
+        entity_ids = tuple(set(entity_ids))
+
+        for entity_id in entity_ids:
+            if entity_id in self._entity_listeners:
+                self._entity_listeners[entity_id].append(listener)
+            else:
+                self._entity_listeners[entity_id] = [listener]
+
+        self._entity_listener_count += 1
+        removed = False
+
+        @callback
+        def remove_listener():
+            """Remove the listener."""
+            nonlocal removed
+            if removed:
+                _LOGGER.warning("Unable to remove unknown listener %s",
+                                listener)
+                return
+
+            removed = True
+            self._entity_listener_count -= 1
+
+            for entity_id in entity_ids:
+                entity_listeners = self._entity_listeners[entity_id]
+                entity_listeners.remove(listener)
+
+                if not entity_listeners:
+                    self._entity_listeners.pop(entity_id)
+
+        return remove_listener
+
     def listen_once(self, event_type, listener):
         """Listen once for event of a specific type.
 
@@ -531,10 +696,13 @@ class State(object):
     attributes: extra information on entity and state
     last_changed: last time the state was changed, not the attributes.
     last_updated: last time this object was updated.
+
+    The domain and state strings are interned and attributes that already
+    are a read-only mapping are shared, not wrapped again.
     """
 
-    __slots__ = ['entity_id', 'state', 'attributes',
-                 'last_changed', 'last_updated']
+    __slots__ = ['entity_id', 'domain', 'state', 'attributes',
+                 'last_changed', 'last_updated', '_as_dict']
 
     def __init__(self, entity_id, state, attributes=None, last_changed=None,
                  last_updated=None):
@@ -552,15 +720,32 @@ class State(object):
                 "State max length is 255 characters.").format(entity_id))
 
         self.entity_id = entity_id.lower()
-        self.state = state
-        self.attributes = MappingProxyType(attributes or {})
+        self.domain = sys.intern(split_entity_id(self.entity_id)[0])
+        self.state = sys.intern(state)
+        self.attributes = _as_attributes(attributes)
         self.last_updated = last_updated or dt_util.utcnow()
         self.last_changed = last_changed or self.last_updated
+        self._as_dict = None
 
-    @property
-    def domain(self):
-        """Domain of this state."""
-        return split_entity_id(self.entity_id)[0]
+    def _async_derive(self, state, attributes, last_changed):
+        """Return a new state of the same entity.
+
+        The entity_id is not validated again.
+        """
+        if not valid_state(state):
+            raise InvalidStateError((
+                "Invalid state encountered for entity id: {}. "
+                "State max length is 255 characters.").format(self.entity_id))
+
+        new = State.__new__(State)
+        new.entity_id = self.entity_id
+        new.domain = self.domain
+        new.state = sys.intern(state)
+        new.attributes = _as_attributes(attributes)
+        new.last_updated = dt_util.utcnow()
+        new.last_changed = last_changed or new.last_updated
+        new._as_dict = None
+        return new
 
     @property
     def object_id(self):
@@ -579,14 +764,17 @@ class State(object):
 
         Async friendly.
 
-        To be used for JSON serialization.
+        To be used for JSON serialization. The dict is created once and
+        shared by all callers, it must not be modified.
         Ensures: state == State.from_dict(state.as_dict())
         """
-        return {'entity_id': self.entity_id,
-                'state': self.state,
-                'attributes': dict(self.attributes),
-                'last_changed': self.last_changed,
-                'last_updated': self.last_updated}
+        if self._as_dict is None:
+            self._as_dict = {'entity_id': self.entity_id,
+                             'state': self.state,
+                             'attributes': dict(self.attributes),
+                             'last_changed': self.last_changed,
+                             'last_updated': self.last_updated}
+        return self._as_dict
 
     @classmethod
     def from_dict(cls, json_dict):
@@ -630,6 +818,18 @@ class State(object):
             dt_util.as_local(self.last_changed).isoformat())
 
 
+_EMPTY_ATTRIBUTES = MappingProxyType({})
+
+
+def _as_attributes(attributes):
+    """Return attributes as a read-only mapping, sharing existing ones."""
+    if isinstance(attributes, MappingProxyType):
+        return attributes
+    if not attributes:
+        return _EMPTY_ATTRIBUTES
+    return MappingProxyType(attributes)
+
+
 class StateMachine(object):
     """Helper class that tracks the state of different entities."""
 
@@ -754,7 +954,16 @@ class StateMachine(object):
             return
 
         last_changed = old_state.last_changed if same_state else None
-        state = State(entity_id, new_state, attributes, last_changed)
+
+        if not is_existing:
+            state = State(entity_id, new_state, attributes, last_changed)
+        else:
+            # Unchanged attributes share the mapping of the old state
+            # pylint: disable=protected-access
+            state = old_state._async_derive(
+                new_state,
+                old_state.attributes if same_attr else attributes,
+                last_changed)
         self._states[entity_id] = state
         self._bus.async_fire(EVENT_STATE_CHANGED, {
             'entity_id': entity_id,
@@ -1,5 +1,6 @@
 """An abstract class for entities."""
 import asyncio
+from collections import namedtuple
 import logging
 import functools as ft
 from timeit import default_timer as timer
@@ -10,7 +11,8 @@ from homeassistant.const import (
     ATTR_ASSUMED_STATE, ATTR_FRIENDLY_NAME, ATTR_HIDDEN, ATTR_ICON,
     ATTR_UNIT_OF_MEASUREMENT, DEVICE_DEFAULT_NAME, STATE_OFF, STATE_ON,
     STATE_UNAVAILABLE, STATE_UNKNOWN, TEMP_CELSIUS, TEMP_FAHRENHEIT,
-    ATTR_ENTITY_PICTURE, ATTR_SUPPORTED_FEATURES, ATTR_DEVICE_CLASS)
+    ATTR_ENTITY_PICTURE, ATTR_SUPPORTED_FEATURES, ATTR_DEVICE_CLASS,
+    MATCH_ALL)
 from homeassistant.core import HomeAssistant, callback
 from homeassistant.config import DATA_CUSTOMIZE
 from homeassistant.exceptions import NoEntitySpecifiedError
@@ -20,6 +22,14 @@ from homeassistant.util.async_ import run_callback_threadsafe
 _LOGGER = logging.getLogger(__name__)
 SLOW_UPDATE_WARNING = 10
 
+# hass.data key of the counters of written and elided entity states
+DATA_STATE_WRITES = 'entity_state_writes'
+
+# Last state written by an entity, with the state and attributes before
+# customization and the customization and unit system they were written with
+_StateWrite = namedtuple('_StateWrite', [
+    'state_obj', 'state', 'attributes', 'customize', 'units'])
+
 
 def generate_entity_id(entity_id_format: str, name: Optional[str],
                        current_ids: Optional[List[str]] = None,
@@ -40,6 +50,13 @@ def generate_entity_id(entity_id_format: str, name: Optional[str],
         entity_id_format.format(name), current_ids)
 
 
+@callback
+def async_get_state_write_stats(hass: HomeAssistant) -> dict:
+    """Return how many entity state updates were written and elided."""
+    return dict(hass.data.get(
+        DATA_STATE_WRITES, {'writes': 0, 'elided_writes': 0}))
+
+
 @callback
 def async_generate_entity_id(entity_id_format: str, name: Optional[str],
                              current_ids: Optional[Iterable[str]] = None,
@@ -82,6 +99,16 @@ class Entity(object):
     # Name in the entity registry
     registry_name = None
 
+    # Entities that report their changes with mark_changed are only written
+    # on updates after a change was marked
+    reports_changes = False
+
+    # Properties marked changed since the last state write
+    _changed_properties = None
+
+    # Last state write, to elide writes of unchanged states
+    _last_write = None
+
     @property
     def should_poll(self) -> bool:
         """Return True if entity has to be polled for state.
@@ -198,6 +225,29 @@ class Entity(object):
                 _LOGGER.exception("Update for %s fails", self.entity_id)
                 return
 
+        write_stats = self.hass.data.get(DATA_STATE_WRITES)
+        if write_stats is None:
+            write_stats = self.hass.data[DATA_STATE_WRITES] = {
+                'writes': 0, 'elided_writes': 0}
+
+        # The last write is only reused while nobody else changed the state
+        last_write = self._last_write
+        if last_write is not None and (
+                self.force_update or
+                self.hass.states.get(self.entity_id) is not
+                last_write.state_obj or
+                self.hass.data.get(DATA_CUSTOMIZE) is not
+                last_write.customize or
+                self.hass.config.units is not last_write.units):
+            last_write = None
+
+        if last_write is not None and self.reports_changes and \
+                not self._changed_properties:
+            write_stats['elided_writes'] += 1
+            return
+
+        self._changed_properties = None
+
         start = timer()
 
         if not self.available:
@@ -257,6 +307,14 @@ class Entity(object):
                             "https://goo.gl/Nvioub", self.entity_id,
                             type(self), end - start)
 
+        if last_write is not None and state == last_write.state and \
+                attr == last_write.attributes:
+            write_stats['elided_writes'] += 1
+            return
+
+        raw_state = state
+        raw_attr = dict(attr)
+
         # Overwrite properties that have been set in the config file.
         if DATA_CUSTOMIZE in self.hass.data:
             attr.update(self.hass.data[DATA_CUSTOMIZE].get(self.entity_id))
@@ -277,6 +335,23 @@ class Entity(object):
 
         self.hass.states.async_set(
             self.entity_id, state, attr, self.force_update)
+        write_stats['writes'] += 1
+
+        self._last_write = _StateWrite(
+            self.hass.states.get(self.entity_id), raw_state, raw_attr,
+            self.hass.data.get(DATA_CUSTOMIZE), self.hass.config.units)
+
+    def mark_changed(self, *properties):
+        """Report properties that changed since the last state write.
+
+        Entities that set reports_changes have to call this for their next
+        update to be written. Without properties, the entity is marked as
+        changed as a whole. Can be called from any thread.
+        """
+        changed = self._changed_properties
+        if changed is None:
+            changed = self._changed_properties = set()
+        changed.update(properties or (MATCH_ALL,))
 
     def schedule_update_ha_state(self, force_refresh=False):
         """Schedule an update ha state change task.
@@ -316,7 +391,10 @@ class Entity(object):
             if hasattr(self, 'async_update'):
                 yield from self.async_update()
             elif hasattr(self, 'update'):
-                yield from self.hass.async_add_job(self.update)
+                yield from self.hass.async_add_device_job(
+                    self.platform.platform_name
+                    if self.platform is not None else None,
+                    self.update)
         finally:
             self._update_staged = False
             if warning:
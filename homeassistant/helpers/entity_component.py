@@ -1,7 +1,7 @@
 """Helpers for components that manage entities."""
 import asyncio
+from collections import OrderedDict
 from datetime import timedelta
-from itertools import chain
 
 from homeassistant import config as conf_util
 from homeassistant.setup import async_prepare_setup_platform
@@ -23,6 +23,7 @@ class EntityComponent(object):
     This class has the following responsibilities:
      - Process the configuration and set up a platform based component.
      - Manage the platforms and their entities.
+     - Index the entities of all platforms by entity_id.
      - Help extract the entities from a service call.
      - Maintain a group that tracks all platform entities.
      - Listen for discovery events for platforms related to the domain.
@@ -39,6 +40,11 @@ class EntityComponent(object):
 
         self.config = None
 
+        # Entities of all platforms, kept up to date by the platforms
+        self._entities = OrderedDict()
+        self._group_entity_ids = None
+        self._group_update_scheduled = False
+
         self._platforms = {
             domain: self._async_init_entity_platform(domain, None)
         }
@@ -48,16 +54,11 @@ class EntityComponent(object):
     @property
     def entities(self):
         """Return an iterable that returns all entities."""
-        return chain.from_iterable(platform.entities.values() for platform
-                                   in self._platforms.values())
+        return self._entities.values()
 
     def get_entity(self, entity_id):
         """Helper method to get an entity."""
-        for platform in self._platforms.values():
-            entity = platform.entities.get(entity_id)
-            if entity is not None:
-                return entity
-        return None
+        return self._entities.get(entity_id)
 
     def setup(self, config):
         """Set up a full entity component.
@@ -138,9 +139,16 @@ class EntityComponent(object):
         if ATTR_ENTITY_ID not in service.data:
             return [entity for entity in self.entities if entity.available]
 
-        entity_ids = set(extract_entity_ids(self.hass, service, expand_group))
-        return [entity for entity in self.entities
-                if entity.available and entity.entity_id in entity_ids]
+        found = []
+        seen = set()
+        for entity_id in extract_entity_ids(self.hass, service, expand_group):
+            entity = self._entities.get(entity_id)
+            if entity is not None and entity.available and \
+                    entity_id not in seen:
+                seen.add(entity_id)
+                found.append(entity)
+
+        return found
 
     async def _async_setup_platform(self, platform_type, platform_config,
                                     discovery_info=None):
@@ -167,10 +175,29 @@ class EntityComponent(object):
 
     @callback
     def _async_update_group(self):
+        """Schedule an update of the component group.
+
+        Entities added by platforms during the same loop iteration update
+        the group once.
+
+        This method must be run in the event loop.
+        """
+        if self.group_name is None or self._group_update_scheduled:
+            return
+
+        self._group_update_scheduled = True
+        self.hass.async_add_job(self._async_update_group_debounced())
+
+    async def _async_update_group_debounced(self):
         """Set up and/or update component group.
 
+        The group is only updated if its members changed.
+
         This method must be run in the event loop.
         """
+        await asyncio.sleep(0, loop=self.hass.loop)
+        self._group_update_scheduled = False
+
         if self.group_name is None:
             return
 
@@ -178,6 +205,10 @@ class EntityComponent(object):
                sorted(self.entities,
                       key=lambda entity: entity.name or entity.entity_id)]
 
+        if ids == self._group_entity_ids:
+            return
+
+        self._group_entity_ids = ids
         self.hass.components.group.async_set_group(
             slugify(self.group_name), name=self.group_name,
             visible=False, entity_ids=ids
@@ -200,13 +231,14 @@ class EntityComponent(object):
         self.config = None
 
         if self.group_name is not None:
+            self._group_entity_ids = None
             self.hass.components.group.async_remove(slugify(self.group_name))
 
     async def async_remove_entity(self, entity_id):
         """Remove an entity managed by one of the platforms."""
-        for platform in self._platforms.values():
-            if entity_id in platform.entities:
-                await platform.async_remove_entity(entity_id)
+        entity = self._entities.get(entity_id)
+        if entity is not None:
+            await entity.platform.async_remove_entity(entity_id)
 
     async def async_prepare_reload(self):
         """Prepare reloading this entity component.
@@ -244,4 +276,5 @@ class EntityComponent(object):
             scan_interval=scan_interval,
             entity_namespace=entity_namespace,
             async_entities_added_callback=self._async_update_group,
+            entity_index=self._entities,
         )
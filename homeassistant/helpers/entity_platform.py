@@ -1,5 +1,7 @@
 """Class to manage the entities for a single platform."""
 import asyncio
+from datetime import timedelta
+import random
 
 from homeassistant.const import DEVICE_DEFAULT_NAME
 from homeassistant.core import callback, valid_entity_id, split_entity_id
@@ -7,20 +9,43 @@ from homeassistant.exceptions import HomeAssistantError, PlatformNotReady
 from homeassistant.util.async_ import (
     run_callback_threadsafe, run_coroutine_threadsafe)
 
-from .event import async_track_time_interval, async_call_later
+from .event import async_call_later
 from .entity_registry import async_get_registry
 
 SLOW_SETUP_WARNING = 10
 SLOW_SETUP_MAX_WAIT = 60
 PLATFORM_NOT_READY_RETRIES = 10
 
+# Fraction of the scan interval by which polls are randomly advanced
+POLL_JITTER = 0.1
+# Number of polls without a state change before polling slows down
+POLL_UNCHANGED_BACKOFF = 5
+# Maximum factor by which the scan interval of an entity is extended
+POLL_MAX_BACKOFF = 8
+
+
+class _EntityPoll(object):
+    """Polling schedule of a single entity."""
+
+    __slots__ = ['entity', 'cancel', 'backoff', 'unchanged']
+
+    def __init__(self, entity):
+        """Initialize the schedule of an entity."""
+        self.entity = entity
+        # Method to cancel the scheduled poll
+        self.cancel = None
+        # Factor by which the scan interval is extended
+        self.backoff = 1
+        # Consecutive polls that did not change the state
+        self.unchanged = 0
+
 
 class EntityPlatform(object):
     """Manage the entities for a single platform."""
 
     def __init__(self, *, hass, logger, domain, platform_name, platform,
                  scan_interval, entity_namespace,
-                 async_entities_added_callback):
+                 async_entities_added_callback, entity_index=None):
         """Initialize the entity platform.
 
         hass: HomeAssistant
@@ -31,6 +56,8 @@ class EntityPlatform(object):
         parallel_updates: int
         entity_namespace: str
         async_entities_added_callback: @callback method
+        entity_index: dict of entity_id to entity, shared by the platforms
+                      of a component
         """
         self.hass = hass
         self.logger = logger
@@ -42,12 +69,17 @@ class EntityPlatform(object):
         self.async_entities_added_callback = async_entities_added_callback
         self.config_entry = None
         self.entities = {}
+        self._entity_index = {} if entity_index is None else entity_index
         self._tasks = []
-        # Method to cancel the state change listener
-        self._async_unsub_polling = None
+        # Polling schedule of each polled entity by entity_id
+        self._polls = {}
         # Method to cancel the retry of setup
         self._async_cancel_retry_setup = None
-        self._process_updates = asyncio.Lock(loop=hass.loop)
+        self._poll_count = 0
+        self._poll_duration = 0.0
+        self._max_poll_duration = 0.0
+        self._poll_overruns = 0
+        self._skipped_polls = 0
 
         # Platform is None for the EntityComponent "catch-all" EntityPlatform
         # which powers entity_component.add_entities
@@ -70,6 +102,20 @@ class EntityPlatform(object):
         else:
             self.parallel_updates = None
 
+    @property
+    def polling_stats(self):
+        """Return statistics about polling the entities."""
+        return {
+            'polled_entities': len(self._polls),
+            'backed_off_entities': sum(
+                1 for poll in self._polls.values() if poll.backoff > 1),
+            'polls': self._poll_count,
+            'poll_duration': self._poll_duration,
+            'max_poll_duration': self._max_poll_duration,
+            'overruns': self._poll_overruns,
+            'skipped_polls': self._skipped_polls,
+        }
+
     async def async_setup(self, platform_config, discovery_info=None):
         """Setup the platform from a config file."""
         platform = self.platform
@@ -223,14 +269,12 @@ class EntityPlatform(object):
         await asyncio.wait(tasks, loop=self.hass.loop)
         self.async_entities_added_callback()
 
-        if self._async_unsub_polling is not None or \
-           not any(entity.should_poll for entity
-                   in self.entities.values()):
-            return
-
-        self._async_unsub_polling = async_track_time_interval(
-            self.hass, self._update_entity_states, self.scan_interval
-        )
+        for entity in new_entities:
+            if (entity is not None and entity.should_poll and
+                    self.entities.get(entity.entity_id) is entity and
+                    entity.entity_id not in self._polls):
+                poll = self._polls[entity.entity_id] = _EntityPoll(entity)
+                self._async_schedule_poll(poll, 0)
 
     async def _async_add_entity(self, entity, update_before_add,
                                 component_entities, registry):
@@ -318,6 +362,7 @@ class EntityPlatform(object):
                 msg)
 
         self.entities[entity.entity_id] = entity
+        self._entity_index[entity.entity_id] = entity
         component_entities.add(entity.entity_id)
 
         if hasattr(entity, 'async_added_to_hass'):
@@ -342,51 +387,87 @@ class EntityPlatform(object):
 
         await asyncio.wait(tasks, loop=self.hass.loop)
 
-        if self._async_unsub_polling is not None:
-            self._async_unsub_polling()
-            self._async_unsub_polling = None
-
     async def async_remove_entity(self, entity_id):
         """Remove entity id from platform."""
         await self._async_remove_entity(entity_id)
 
-        # Clean up polling job if no longer needed
-        if (self._async_unsub_polling is not None and
-                not any(entity.should_poll for entity
-                        in self.entities.values())):
-            self._async_unsub_polling()
-            self._async_unsub_polling = None
-
     async def _async_remove_entity(self, entity_id):
         """Remove entity id from platform."""
         entity = self.entities.pop(entity_id)
+        self._entity_index.pop(entity_id, None)
+
+        poll = self._polls.pop(entity_id, None)
+        if poll is not None and poll.cancel is not None:
+            poll.cancel()
 
         if hasattr(entity, 'async_will_remove_from_hass'):
             await entity.async_will_remove_from_hass()
 
         self.hass.states.async_remove(entity_id)
 
-    async def _update_entity_states(self, now):
-        """Update the states of all the polling entities.
+    @callback
+    def _async_schedule_poll(self, poll, elapsed):
+        """Schedule the next poll of an entity.
 
-        To protect from flooding the executor, we will update async entities
-        in parallel and other entities sequential.
+        The scan interval is extended for entities that are backed off and
+        randomly shortened to spread the polls of the platform.
+        """
+        interval = self.scan_interval.total_seconds() * poll.backoff
+        delay = max(interval * (1 - random.random() * POLL_JITTER) - elapsed,
+                    0)
+
+        @callback
+        def poll_entity(now):
+            """Poll the entity."""
+            poll.cancel = None
+            self.hass.async_add_job(self._async_poll_entity(poll))
+
+        poll.cancel = async_call_later(self.hass, delay, poll_entity)
+
+    async def _async_poll_entity(self, poll):
+        """Update the state of a polling entity and schedule the next poll.
+
+        Entities that take longer than their interval to update, or whose
+        state does not change, are backed off to a longer interval.
 
         This method must be run in the event loop.
         """
-        if self._process_updates.locked():
-            self.logger.warning(
-                "Updating %s %s took longer than the scheduled update "
-                "interval %s", self.platform_name, self.domain,
-                self.scan_interval)
-            return
-
-        async with self._process_updates:
-            tasks = []
-            for entity in self.entities.values():
-                if not entity.should_poll:
-                    continue
-                tasks.append(entity.async_update_ha_state(True))
+        entity = poll.entity
+        interval = self.scan_interval.total_seconds() * poll.backoff
+        elapsed = 0
 
-            if tasks:
-                await asyncio.wait(tasks, loop=self.hass.loop)
+        try:
+            if entity.should_poll:
+                old_state = self.hass.states.get(entity.entity_id)
+                start = self.hass.loop.time()
+
+                try:
+                    await entity.async_update_ha_state(True)
+                finally:
+                    elapsed = self.hass.loop.time() - start
+                    self._poll_count += 1
+                    self._poll_duration += elapsed
+                    self._max_poll_duration = max(
+                        self._max_poll_duration, elapsed)
+
+                if elapsed > interval:
+                    missed = int(elapsed // interval)
+                    self._poll_overruns += 1
+                    self._skipped_polls += missed
+                    poll.backoff = min(poll.backoff * 2, POLL_MAX_BACKOFF)
+                    self.logger.warning(
+                        "Updating %s %s took longer than the scheduled "
+                        "update interval %s", self.platform_name,
+                        entity.entity_id, timedelta(seconds=interval))
+                elif self.hass.states.get(entity.entity_id) is old_state:
+                    poll.unchanged += 1
+                    if poll.unchanged % POLL_UNCHANGED_BACKOFF == 0:
+                        poll.backoff = min(poll.backoff * 2, POLL_MAX_BACKOFF)
+                else:
+                    poll.unchanged = 0
+                    poll.backoff = 1
+        finally:
+            # The entity could have been removed during the update. Failed
+            # updates are polled again as well.
+            if self._polls.get(entity.entity_id) is poll:
+                self._async_schedule_poll(poll, elapsed)
@@ -1,6 +1,9 @@
 """Helpers for listening to events."""
 from datetime import timedelta
 import functools as ft
+import heapq
+from itertools import count
+import logging
 
 from homeassistant.loader import bind_hass
 from homeassistant.helpers.sun import get_astral_event_next
@@ -10,6 +13,10 @@ from ..const import (
 from ..util import dt as dt_util
 from ..util.async_ import run_callback_threadsafe
 
+_LOGGER = logging.getLogger(__name__)
+
+DATA_TIME_SCHEDULER = 'event_time_scheduler'
+
 # PyLint does not like the use of threaded_listener_factory
 # pylint: disable=invalid-name
 
@@ -63,10 +70,6 @@ def async_track_state_change(hass, entity_ids, action, from_state=None,
     @callback
     def state_change_listener(event):
         """Handle specific state changes."""
-        if entity_ids != MATCH_ALL and \
-           event.data.get('entity_id') not in entity_ids:
-            return
-
         old_state = event.data.get('old_state')
         if old_state is not None:
             old_state = old_state.state
@@ -80,18 +83,117 @@ def async_track_state_change(hass, entity_ids, action, from_state=None,
                                event.data.get('old_state'),
                                event.data.get('new_state'))
 
-    return hass.bus.async_listen(EVENT_STATE_CHANGED, state_change_listener)
+    if entity_ids == MATCH_ALL:
+        return hass.bus.async_listen(
+            EVENT_STATE_CHANGED, state_change_listener)
+
+    return hass.bus.async_listen_state_changed(
+        entity_ids, state_change_listener)
 
 
 track_state_change = threaded_listener_factory(async_track_state_change)
 
 
+class TemplateDependencyTracker(object):
+    """Track the state changes that can change the result of renders.
+
+    The tracked entities and domains are replaced by those accessed by the
+    latest renders, see Template.async_render_to_info. Renders that
+    accessed all states or failed track all state changes, as do renders
+    that accessed no states, e.g. those that only depend on the time.
+    """
+
+    def __init__(self, hass, action):
+        """Initialize the tracker, it tracks nothing until updated."""
+        self.hass = hass
+        self._action = action
+        self._entities = None
+        self._domains = frozenset()
+        self._unsubs = []
+
+    @property
+    def entity_ids(self):
+        """Return the ids of the tracked entities or MATCH_ALL."""
+        if self._entities == MATCH_ALL or self._domains:
+            return MATCH_ALL
+        return list(self._entities or ())
+
+    @callback
+    def async_update(self, render_infos):
+        """Track the states accessed by render_infos."""
+        entities = set()
+        domains = set()
+
+        for render_info in render_infos:
+            if render_info.all_states or render_info.exception is not None:
+                entities = MATCH_ALL
+                domains = set()
+                break
+            entities |= render_info.entities
+            domains |= render_info.domains
+
+        if not entities and not domains:
+            entities = MATCH_ALL
+        elif entities != MATCH_ALL:
+            entities = frozenset(entities)
+        domains = frozenset(domains)
+
+        if entities == self._entities and domains == self._domains:
+            return
+
+        self.async_remove()
+        self._entities = entities
+        self._domains = domains
+
+        if entities == MATCH_ALL:
+            self._unsubs.append(self.hass.bus.async_listen(
+                EVENT_STATE_CHANGED, self._async_state_changed))
+            return
+
+        if entities:
+            self._unsubs.append(self.hass.bus.async_listen_state_changed(
+                entities, self._async_state_changed))
+
+        if domains:
+            self._unsubs.append(self.hass.bus.async_listen(
+                EVENT_STATE_CHANGED, self._async_domain_state_changed))
+
+    @callback
+    def async_remove(self):
+        """Stop tracking state changes."""
+        while self._unsubs:
+            self._unsubs.pop()()
+        self._entities = None
+        self._domains = frozenset()
+
+    @callback
+    def _async_state_changed(self, event):
+        """Run the action for a state change of a tracked entity."""
+        self.hass.async_run_job(
+            self._action, event.data.get('entity_id'),
+            event.data.get('old_state'), event.data.get('new_state'))
+
+    @callback
+    def _async_domain_state_changed(self, event):
+        """Run the action for a state change in a tracked domain."""
+        entity_id = event.data.get('entity_id')
+
+        # Changes of tracked entities are handled by their own listener
+        if entity_id in self._entities or \
+                entity_id.split('.', 1)[0] not in self._domains:
+            return
+
+        self._async_state_changed(event)
+
+
 @callback
 @bind_hass
 def async_track_template(hass, template, action, variables=None):
-    """Add a listener that track state changes with template condition."""
-    from . import condition
+    """Add a listener that track state changes with template condition.
 
+    Only changes of the states that the last render of the template
+    accessed are tracked.
+    """
     # Local variable to keep track of if the action has already been triggered
     already_triggered = False
 
@@ -99,7 +201,15 @@ def async_track_template(hass, template, action, variables=None):
     def template_condition_listener(entity_id, from_s, to_s):
         """Check if condition is correct and run action."""
         nonlocal already_triggered
-        template_result = condition.async_template(hass, template, variables)
+        render_info = template.async_render_to_info(variables)
+        tracker.async_update([render_info])
+
+        if render_info.exception is not None:
+            _LOGGER.error("Error during template condition: %s",
+                          render_info.exception)
+            template_result = False
+        else:
+            template_result = render_info.result.lower() == 'true'
 
         # Check to see if template returns true
         if template_result and not already_triggered:
@@ -108,9 +218,10 @@ def async_track_template(hass, template, action, variables=None):
         elif not template_result:
             already_triggered = False
 
-    return async_track_state_change(
-        hass, template.extract_entities(variables),
-        template_condition_listener)
+    tracker = TemplateDependencyTracker(hass, template_condition_listener)
+    tracker.async_update([template.async_render_to_info(variables)])
+
+    return tracker.async_remove
 
 
 track_template = threaded_listener_factory(async_track_template)
@@ -191,28 +302,8 @@ def async_track_point_in_utc_time(hass, action, point_in_time):
     # Ensure point_in_time is UTC
     point_in_time = dt_util.as_utc(point_in_time)
 
-    @callback
-    def point_in_time_listener(event):
-        """Listen for matching time_changed events."""
-        now = event.data[ATTR_NOW]
-
-        if now < point_in_time or hasattr(point_in_time_listener, 'run'):
-            return
-
-        # Set variable so that we will never run twice.
-        # Because the event bus might have to wait till a thread comes
-        # available to execute this listener it might occur that the
-        # listener gets lined up twice to be executed. This will make
-        # sure the second time it does nothing.
-        point_in_time_listener.run = True
-        async_unsub()
-
-        hass.async_run_job(action, now)
-
-    async_unsub = hass.bus.async_listen(EVENT_TIME_CHANGED,
-                                        point_in_time_listener)
-
-    return async_unsub
+    return _async_get_scheduler(hass).async_schedule_point(
+        action, point_in_time)
 
 
 track_point_in_utc_time = threaded_listener_factory(
@@ -333,25 +424,11 @@ def async_track_utc_time_change(hass, action, year=None, month=None, day=None,
         return hass.bus.async_listen(EVENT_TIME_CHANGED, time_change_listener)
 
     pmp = _process_time_match
-    year, month, day = pmp(year), pmp(month), pmp(day)
-    hour, minute, second = pmp(hour), pmp(minute), pmp(second)
+    matchers = (pmp(year), pmp(month), pmp(day),
+                pmp(hour), pmp(minute), pmp(second))
 
-    @callback
-    def pattern_time_change_listener(event):
-        """Listen for matching time_changed events."""
-        now = event.data[ATTR_NOW]
-
-        if local:
-            now = dt_util.as_local(now)
-
-        # pylint: disable=too-many-boolean-expressions
-        if second(now.second) and minute(now.minute) and hour(now.hour) and \
-           day(now.day) and month(now.month) and year(now.year):
-
-            hass.async_run_job(action, now)
-
-    return hass.bus.async_listen(EVENT_TIME_CHANGED,
-                                 pattern_time_change_listener)
+    return _async_get_scheduler(hass).async_schedule_pattern(
+        action, matchers, local)
 
 
 track_utc_time_change = threaded_listener_factory(async_track_utc_time_change)
@@ -369,6 +446,217 @@ def async_track_time_change(hass, action, year=None, month=None, day=None,
 track_time_change = threaded_listener_factory(async_track_time_change)
 
 
+@callback
+def _async_get_scheduler(hass):
+    """Return the time scheduler of this Home Assistant instance."""
+    scheduler = hass.data.get(DATA_TIME_SCHEDULER)
+
+    if scheduler is None:
+        scheduler = hass.data[DATA_TIME_SCHEDULER] = _TimeScheduler(hass)
+
+    return scheduler
+
+
+class _TimeScheduler(object):
+    """Run time trackers when they are due.
+
+    Point in time and time pattern trackers are kept in heaps ordered by
+    the next time they can fire. A single EVENT_TIME_CHANGED listener only
+    looks at the top of the heaps, so trackers cost nothing until they are
+    due.
+
+    The scheduler is driven by the time changed events of the core timer,
+    so firing EVENT_TIME_CHANGED keeps working to mock time in tests.
+    """
+
+    def __init__(self, hass):
+        """Initialize the scheduler."""
+        self.hass = hass
+        self._points = []
+        # Pattern heaps, new patterns and last seen time by local flag
+        self._patterns = {False: [], True: []}
+        self._new_patterns = {False: [], True: []}
+        self._last_wall_time = {False: None, True: None}
+        self._count = 0
+        self._seq = count()
+        self._unsub_time_listener = None
+
+    @callback
+    def async_schedule_point(self, action, point_in_time):
+        """Run action once the time passes point_in_time (UTC)."""
+        entry = [point_in_time, next(self._seq), action, False]
+        heapq.heappush(self._points, entry)
+        return self._async_add_entry(entry)
+
+    @callback
+    def async_schedule_pattern(self, action, matchers, local):
+        """Run action every time the time matches the pattern matchers."""
+        entry = [None, next(self._seq), _TimePattern(action, matchers), False]
+        # New patterns are matched against the next time changed event
+        self._new_patterns[local].append(entry)
+        return self._async_add_entry(entry)
+
+    @callback
+    def _async_add_entry(self, entry):
+        """Start listening for time if needed and return remove function."""
+        self._count += 1
+
+        if self._unsub_time_listener is None:
+            self._unsub_time_listener = self.hass.bus.async_listen(
+                EVENT_TIME_CHANGED, self._async_time_changed)
+
+        @callback
+        def remove():
+            """Remove the entry from the scheduler."""
+            if entry[3]:
+                return
+
+            # Cancelled entries are dropped once they surface in the heap
+            entry[3] = True
+            self._async_entry_done()
+
+        return remove
+
+    @callback
+    def _async_entry_done(self):
+        """Stop listening for time if no entries are left."""
+        self._count -= 1
+
+        if self._count or self._unsub_time_listener is None:
+            return
+
+        self._unsub_time_listener()
+        self._unsub_time_listener = None
+        self._points.clear()
+
+        for local in (False, True):
+            self._patterns[local].clear()
+            self._new_patterns[local].clear()
+            self._last_wall_time[local] = None
+
+    @callback
+    def _async_time_changed(self, event):
+        """Run the trackers that are due."""
+        now = event.data[ATTR_NOW]
+        due = []
+
+        points = self._points
+        while points and (points[0][3] or points[0][0] <= now):
+            entry = heapq.heappop(points)
+            if not entry[3]:
+                # Points in time only fire once
+                entry[3] = True
+                due.append((entry[2], now))
+                self._async_entry_done()
+
+        for local in (False, True):
+            if self._patterns[local] or self._new_patterns[local]:
+                due.extend(self._async_due_patterns(
+                    dt_util.as_local(now) if local else now, local))
+
+        # Actions run after all due entries are collected, entries they
+        # schedule will be checked at the next time changed event.
+        for action, action_now in due:
+            self.hass.async_run_job(action, action_now)
+
+    @callback
+    def _async_due_patterns(self, now, local):
+        """Return the actions of patterns matching now and reschedule them."""
+        # Compare wall clock times, a DST change looks like a time jump
+        wall_now = now.replace(tzinfo=None)
+        last_wall_time = self._last_wall_time[local]
+        self._last_wall_time[local] = wall_now
+        patterns = self._patterns[local]
+        surfaced = self._new_patterns[local]
+        self._new_patterns[local] = []
+
+        if last_wall_time is not None and wall_now < last_wall_time:
+            # Time went backwards, check all patterns again
+            surfaced.extend(patterns)
+            patterns.clear()
+        else:
+            while patterns and \
+                    (patterns[0][3] or patterns[0][0] <= wall_now):
+                surfaced.append(heapq.heappop(patterns))
+
+        due = []
+
+        for entry in surfaced:
+            if entry[3]:
+                continue
+
+            pattern = entry[2]
+
+            if pattern.matches(now):
+                due.append((pattern.action, now))
+
+            entry[0] = pattern.next_time(wall_now)
+
+            # Patterns that can never match again are not rescheduled
+            if entry[0] is not None:
+                heapq.heappush(patterns, entry)
+
+        return due
+
+
+class _TimePattern(object):
+    """Time pattern with a lower bound for the next time it can match."""
+
+    __slots__ = ['action', 'matchers', 'hours', 'minutes', 'seconds']
+
+    def __init__(self, action, matchers):
+        """Initialize the pattern."""
+        self.action = action
+        self.matchers = matchers
+        _, _, _, hour, minute, second = matchers
+        self.hours = [val for val in range(24) if hour(val)]
+        self.minutes = [val for val in range(60) if minute(val)]
+        self.seconds = [val for val in range(60) if second(val)]
+
+    def matches(self, now):
+        """Return if the pattern matches now."""
+        year, month, day, hour, minute, second = self.matchers
+        # pylint: disable=too-many-boolean-expressions
+        return (second(now.second) and minute(now.minute) and
+                hour(now.hour) and day(now.day) and month(now.month) and
+                year(now.year))
+
+    def next_time(self, wall_now):
+        """Return a naive time at or before the next match from wall_now.
+
+        The current second is included so repeated events within a matching
+        second keep matching. Returns None if the pattern can never match.
+        """
+        if not (self.hours and self.minutes and self.seconds):
+            return None
+
+        start_of_day = wall_now.replace(hour=0, minute=0, second=0,
+                                        microsecond=0)
+        next_day = start_of_day + timedelta(days=1)
+
+        year, month, day = self.matchers[:3]
+
+        # Dates that do not match are checked again at the next day
+        if not (day(wall_now.day) and month(wall_now.month) and
+                year(wall_now.year)):
+            return next_day
+
+        current = (wall_now.hour, wall_now.minute, wall_now.second)
+
+        for hour in self.hours:
+            if hour < current[0]:
+                continue
+            for minute in self.minutes:
+                if (hour, minute) < current[:2]:
+                    continue
+                for second in self.seconds:
+                    if (hour, minute, second) >= current:
+                        return start_of_day.replace(
+                            hour=hour, minute=minute, second=second)
+
+        return next_day
+
+
 def _process_state_match(parameter):
     """Convert parameter to function that matches input against parameter."""
     if parameter is None or parameter == MATCH_ALL:
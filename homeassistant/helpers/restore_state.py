@@ -5,12 +5,13 @@ from datetime import timedelta
 
 import async_timeout
 
-from homeassistant.core import HomeAssistant, CoreState, callback
+from homeassistant.core import HomeAssistant, CoreState, State, callback
 from homeassistant.const import EVENT_HOMEASSISTANT_START
 from homeassistant.loader import bind_hass
 from homeassistant.components.history import get_states, last_recorder_run
 from homeassistant.components.recorder import (
     wait_connection_ready, DOMAIN as _RECORDER)
+from homeassistant.components.recorder.const import DATA_INSTANCE
 import homeassistant.util.dt as dt_util
 
 RECORDER_TIMEOUT = 10
@@ -19,14 +20,43 @@ _LOCK = 'restore_lock'
 _LOGGER = logging.getLogger(__name__)
 
 
-def _load_restore_cache(hass: HomeAssistant):
-    """Load the restore cache to be used by other components."""
+@callback
+def _async_remove_cache_on_start(hass: HomeAssistant):
+    """Remove the restore cache once Home Assistant has started."""
     @callback
     def remove_cache(event):
         """Remove the states cache."""
         hass.data.pop(DATA_RESTORE_CACHE, None)
 
-    hass.bus.listen_once(EVENT_HOMEASSISTANT_START, remove_cache)
+    hass.bus.async_listen_once(EVENT_HOMEASSISTANT_START, remove_cache)
+
+
+@callback
+def _async_load_last_states(hass: HomeAssistant):
+    """Load the restore cache from the states the recorder stored.
+
+    The recorder loads these states on setup, without waiting for the
+    database. They are only available if Home Assistant stopped cleanly,
+    otherwise the cache is not created.
+    """
+    instance = hass.data.get(DATA_INSTANCE)
+
+    if instance is None or instance.last_states is None:
+        _LOGGER.debug('No last states stored, loading cache from database')
+        return
+
+    _async_remove_cache_on_start(hass)
+
+    states = (State.from_dict(json_state)
+              for json_state in instance.last_states)
+    hass.data[DATA_RESTORE_CACHE] = {
+        state.entity_id: state for state in states if state is not None}
+    _LOGGER.debug('Created cache with %s', list(hass.data[DATA_RESTORE_CACHE]))
+
+
+def _load_restore_cache(hass: HomeAssistant):
+    """Load the restore cache to be used by other components."""
+    hass.add_job(_async_remove_cache_on_start, hass)
 
     last_run = last_recorder_run(hass)
 
@@ -63,6 +93,11 @@ async def async_get_last_state(hass, entity_id: str):
                       entity_id, hass.state)
         return None
 
+    _async_load_last_states(hass)
+
+    if DATA_RESTORE_CACHE in hass.data:
+        return hass.data[DATA_RESTORE_CACHE].get(entity_id)
+
     try:
         with async_timeout.timeout(RECORDER_TIMEOUT, loop=hass.loop):
             connected = await wait_connection_ready(hass)
@@ -2,10 +2,10 @@
 import asyncio
 import logging
 import os
-from typing import Dict, Optional
+from typing import Callable, Dict, Optional, Type
 
 from homeassistant.const import EVENT_HOMEASSISTANT_STOP
-from homeassistant.core import callback
+from homeassistant.core import EXECUTOR_FILE_IO, callback, in_executor
 from homeassistant.loader import bind_hass
 from homeassistant.util import json
 from homeassistant.helpers.event import async_call_later
@@ -42,13 +42,24 @@ async def async_migrator(hass, old_path, store, *, old_conf_migrate_func=None):
 
 @bind_hass
 class Store:
-    """Class to help storing data."""
+    """Class to help storing data.
 
-    def __init__(self, hass, version: int, key: str):
+    Private stores can only be read by the owner of the file, compact
+    stores are written without indentation. The encoder serializes data
+    that is not plain JSON.
+    """
+
+    def __init__(self, hass, version: int, key: str, *,
+                 private: bool = False, compact: bool = False,
+                 encoder: Optional[Type] = None):
         """Initialize storage class."""
         self.version = version
         self.key = key
         self.hass = hass
+        self.private = private
+        self.compact = compact
+        self.encoder = encoder
+        # Data that is not written yet
         self._data = None
         self._unsub_delay_listener = None
         self._unsub_stop_listener = None
@@ -78,6 +89,10 @@ class Store:
         """Helper to load the data."""
         if self._data is not None:
             data = self._data
+
+            # Data of a delayed save is created when needed
+            if 'data_func' in data:
+                data['data'] = data.pop('data_func')()
         else:
             data = await self.hass.async_add_executor_job(
                 json.load_json, self.path, None)
@@ -116,6 +131,27 @@ class Store:
 
         self._async_ensure_stop_listener()
 
+    @callback
+    def async_delay_save(self, data_func: Callable[[], Dict],
+                         delay: int = 0):
+        """Save data returned by data_func after a delay.
+
+        The data is only created when it is written, saves scheduled
+        before the write are combined in a single write.
+        """
+        self._data = {
+            'version': self.version,
+            'key': self.key,
+            'data_func': data_func,
+        }
+
+        self._async_cleanup_delay_listener()
+
+        self._unsub_delay_listener = async_call_later(
+            self.hass, delay, self._async_callback_delayed_write)
+
+        self._async_ensure_stop_listener()
+
     @callback
     def _async_ensure_stop_listener(self):
         """Ensure that we write if we quit before delay has passed."""
@@ -150,24 +186,40 @@ class Store:
         await self._async_handle_write_data()
 
     async def _async_handle_write_data(self, *_args):
-        """Handler to handle writing the config."""
-        data = self._data
-        self._data = None
+        """Handler to handle writing the config.
 
+        Saves made while another write is in progress are combined, only
+        the latest data is written once the write lock is released.
+        """
         async with self._write_lock:
+            data = self._data
+
+            if data is None:
+                # Written while waiting for the lock
+                return
+
+            if 'data_func' in data:
+                data['data'] = data.pop('data_func')()
+
             try:
                 await self.hass.async_add_executor_job(
                     self._write_data, self.path, data)
             except (json.SerializationError, json.WriteError) as err:
                 _LOGGER.error('Error writing config for %s: %s', self.key, err)
+            finally:
+                # Keep data saved during the write
+                if self._data is data:
+                    self._data = None
 
+    @in_executor(EXECUTOR_FILE_IO)
     def _write_data(self, path: str, data: Dict):
         """Write the data."""
         if not os.path.isdir(os.path.dirname(path)):
             os.makedirs(os.path.dirname(path))
 
         _LOGGER.debug('Writing data for %s', self.key)
-        json.save_json(path, data)
+        json.save_json(path, data, self.private, compact=self.compact,
+                       encoder=self.encoder)
 
     async def _async_migrate_func(self, old_version, old_data):
         """Migrate to the new version."""
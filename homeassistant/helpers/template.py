@@ -26,6 +26,9 @@ _LOGGER = logging.getLogger(__name__)
 _SENTINEL = object()
 DATE_STR_FORMAT = "%Y-%m-%d %H:%M:%S"
 
+# hass.data key of the RenderInfo of the template being rendered
+_RENDER_INFO = 'template.render_info'
+
 _RE_NONE_ENTITIES = re.compile(r"distance\(|closest\(", re.I | re.M)
 _RE_GET_ENTITIES = re.compile(
     r"(?:(?:states\.|(?:is_state|is_state_attr|state_attr|states)"
@@ -82,6 +85,40 @@ def extract_entities(template, variables=None):
     return MATCH_ALL
 
 
+class RenderInfo(object):
+    """Holds the states a render of a template accessed."""
+
+    def __init__(self, template):
+        """Initialize the info of a render that did not access states."""
+        self.template = template
+        self.result = None
+        self.exception = None
+        self.all_states = False
+        self.domains = set()
+        self.entities = set()
+
+
+def _collect_entity(hass, entity_id):
+    """Record that the current render accessed the state of an entity."""
+    render_info = hass.data.get(_RENDER_INFO)
+    if render_info is not None:
+        render_info.entities.add(entity_id.lower())
+
+
+def _collect_domain(hass, domain):
+    """Record that the current render accessed all states of a domain."""
+    render_info = hass.data.get(_RENDER_INFO)
+    if render_info is not None:
+        render_info.domains.add(domain)
+
+
+def _collect_all_states(hass):
+    """Record that the current render accessed all states."""
+    render_info = hass.data.get(_RENDER_INFO)
+    if render_info is not None:
+        render_info.all_states = True
+
+
 class Template(object):
     """Class to hold a template and manage caching and rendering."""
 
@@ -133,6 +170,26 @@ class Template(object):
         except jinja2.TemplateError as err:
             raise TemplateError(err)
 
+    def async_render_to_info(self, variables=None, **kwargs):
+        """Render given template and record the states it accessed.
+
+        Returns a RenderInfo with the result or the TemplateError of the
+        render.
+
+        This method must be run in the event loop.
+        """
+        render_info = RenderInfo(self)
+        self.hass.data[_RENDER_INFO] = render_info
+
+        try:
+            render_info.result = self.async_render(variables, **kwargs)
+        except TemplateError as ex:
+            render_info.exception = ex
+        finally:
+            del self.hass.data[_RENDER_INFO]
+
+        return render_info
+
     def render_with_possible_json_value(self, value, error_value=_SENTINEL):
         """Render template with value exposed.
 
@@ -180,7 +237,7 @@ class Template(object):
         global_vars = ENV.make_globals({
             'closest': template_methods.closest,
             'distance': template_methods.distance,
-            'is_state': self.hass.states.is_state,
+            'is_state': template_methods.is_state,
             'is_state_attr': template_methods.is_state_attr,
             'state_attr': template_methods.state_attr,
             'states': AllStates(self.hass),
@@ -211,6 +268,7 @@ class AllStates(object):
 
     def __iter__(self):
         """Return all states."""
+        _collect_all_states(self._hass)
         return iter(
             _wrap_state(state) for state in
             sorted(self._hass.states.async_all(),
@@ -218,10 +276,12 @@ class AllStates(object):
 
     def __len__(self):
         """Return number of states."""
+        _collect_all_states(self._hass)
         return len(self._hass.states.async_entity_ids())
 
     def __call__(self, entity_id):
         """Return the states."""
+        _collect_entity(self._hass, entity_id)
         state = self._hass.states.get(entity_id)
         return STATE_UNKNOWN if state is None else state.state
 
@@ -236,11 +296,13 @@ class DomainStates(object):
 
     def __getattr__(self, name):
         """Return the states."""
-        return _wrap_state(
-            self._hass.states.get('{}.{}'.format(self._domain, name)))
+        entity_id = '{}.{}'.format(self._domain, name)
+        _collect_entity(self._hass, entity_id)
+        return _wrap_state(self._hass.states.get(entity_id))
 
     def __iter__(self):
         """Return the iteration over all the states."""
+        _collect_domain(self._hass, self._domain)
         return iter(sorted(
             (_wrap_state(state) for state in self._hass.states.async_all()
              if state.domain == self._domain),
@@ -248,6 +310,7 @@ class DomainStates(object):
 
     def __len__(self):
         """Return number of states."""
+        _collect_domain(self._hass, self._domain)
         return len(self._hass.states.async_entity_ids(self._domain))
 
 
@@ -351,7 +414,8 @@ class TemplateMethods(object):
 
             group = self._hass.components.group
 
-            states = [self._hass.states.get(entity_id) for entity_id
+            _collect_entity(self._hass, gr_entity_id)
+            states = [self._get_state(entity_id) for entity_id
                       in group.expand_entity_ids([gr_entity_id])]
 
         return _wrap_state(loc_helper.closest(latitude, longitude, states))
@@ -404,6 +468,11 @@ class TemplateMethods(object):
         return self._hass.config.units.length(
             loc_util.distance(*locations[0] + locations[1]), 'm')
 
+    def is_state(self, entity_id, state):
+        """Test if a state is a specific value."""
+        state_obj = self._get_state(entity_id)
+        return state_obj is not None and state_obj.state == state
+
     def is_state_attr(self, entity_id, name, value):
         """Test if a state is a specific attribute."""
         state_attr = self.state_attr(entity_id, name)
@@ -411,7 +480,7 @@ class TemplateMethods(object):
 
     def state_attr(self, entity_id, name):
         """Get a specific attribute from a state."""
-        state_obj = self._hass.states.get(entity_id)
+        state_obj = self._get_state(entity_id)
         if state_obj is not None:
             return state_obj.attributes.get(name)
         return None
@@ -421,9 +490,14 @@ class TemplateMethods(object):
         if isinstance(entity_id_or_state, State):
             return entity_id_or_state
         elif isinstance(entity_id_or_state, str):
-            return self._hass.states.get(entity_id_or_state)
+            return self._get_state(entity_id_or_state)
         return None
 
+    def _get_state(self, entity_id):
+        """Return the state of an entity, recording the access."""
+        _collect_entity(self._hass, entity_id)
+        return self._hass.states.get(entity_id)
+
 
 def forgiving_round(value, precision=0):
     """Round accepted strings."""
@@ -2,11 +2,13 @@
 import argparse
 import asyncio
 from contextlib import suppress
-from datetime import datetime
+from datetime import datetime, timedelta
 import logging
+import tempfile
 from timeit import default_timer as timer
+import tracemalloc
 
-from homeassistant import core
+from homeassistant import auth, core
 from homeassistant.const import (
     ATTR_NOW, EVENT_STATE_CHANGED, EVENT_TIME_CHANGED)
 from homeassistant.util import dt as dt_util
@@ -143,6 +145,65 @@ async def async_million_state_changed_helper(hass):
     return timer() - start
 
 
+@benchmark
+# pylint: disable=invalid-name
+async def async_state_changed_helper_10_listeners(hass):
+    """Run state changes with 10 tracked entities."""
+    return await _async_state_changed_helper_listeners(hass, 10)
+
+
+@benchmark
+# pylint: disable=invalid-name
+async def async_state_changed_helper_1000_listeners(hass):
+    """Run state changes with 1000 tracked entities."""
+    return await _async_state_changed_helper_listeners(hass, 1000)
+
+
+async def _async_state_changed_helper_listeners(hass, listener_count):
+    """Run 100k state changes while other entities are tracked.
+
+    With entity indexed dispatch the runtime should not grow with the
+    number of listeners tracking other entities.
+    """
+    count = 0
+    entity_id = 'light.kitchen'
+    event = asyncio.Event(loop=hass.loop)
+
+    @core.callback
+    def listener(*args):
+        """Handle event."""
+        nonlocal count
+        count += 1
+
+        if count == 10**5:
+            event.set()
+
+    @core.callback
+    def other_listener(*args):
+        """Handle events of other entities."""
+        pass
+
+    for idx in range(listener_count):
+        hass.helpers.event.async_track_state_change(
+            'light.other_{}'.format(idx), other_listener)
+
+    hass.helpers.event.async_track_state_change(entity_id, listener)
+    event_data = {
+        'entity_id': entity_id,
+        'old_state': core.State(entity_id, 'off'),
+        'new_state': core.State(entity_id, 'on'),
+    }
+
+    start = timer()
+
+    for _ in range(10**5):
+        hass.bus.async_fire(EVENT_STATE_CHANGED, event_data)
+
+    await event.wait()
+
+    return timer() - start
+
+
 @benchmark
 @asyncio.coroutine
 def logbook_filtering_state(hass):
@@ -191,3 +252,180 @@ def _logbook_filtering(hass, last_changed, last_updated):
     list(logbook.humanify(events))
 
     return timer() - start
+
+
+@benchmark
+@asyncio.coroutine
+def history_million_states(hass):
+    """Decode a million recorded states from their columns."""
+    from homeassistant.components.recorder.util import execute_states
+
+    return _history_million_states(execute_states)
+
+
+@benchmark
+@asyncio.coroutine
+def history_million_states_orm(hass):
+    """Decode a million recorded states through the ORM."""
+    from homeassistant.components.recorder.util import execute
+
+    return _history_million_states(execute)
+
+
+def _history_million_states(execute_query):
+    from sqlalchemy import create_engine
+    from sqlalchemy.orm import sessionmaker
+    from homeassistant.components.recorder import models
+
+    engine = create_engine('sqlite://')
+    models.Base.metadata.create_all(engine)
+
+    entity_count = 100
+    engine.execute(models.StateAttributes.__table__.insert(), [{
+        'attributes_id': index + 1,
+        'shared_attrs': '{"friendly_name": "Sensor %d", '
+                        '"unit_of_measurement": "W"}' % index,
+    } for index in range(entity_count)])
+
+    start_time = dt_util.utcnow()
+    for offset in range(0, 10**6, 10**4):
+        engine.execute(models.States.__table__.insert(), [{
+            'domain': 'sensor',
+            'entity_id': 'sensor.sensor_%d' % (index % entity_count),
+            'state': str(index % 1000),
+            'attributes_id': index % entity_count + 1,
+            'last_changed': start_time + timedelta(seconds=index),
+            'last_updated': start_time + timedelta(seconds=index),
+        } for index in range(offset, offset + 10**4)])
+
+    session = sessionmaker(bind=engine)()
+
+    start = timer()
+
+    states = execute_query(
+        session.query(models.States).order_by(models.States.last_updated))
+    assert len(states) == 10**6
+
+    elapsed = timer() - start
+    session.close()
+    return elapsed
+
+
+@benchmark
+@asyncio.coroutine
+def mqtt_topic_trie(hass):
+    """Match MQTT messages with the subscription trie."""
+    from homeassistant.components import mqtt
+
+    # pylint: disable=protected-access
+    trie = mqtt._SubscriptionTrie()
+    for subscription in _mqtt_subscriptions():
+        trie.add(subscription)
+
+    start = timer()
+
+    for topic in _mqtt_topics():
+        trie.match(topic)
+
+    return timer() - start
+
+
+@benchmark
+@asyncio.coroutine
+def mqtt_topic_match_all(hass):
+    """Match MQTT messages against each subscription."""
+    from homeassistant.components import mqtt
+
+    subscriptions = _mqtt_subscriptions()
+
+    start = timer()
+
+    for topic in _mqtt_topics():
+        # pylint: disable=protected-access
+        [subscription for subscription in subscriptions
+         if mqtt._match_topic(subscription.topic, topic)]
+
+    return timer() - start
+
+
+def _mqtt_subscriptions():
+    """Return the subscriptions of 1500 devices and discovery."""
+    from homeassistant.components import mqtt
+
+    subscriptions = [mqtt.Subscription('homeassistant/#', None)]
+    for index in range(500):
+        subscriptions.append(mqtt.Subscription(
+            'zigbee2mqtt/device_{}'.format(index), None))
+        subscriptions.append(mqtt.Subscription(
+            'tasmota/stat/device_{}/+'.format(index), None))
+        subscriptions.append(mqtt.Subscription(
+            'tasmota/tele/device_{}/#'.format(index), None))
+    return subscriptions
+
+
+def _mqtt_topics():
+    """Return the topics of 100 messages."""
+    return [
+        topic.format(index * 20) for index in range(25) for topic in (
+            'zigbee2mqtt/device_{}', 'tasmota/stat/device_{}/POWER',
+            'tasmota/tele/device_{}/SENSOR',
+            'homeassistant/sensor/device_{}/config')]
+
+
+@benchmark
+@asyncio.coroutine
+def state_machine_10k_entities(hass):
+    """Update 10 thousand entities whose attributes do not change.
+
+    The memory taken by the states is traced in a second pass, tracing
+    would slow down the timed updates.
+    """
+    entity_ids = ['sensor.sensor_{}'.format(index) for index in range(10**4)]
+
+    def set_states(rounds):
+        """Set all entities rounds times."""
+        for value in range(rounds):
+            for index, entity_id in enumerate(entity_ids):
+                hass.states.async_set(entity_id, str(value), {
+                    'friendly_name': 'Sensor {}'.format(index),
+                    'unit_of_measurement': 'W',
+                    'device_class': 'power',
+                })
+
+    start = timer()
+    set_states(10)
+    elapsed = timer() - start
+
+    for entity_id in entity_ids:
+        hass.states.async_remove(entity_id)
+    yield from hass.async_block_till_done()
+
+    tracemalloc.start()
+    set_states(2)
+    current, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    print('Traced memory of the states: {:.1f}MB (peak {:.1f}MB)'.format(
+        current / 2**20, peak / 2**20))
+
+    return elapsed
+
+
+@benchmark
+async def auth_store_save(hass):
+    """Persist an auth store holding 5000 refresh tokens 10 times."""
+    with tempfile.TemporaryDirectory() as config_dir:
+        hass.config.config_dir = config_dir
+        store = auth.AuthStore(hass)
+        user = await store.async_create_user('Benchmark')
+
+        for _ in range(5000):
+            await store.async_create_refresh_token(user, 'http://localhost/')
+
+        start = timer()
+
+        for _ in range(10):
+            await store.async_save()
+            # pylint: disable=protected-access
+            await store._store._async_handle_write_data()
+
+        return timer() - start
@@ -157,12 +157,21 @@ def run(script_args: List) -> int:
             print_progress(total_events, total_events, prefix_format.format(
                 total_events, total_events))
             break
-        query = session.query(models.Events).filter(
-            models.Events.event_type == 'state_changed').order_by(
-                models.Events.time_fired).slice(step_start, step_stop)
+        query = session.query(models.Events, models.States).outerjoin(
+            models.States,
+            models.Events.event_id == models.States.event_id).filter(
+                models.Events.event_type == 'state_changed').order_by(
+                    models.Events.time_fired).slice(step_start, step_stop)
 
-        for event in query:
+        for event, db_state in query:
             event_data = json.loads(event.event_data)
+            new_state = event_data.get('new_state')
+
+            # The attributes are stored with the state of the event
+            if new_state and 'attributes' not in new_state and \
+                    db_state is not None:
+                new_state['attributes'] = json.loads(db_state.shared_attrs)
+                session.expunge(db_state)
 
             if not ('entity_id' in event_data) or (
                     excl_entities and event_data[
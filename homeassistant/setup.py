@@ -19,6 +19,7 @@ ATTR_COMPONENT = 'component'
 
 DATA_SETUP = 'setup_tasks'
 DATA_DEPS_REQS = 'deps_reqs_processed'
+DATA_SETUP_TIMINGS = 'setup_timings'
 
 SLOW_SETUP_WARNING = 10
 
@@ -56,6 +57,16 @@ async def async_setup_component(hass: core.HomeAssistant, domain: str,
     return await task
 
 
+@core.callback
+def async_get_setup_timings(hass: core.HomeAssistant) -> Dict[str, float]:
+    """Return the seconds the setup of each component took.
+
+    The time spent setting up dependencies and installing requirements is
+    not included.
+    """
+    return dict(hass.data.get(DATA_SETUP_TIMINGS, {}))
+
+
 async def _async_process_dependencies(hass, config, name, dependencies):
     """Ensure all dependencies are set up."""
     blacklisted = [dep for dep in dependencies
@@ -152,6 +163,7 @@ async def _async_setup_component(hass: core.HomeAssistant,
         end = timer()
         if warn_task:
             warn_task.cancel()
+        hass.data.setdefault(DATA_SETUP_TIMINGS, {})[domain] = end - start
     _LOGGER.info("Setup of domain %s took %.1f seconds.", domain, end - start)
 
     if result is False:
@@ -0,0 +1,101 @@
+"""Thread pool executor that reports how long jobs wait for a thread."""
+from concurrent.futures import ThreadPoolExecutor
+import logging
+import sys
+import threading
+from time import monotonic
+
+_LOGGER = logging.getLogger(__name__)
+
+# Time a job waits for a thread before the executor is reported starved
+QUEUE_WAIT_WARNING = 10  # seconds
+# Minimum time between two starvation warnings of an executor
+QUEUE_WAIT_WARNING_INTERVAL = 60  # seconds
+
+
+class InstrumentedExecutor(ThreadPoolExecutor):
+    """Thread pool executor that measures the queue wait of its jobs."""
+
+    def __init__(self, name, max_workers=None):
+        """Initialize the executor, threads are named after it."""
+        executor_opts = {}
+        if sys.version_info[:2] >= (3, 6):
+            executor_opts['thread_name_prefix'] = name
+
+        super().__init__(max_workers, **executor_opts)
+        self.name = name
+        self._stats_lock = threading.Lock()
+        self._queued = 0
+        self._running = 0
+        self._jobs = 0
+        self._queue_wait = 0.0
+        self._max_queue_wait = 0.0
+        self._last_warning = None
+
+    @property
+    def max_workers(self):
+        """Return the maximum number of threads."""
+        return self._max_workers
+
+    @max_workers.setter
+    def max_workers(self, max_workers):
+        """Set the maximum number of threads.
+
+        Running threads are kept when lowering the maximum.
+        """
+        self._max_workers = max_workers
+
+    @property
+    def stats(self):
+        """Return statistics about the jobs of the executor."""
+        with self._stats_lock:
+            return {
+                'max_workers': self._max_workers,
+                'queued': self._queued,
+                'running': self._running,
+                'jobs': self._jobs,
+                'queue_wait': self._queue_wait,
+                'max_queue_wait': self._max_queue_wait,
+            }
+
+    def submit(self, fn, *args, **kwargs):
+        """Submit a job, measuring the time until a thread runs it."""
+        with self._stats_lock:
+            self._queued += 1
+
+        try:
+            return super().submit(self._run, monotonic(), fn, args, kwargs)
+        except RuntimeError:
+            # Executor is shut down
+            with self._stats_lock:
+                self._queued -= 1
+            raise
+
+    def _run(self, queued_at, fn, args, kwargs):
+        """Run a job in a thread of the executor."""
+        now = monotonic()
+        wait = now - queued_at
+
+        with self._stats_lock:
+            self._queued -= 1
+            self._running += 1
+            self._jobs += 1
+            self._queue_wait += wait
+            self._max_queue_wait = max(self._max_queue_wait, wait)
+
+            warn = wait > QUEUE_WAIT_WARNING and (
+                self._last_warning is None or
+                now - self._last_warning > QUEUE_WAIT_WARNING_INTERVAL)
+            if warn:
+                self._last_warning = now
+
+        if warn:
+            _LOGGER.warning(
+                "Job waited %.1f seconds for a thread of executor %s, "
+                "%d jobs are queued", wait, self.name, self._queued)
+
+        try:
+            return fn(*args, **kwargs)
+        finally:
+            with self._stats_lock:
+                self._running -= 1
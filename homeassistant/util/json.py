@@ -1,6 +1,8 @@
 """JSON utility functions."""
 import logging
-from typing import Union, List, Dict
+import os
+import tempfile
+from typing import Union, List, Dict, Optional, Type
 
 import json
 
@@ -40,20 +42,48 @@ def load_json(filename: str, default: Union[List, Dict] = _UNDEFINED) \
     return {} if default is _UNDEFINED else default
 
 
-def save_json(filename: str, data: Union[List, Dict]):
+def save_json(filename: str, data: Union[List, Dict], private: bool = False,
+              *, compact: bool = False, encoder: Optional[Type] = None):
     """Save JSON data to a file.
 
+    The data is written to a temporary file that replaces the file once it
+    is on disk, so a crash never leaves a truncated file behind. Private
+    files can only be read by their owner. Compact files are written
+    without indentation and sorting of keys. The encoder is the
+    json.JSONEncoder subclass used to serialize the data.
+
     Returns True on success.
     """
     try:
-        data = json.dumps(data, sort_keys=True, indent=4)
-        with open(filename, 'w', encoding='utf-8') as fdesc:
-            fdesc.write(data)
+        if compact:
+            data = json.dumps(data, separators=(',', ':'), cls=encoder)
+        else:
+            data = json.dumps(data, sort_keys=True, indent=4, cls=encoder)
     except TypeError as error:
         _LOGGER.exception('Failed to serialize to JSON: %s',
                           filename)
         raise SerializationError(error)
+
+    tmp_filename = None
+    try:
+        fdesc, tmp_filename = tempfile.mkstemp(
+            dir=os.path.dirname(os.path.abspath(filename)),
+            prefix='{}.'.format(os.path.basename(filename)), suffix='.tmp')
+        with open(fdesc, 'w', encoding='utf-8') as fdesc:
+            fdesc.write(data)
+            fdesc.flush()
+            os.fsync(fdesc.fileno())
+        if not private:
+            os.chmod(tmp_filename, 0o644)
+        os.replace(tmp_filename, filename)
+        tmp_filename = None
     except OSError as error:
         _LOGGER.exception('Saving JSON file failed: %s',
                           filename)
         raise WriteError(error)
+    finally:
+        if tmp_filename is not None:
+            try:
+                os.remove(tmp_filename)
+            except OSError:
+                pass
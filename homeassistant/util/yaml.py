@@ -2,6 +2,7 @@
 import logging
 import os
 import sys
+import threading
 import fnmatch
 from collections import OrderedDict
 from typing import Union, List, Dict
@@ -61,13 +62,97 @@ class SafeLineLoader(yaml.SafeLoader):
         return node
 
 
+if yaml.__with_libyaml__:
+    # pylint: disable=no-member
+    _ComposeLoader = yaml.CSafeLoader
+else:
+    _ComposeLoader = SafeLineLoader
+
+
+def _compose(fname: str) -> yaml.nodes.Node:
+    """Parse a YAML file into a node tree."""
+    with open(fname, encoding='utf-8') as conf_file:
+        loader = _ComposeLoader(conf_file)
+        try:
+            return loader.get_single_node()
+        finally:
+            loader.dispose()
+
+
+class ParseCache(object):
+    """Node trees of parsed YAML files, keyed by path, mtime and size.
+
+    Only parsing is cached, tags like !include, !secret and !env_var are
+    constructed again on every load so they pick up changed files,
+    secrets and environment variables. The cache is only kept in memory
+    and secret files are never cached.
+    """
+
+    def __init__(self):
+        """Initialize an empty cache."""
+        self.files = {}  # type: Dict
+        self._lock = threading.Lock()
+
+    def get_node(self, fname: str) -> yaml.nodes.Node:
+        """Return the node tree of a file, parsing it if it changed."""
+        if os.path.basename(fname) == SECRET_YAML:
+            return _compose(fname)
+
+        try:
+            stat = os.stat(fname)
+        except OSError:
+            # Not cached, opening the file reports the error
+            return _compose(fname)
+
+        key = (stat.st_mtime_ns, stat.st_size)
+
+        with self._lock:
+            cached = self.files.get(fname)
+        if cached is not None and cached[0] == key:
+            return cached[1]
+
+        node = _compose(fname)
+
+        with self._lock:
+            self.files[fname] = (key, node)
+        return node
+
+    def clear(self) -> None:
+        """Forget all parsed files."""
+        with self._lock:
+            self.files.clear()
+
+
+_PARSE_CACHE = ParseCache()
+
+
+def clear_parse_cache() -> None:
+    """Clear the parse cache.
+
+    Async friendly.
+    """
+    _PARSE_CACHE.clear()
+
+
 def load_yaml(fname: str) -> Union[List, Dict]:
-    """Load a YAML file."""
+    """Load a YAML file.
+
+    Files that did not change since they were last loaded are not parsed
+    again, their cached node tree is constructed instead.
+    """
     try:
-        with open(fname, encoding='utf-8') as conf_file:
+        node = _PARSE_CACHE.get_node(fname)
+        if node is None:
             # If configuration file is empty YAML returns None
             # We convert that to an empty dict
-            return yaml.load(conf_file, Loader=SafeLineLoader) or OrderedDict()
+            return OrderedDict()
+
+        loader = SafeLineLoader('')
+        loader.name = fname
+        try:
+            return loader.construct_document(node) or OrderedDict()
+        finally:
+            loader.dispose()
     except yaml.YAMLError as exc:
         _LOGGER.error(exc)
         raise HomeAssistantError(exc)
@@ -186,14 +271,14 @@ def _ordered_dict(loader: SafeLineLoader,
         try:
             hash(key)
         except TypeError:
-            fname = getattr(loader.stream, 'name', '')
+            fname = loader.name
             raise yaml.MarkedYAMLError(
                 context="invalid key: \"{}\"".format(key),
                 context_mark=yaml.Mark(fname, 0, line, -1, None, None)
             )
 
         if key in seen:
-            fname = getattr(loader.stream, 'name', '')
+            fname = loader.name
             _LOGGER.error(
                 'YAML file %s contains duplicate key "%s". '
                 'Check lines %d and %d.', fname, key, seen[key], line)
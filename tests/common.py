@@ -609,11 +609,16 @@ def init_recorder_component(hass, add_config=None):
     """Initialize the recorder."""
     config = dict(add_config) if add_config else {}
     config[recorder.CONF_DB_URL] = 'sqlite://'  # In memory DB
+    # Commit events as soon as the queue is empty
+    config.setdefault(recorder.CONF_COMMIT_INTERVAL, 0)
 
     with patch('homeassistant.components.recorder.migration.migrate_schema'):
         assert setup_component(hass, recorder.DOMAIN,
                                {recorder.DOMAIN: config})
         assert recorder.DOMAIN in hass.config.components
+    # Do not leave the last states behind in the test config dir
+    hass.data[recorder.DATA_INSTANCE].last_states_store._write_data = \
+        lambda *args: None
     _LOGGER.info("In-memory recorder successfully started")
 
 
@@ -741,7 +746,8 @@ def mock_storage(data=None):
         """Mock version of write data."""
         # To ensure that the data can be serialized
         _LOGGER.info('Writing data to %s: %s', store.key, data_to_write)
-        data[store.key] = json.loads(json.dumps(data_to_write))
+        data[store.key] = json.loads(json.dumps(data_to_write,
+                                                cls=store.encoder))
 
     with patch('homeassistant.helpers.storage.Store._async_load',
                side_effect=mock_async_load, autospec=True), \
@@ -122,6 +122,27 @@ class TestComponentsGroup(unittest.TestCase):
         # Try on non existing state
         self.assertFalse(group.is_on(self.hass, 'non.existing'))
 
+    def test_group_state_tracks_members(self):
+        """Test the group state follows the members that are on."""
+        for index in range(3):
+            self.hass.states.set('light.l{}'.format(index), STATE_OFF)
+        test_group = group.Group.create_group(
+            self.hass, 'lights', ['light.l0', 'light.l1', 'light.l2'], False)
+        self.assertFalse(group.is_on(self.hass, test_group.entity_id))
+
+        self.hass.states.set('light.l0', STATE_ON)
+        self.hass.states.set('light.l1', STATE_ON)
+        self.hass.block_till_done()
+        self.assertTrue(group.is_on(self.hass, test_group.entity_id))
+
+        self.hass.states.set('light.l0', STATE_OFF)
+        self.hass.block_till_done()
+        self.assertTrue(group.is_on(self.hass, test_group.entity_id))
+
+        self.hass.states.remove('light.l1')
+        self.hass.block_till_done()
+        self.assertFalse(group.is_on(self.hass, test_group.entity_id))
+
     def test_expand_entity_ids(self):
         """Test expand_entity_ids method."""
         self.hass.states.set('light.Bowl', STATE_ON)
@@ -164,6 +185,25 @@ class TestComponentsGroup(unittest.TestCase):
                          sorted(group.expand_entity_ids(
                              self.hass, [test_group.entity_id])))
 
+    def test_expand_entity_ids_nested_groups(self):
+        """Test expanding nested groups that contain each other."""
+        self.hass.states.set('group.outer', STATE_ON, {
+            'entity_id': ['light.Bowl', 'group.inner']})
+        self.hass.states.set('group.inner', STATE_ON, {
+            'entity_id': ['light.Ceiling', 'light.bowl', 'group.outer']})
+
+        self.assertEqual(
+            ['light.bowl', 'light.ceiling'],
+            group.expand_entity_ids(self.hass, ['group.outer']))
+
+        # Changing a nested group updates the expanded members
+        self.hass.states.set('group.inner', STATE_ON, {
+            'entity_id': ['light.Kitchen']})
+
+        self.assertEqual(
+            ['light.bowl', 'light.kitchen'],
+            group.expand_entity_ids(self.hass, ['group.outer']))
+
     def test_expand_entity_ids_ignores_non_strings(self):
         """Test that non string elements in lists are ignored."""
         self.assertEqual([], group.expand_entity_ids(self.hass, [5, True]))
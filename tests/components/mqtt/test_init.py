@@ -230,6 +230,31 @@ class TestMQTTCallbacks(unittest.TestCase):
         self.hass.block_till_done()
         self.assertEqual(1, len(self.calls))
 
+    def test_messages_handled_in_batches(self):
+        """Test messages received together are handled in one batch."""
+        mqtt.subscribe(self.hass, 'test-topic', self.record_calls)
+        mqtt.subscribe(self.hass, 'test-topic', self.record_calls)
+        self.hass.block_till_done()
+
+        mqtt_instance = self.hass.data['mqtt']
+        with mock.patch.object(self.hass, 'add_job') as mock_add_job:
+            for index in range(3):
+                mqtt_instance._mqtt_on_message(None, None, mqtt.Message(
+                    'test-topic', 'payload {}'.format(index).encode()))
+
+        self.assertEqual(1, mock_add_job.call_count)
+        self.assertEqual(3, mqtt_instance.stats['pending_messages'])
+
+        self.hass.add_job(*mock_add_job.call_args[0])
+        self.hass.block_till_done()
+
+        self.assertEqual(
+            ['payload 0', 'payload 0', 'payload 1', 'payload 1',
+             'payload 2', 'payload 2'],
+            [call[1] for call in self.calls])
+        self.assertEqual(0, mqtt_instance.stats['pending_messages'])
+        self.assertEqual(3, mqtt_instance.stats['max_pending_messages'])
+
     def test_subscribe_topic(self):
         """Test the subscription of a topic."""
         unsub = mqtt.subscribe(self.hass, 'test-topic', self.record_calls)
@@ -662,3 +687,34 @@ def test_mqtt_subscribes_topics_on_connect(hass):
     }
     calls = {call[1][1]: call[1][2] for call in hass.add_job.mock_calls}
     assert calls == expected
+
+
+def test_subscription_trie():
+    """Test matching topics against the subscription trie."""
+    # pylint: disable=protected-access
+    trie = mqtt._SubscriptionTrie()
+    subscriptions = [
+        mqtt.Subscription(topic, None) for topic in (
+            'test-topic', 'test-topic/+/on', 'test-topic/#', '+/+', '#',
+            'test-topic/bier/on')]
+    for subscription in subscriptions:
+        trie.add(subscription)
+
+    def matching(topic):
+        """Return the matching filters."""
+        return sorted(sub.topic for sub in trie.match(topic))
+
+    assert matching('test-topic') == ['#', 'test-topic', 'test-topic/#']
+    assert matching('test-topic/bier') == ['#', '+/+', 'test-topic/#']
+    assert matching('test-topic/bier/on') == [
+        '#', 'test-topic/#', 'test-topic/+/on', 'test-topic/bier/on']
+    assert matching('other/topic') == ['#', '+/+']
+
+    for subscription in subscriptions[:-1]:
+        trie.remove(subscription)
+
+    assert matching('test-topic/bier/on') == ['test-topic/bier/on']
+    assert matching('test-topic') == []
+
+    trie.remove(subscriptions[-1])
+    assert not trie
@@ -0,0 +1,107 @@
+"""The tests for the recorder recent states cache."""
+from datetime import datetime, timedelta
+import json
+from unittest.mock import patch
+
+import homeassistant.util.dt as dt_util
+from homeassistant.components.recorder.cache import RecentStates
+
+START = datetime(2018, 1, 1, 10, 0, tzinfo=dt_util.UTC)
+
+
+def _recorded(entity_id, state, minutes, attributes=None, changed=None):
+    """Return a recorded state tuple."""
+    last_updated = START + timedelta(minutes=minutes)
+    last_changed = START + timedelta(minutes=changed) \
+        if changed is not None else last_updated
+    return (entity_id, state, json.dumps(attributes or {}), last_changed,
+            last_updated)
+
+
+def _add_all(cache, recorded, now=START + timedelta(hours=1)):
+    """Add recorded states to the cache at a given time."""
+    with patch('homeassistant.util.dt.utcnow', return_value=now):
+        cache.add_all(recorded)
+
+
+def test_get_changes():
+    """Test fetching the state changes of a period."""
+    cache = RecentStates(100, 86400)
+    assert cache.get_changes(START) is None
+
+    cache.evict_until(START.timestamp())
+    _add_all(cache, [
+        _recorded('light.kitchen', 'on', 1, {'brightness': 100}),
+        _recorded('climate.hall', 'heat', 2),
+        _recorded('light.kitchen', 'on', 3, {'brightness': 200}, changed=1),
+        _recorded('climate.hall', 'heat', 4, {'temperature': 20}, changed=2),
+        _recorded('light.kitchen', 'off', 5),
+    ])
+
+    assert cache.get_changes(START - timedelta(minutes=1)) is None
+
+    changes = cache.get_changes(
+        START, START + timedelta(minutes=5), all_updates_domains=('climate',))
+    assert [state.state for state in changes['light.kitchen']] == ['on']
+    assert changes['light.kitchen'][0].attributes == {'brightness': 100}
+    assert changes['light.kitchen'][0].last_updated == \
+        START + timedelta(minutes=1)
+    assert [state.attributes for state in changes['climate.hall']] == \
+        [{}, {'temperature': 20}]
+
+    changes = cache.get_changes(
+        START + timedelta(minutes=1),
+        entity_filter=lambda entity_id: entity_id != 'climate.hall')
+    assert list(changes) == ['light.kitchen']
+    assert [state.state for state in changes['light.kitchen']] == ['off']
+
+
+def test_get_states():
+    """Test fetching the last state of each entity before a point."""
+    cache = RecentStates(100, 86400)
+    cache.evict_until(START.timestamp())
+    _add_all(cache, [
+        _recorded('light.kitchen', 'on', 1),
+        _recorded('switch.tv', 'on', 2),
+        _recorded('light.kitchen', 'off', 3),
+    ])
+
+    states = cache.get_states(
+        START + timedelta(minutes=3), START + timedelta(minutes=1))
+    assert [(state.entity_id, state.state) for state in states] == \
+        [('light.kitchen', 'on'), ('switch.tv', 'on')]
+
+    states = cache.get_states(
+        START + timedelta(minutes=4), START + timedelta(minutes=2))
+    assert [(state.entity_id, state.state) for state in states] == \
+        [('light.kitchen', 'off'), ('switch.tv', 'on')]
+
+    # States before the cached period can't be answered
+    assert cache.get_states(START + timedelta(minutes=4), START) is None
+
+
+def test_evict_oldest_states():
+    """Test the oldest states are evicted when the cache is full."""
+    cache = RecentStates(10, 86400)
+    cache.evict_until(START.timestamp())
+    _add_all(cache, [_recorded('sensor.power', str(minutes), minutes)
+                     for minutes in range(1, 12)])
+
+    assert len(cache) == 9
+    assert cache.get_changes(START + timedelta(minutes=1)) is None
+    changes = cache.get_changes(START + timedelta(minutes=2))
+    assert [state.state for state in changes['sensor.power']] == \
+        [str(minutes) for minutes in range(3, 12)]
+
+
+def test_evict_states_out_of_window():
+    """Test states older than max_age are evicted."""
+    cache = RecentStates(100, 600)
+    cache.evict_until(START.timestamp())
+    _add_all(cache, [_recorded('sensor.power', str(minutes), minutes)
+                     for minutes in range(1, 30)],
+             now=START + timedelta(minutes=30))
+
+    assert len(cache) == 9
+    assert cache.get_changes(START + timedelta(minutes=20)) is not None
+    assert cache.get_changes(START + timedelta(minutes=19)) is None
@@ -5,12 +5,16 @@ from unittest.mock import patch
 
 import pytest
 
-from homeassistant.core import callback
-from homeassistant.const import MATCH_ALL
+from homeassistant.core import CoreState, State, callback
+import homeassistant.util.dt as dt_util
+from homeassistant.const import (
+    EVENT_HOMEASSISTANT_START, EVENT_HOMEASSISTANT_STOP, MATCH_ALL)
 from homeassistant.components.recorder import Recorder
+from homeassistant.components.recorder.cache import RecentStates
 from homeassistant.components.recorder.const import DATA_INSTANCE
 from homeassistant.components.recorder.util import session_scope
-from homeassistant.components.recorder.models import States, Events
+from homeassistant.components.recorder.models import (
+    States, Events, StateAttributes)
 
 from tests.common import get_test_home_assistant, init_recorder_component
 
@@ -202,3 +206,147 @@ def test_recorder_setup_failure():
         rec.join()
 
     hass.stop()
+
+
+def test_saving_events_in_batches(hass_recorder):
+    """Test events are committed in batches of at most commit_max_events."""
+    hass = hass_recorder({'commit_max_events': 3})
+    instance = hass.data[DATA_INSTANCE]
+    stats = instance.stats
+
+    for event_type in ('test1', 'test2', 'test3', 'test4', 'test5', 'test6'):
+        hass.bus.fire(event_type)
+    hass.block_till_done()
+    instance.block_till_done()
+
+    with session_scope(hass=hass) as session:
+        assert session.query(Events).filter(
+            Events.event_type.like('test%')).count() == 6
+
+    new_stats = instance.stats
+    assert new_stats['committed_events'] >= stats['committed_events'] + 6
+    assert new_stats['commits'] >= stats['commits'] + 2
+    assert new_stats['last_commit_events'] <= 3
+    assert new_stats['queue_depth'] == 0
+    assert new_stats['last_commit_duration'] is not None
+
+
+def test_saving_states_shares_attributes(hass_recorder):
+    """Test states with identical attributes share one attributes row."""
+    hass = hass_recorder()
+    attributes = {'test_attr': 5, 'test_attr_10': 'nice'}
+
+    for state in ('one', 'two', 'three'):
+        hass.states.set('test.recorder', state, attributes)
+        hass.block_till_done()
+    hass.states.set('test.recorder', 'four', {'test_attr': 6})
+    hass.block_till_done()
+    hass.data[DATA_INSTANCE].block_till_done()
+
+    with session_scope(hass=hass) as session:
+        db_states = list(session.query(States).order_by(States.state_id))
+        assert len(db_states) == 4
+        assert session.query(StateAttributes).count() == 2
+        assert len(set(db_state.attributes_id
+                       for db_state in db_states)) == 2
+        assert db_states[0].attributes is None
+        states = [db_state.to_native() for db_state in db_states]
+
+    assert [state.state for state in states] == \
+        ['one', 'two', 'three', 'four']
+    assert states[2].attributes == attributes
+    assert states[3] == hass.states.get('test.recorder')
+
+
+def test_recent_states_cache(hass_recorder):
+    """Test recorded states are cached and loaded on startup."""
+    hass = hass_recorder()
+    instance = hass.data[DATA_INSTANCE]
+    start = dt_util.utcnow()
+
+    hass.states.set('test.recorder', 'on', {'test_attr': 5})
+    hass.states.set('test.recorder', 'on', {'test_attr': 6})
+    hass.block_till_done()
+    instance.block_till_done()
+    state = hass.states.get('test.recorder')
+
+    changes = instance.recent_states.get_changes(
+        start, all_updates_domains=('test',))
+    assert [cached.attributes for cached in changes['test.recorder']] == \
+        [{'test_attr': 5}, {'test_attr': 6}]
+    assert changes['test.recorder'][-1].last_updated == state.last_updated
+
+    # Only states after the oldest loaded state are complete
+    instance.recent_states = RecentStates(2, 3600)
+    instance._load_recent_states()
+    assert instance.recent_states.get_changes(start) is None
+    changes = instance.recent_states.get_changes(
+        state.last_changed, all_updates_domains=('test',))
+    assert changes['test.recorder'] == [state]
+
+
+def test_recent_states_load_failure(hass_recorder):
+    """Test the recorder starts when loading the recent states fails."""
+    from sqlalchemy.exc import SQLAlchemyError
+
+    with patch('homeassistant.components.recorder.models.'
+               'state_columns_query', side_effect=SQLAlchemyError):
+        hass = hass_recorder()
+    instance = hass.data[DATA_INSTANCE]
+
+    assert instance.async_db_ready.result()
+    assert instance.recent_states.since is None
+
+    hass.states.set('test.recorder', 'on')
+    hass.block_till_done()
+    instance.block_till_done()
+
+    with session_scope(hass=hass) as session:
+        assert session.query(States).count() == 1
+
+
+async def test_loading_last_states(hass, hass_storage):
+    """Test the stored last states are only used once."""
+    hass_storage['recorder.last_states'] = {
+        'version': 1,
+        'key': 'recorder.last_states',
+        'data': {'states': [{'entity_id': 'test.recorder', 'state': 'on'}]},
+    }
+    rec = Recorder(hass, keep_days=7, purge_interval=2, uri='sqlite://',
+                   include={}, exclude={})
+
+    await rec.async_load_last_states()
+
+    assert rec.last_states == [{'entity_id': 'test.recorder', 'state': 'on'}]
+    # Not used again if Home Assistant does not stop cleanly
+    assert hass_storage['recorder.last_states']['data'] == {'states': None}
+
+    rec = Recorder(hass, keep_days=7, purge_interval=2, uri='sqlite://',
+                   include={}, exclude={})
+    await rec.async_load_last_states()
+    assert rec.last_states is None
+
+
+async def test_storing_last_states(hass, hass_storage):
+    """Test the last states of recorded entities are stored on stop."""
+    hass.state = CoreState.starting
+    rec = Recorder(hass, keep_days=7, purge_interval=2, uri='sqlite://',
+                   include={}, exclude={'domains': ['hidden']})
+    rec.last_states = []
+    rec.async_initialize()
+
+    hass.states.async_set('test.recorder', 'on', {'test_attr': 5})
+    hass.states.async_set('hidden.recorder', 'on')
+    hass.bus.async_fire(EVENT_HOMEASSISTANT_START)
+    await hass.async_block_till_done()
+
+    assert rec.last_states is None
+    assert 'recorder.last_states' not in hass_storage
+
+    hass.bus.async_fire(EVENT_HOMEASSISTANT_STOP)
+    await hass.async_block_till_done()
+
+    state = hass.states.get('test.recorder')
+    stored = hass_storage['recorder.last_states']['data']['states']
+    assert [State.from_dict(json_state) for json_state in stored] == [state]
+    assert stored[0]['last_updated'] == state.last_updated.isoformat()
@@ -47,6 +47,26 @@ class TestEvents(unittest.TestCase):
         })
         assert event == Events.from_event(event).to_native()
 
+    def test_from_event_state_changed(self):
+        """Test the states of a state_changed event without attributes."""
+        old_state = ha.State('light.kitchen', 'off', {'brightness': 10})
+        new_state = ha.State('light.kitchen', 'on', {'brightness': 20})
+        event = ha.Event(EVENT_STATE_CHANGED, {
+            'entity_id': 'light.kitchen',
+            'old_state': old_state,
+            'new_state': new_state,
+        })
+
+        data = Events.from_event(event).to_native().data
+        assert data['entity_id'] == 'light.kitchen'
+        for key, state in (('old_state', old_state),
+                           ('new_state', new_state)):
+            assert 'attributes' not in data[key]
+            assert ha.State.from_dict(data[key]) == \
+                ha.State('light.kitchen', state.state)
+            assert data[key]['last_updated'] == \
+                state.last_updated.isoformat()
+
 
 class TestStates(unittest.TestCase):
     """Test States model."""
@@ -147,6 +147,26 @@ class TestRecorderPurge(unittest.TestCase):
             # no state to protect, now we should only have 2 events left
             self.assertEqual(events.count(), 2)
 
+    def test_purge_in_chunks(self):
+        """Test purging a few rows per transaction."""
+        self._add_test_events()
+        self._add_test_states()
+        progress = {}
+
+        # 4 old states, 4 old events, then the empty tables
+        results = [
+            purge_old_data(self.hass.data[DATA_INSTANCE], 4, repack=False,
+                           progress=progress, batch_size=2)
+            for _ in range(5)]
+        self.assertEqual(results, [False, False, False, False, True])
+        self.assertEqual(progress['states'], 4)
+        self.assertEqual(progress['events'], 4)
+
+        with session_scope(hass=self.hass) as session:
+            self.assertEqual(session.query(States).count(), 3)
+            self.assertEqual(session.query(Events).filter(
+                Events.event_type.like("EVENT_TEST%")).count(), 3)
+
     def test_purge_method(self):
         """Test purge method."""
         service_data = {'keep_days': 4}
@@ -207,5 +227,5 @@ class TestRecorderPurge(unittest.TestCase):
                                         service_data=service_data)
                 self.hass.block_till_done()
                 self.hass.data[DATA_INSTANCE].block_till_done()
-                self.assertEqual(mock_logger.debug.mock_calls[4][1][0],
-                                 "Vacuuming SQLite to free space")
+                self.assertIn("Vacuuming SQLite to free space", [
+                    call[1][0] for call in mock_logger.debug.mock_calls])
@@ -0,0 +1,108 @@
+"""The tests for the recorder statistics."""
+from datetime import datetime, timedelta
+
+import pytest
+
+import homeassistant.util.dt as dt_util
+from homeassistant.core import State
+from homeassistant.components.recorder import statistics
+from homeassistant.components.recorder.const import DATA_INSTANCE
+from homeassistant.components.recorder.models import Statistics
+from homeassistant.components.recorder.util import session_scope
+
+from tests.common import get_test_home_assistant, init_recorder_component
+
+START = datetime(2018, 1, 1, 10, 0, tzinfo=dt_util.UTC)
+
+
+@pytest.fixture
+def hass_recorder():
+    """HASS fixture with in-memory recorder."""
+    hass = get_test_home_assistant()
+
+    def setup_recorder(config=None):
+        """Setup with params."""
+        init_recorder_component(hass, config)
+        hass.start()
+        hass.block_till_done()
+        hass.data[DATA_INSTANCE].block_till_done()
+        return hass
+
+    yield setup_recorder
+    hass.stop()
+
+
+def _state(value, minutes):
+    """Return a state of the test sensor."""
+    moment = START + timedelta(minutes=minutes)
+    return State('sensor.power', value, last_changed=moment,
+                 last_updated=moment)
+
+
+def test_period_start():
+    """Test the start of the period containing a moment."""
+    moment = START + timedelta(minutes=67, seconds=5)
+    assert statistics.period_start(moment, 3600) == \
+        START + timedelta(hours=1)
+    assert statistics.period_start(moment, 300) == \
+        START + timedelta(minutes=65)
+
+
+def test_collector_completes_buckets():
+    """Test buckets are returned once the next period starts."""
+    collector = statistics.StatisticsCollector([300, 3600])
+
+    assert collector.add_state(_state('1', 0)) == []
+    assert collector.add_state(_state('unavailable', 1)) == []
+    assert collector.add_state(_state('nan', 2)) == []
+    assert collector.add_state(_state('3', 4)) == []
+
+    completed = collector.add_state(_state('8', 6))
+    assert len(completed) == 1
+    bucket = completed[0]
+    assert bucket.period == 300
+    assert bucket.start == START
+    assert (bucket.min, bucket.max, bucket.mean, bucket.last,
+            bucket.count, bucket.duration) == (1, 3, 1.4, 3, 2, 300)
+
+    buckets = {bucket.period: bucket
+               for bucket in collector.flush(START + timedelta(minutes=8))}
+    # The 3 held from the start of the second 5 minute bucket
+    assert (buckets[300].min, buckets[300].max, buckets[300].count,
+            buckets[300].duration) == (3, 8, 1, 180)
+    assert buckets[300].mean == pytest.approx(19 / 3)
+    assert buckets[3600].count == 3
+    assert buckets[3600].duration == 480
+    assert buckets[3600].mean == 3.25
+    assert collector.flush() == []
+
+
+def test_collector_flush_holds_until_period_end():
+    """Test flushing holds the last value at most until the period end."""
+    collector = statistics.StatisticsCollector([300])
+    collector.add_state(_state('2', 3))
+
+    bucket, = collector.flush(START + timedelta(hours=1))
+    assert (bucket.mean, bucket.duration) == (2, 120)
+
+
+def test_write_statistics_merges_periods(hass_recorder):
+    """Test a period written twice is merged into one row."""
+    hass = hass_recorder()
+
+    for values, stop in (((('2', 10), ('4', 20)), 30), ((('9', 40),), 50)):
+        collector = statistics.StatisticsCollector([3600])
+        for value, minutes in values:
+            collector.add_state(_state(value, minutes))
+        with session_scope(hass=hass) as session:
+            statistics.write_statistics(
+                session, collector.flush(START + timedelta(minutes=stop)))
+
+    with session_scope(hass=hass) as session:
+        rows = [row.to_native() for row in session.query(Statistics)]
+
+    assert len(rows) == 1
+    assert rows[0]['start'] == START
+    assert (rows[0]['min'], rows[0]['max'], rows[0]['mean'],
+            rows[0]['last'], rows[0]['count'],
+            rows[0]['duration']) == (2, 9, 5, 9, 3, 1800)
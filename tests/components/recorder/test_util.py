@@ -57,3 +57,27 @@ def test_recorder_bad_execute(hass_recorder):
         util.execute((mck1,))
 
     assert e_mock.call_count == 2
+
+
+def test_execute_states(hass_recorder):
+    """Test states decoded from columns equal the ORM conversion."""
+    from homeassistant.components.recorder.models import States
+    hass = hass_recorder()
+
+    hass.states.set('light.kitchen', 'on', {'brightness': 100})
+    hass.states.set('light.kitchen', 'on', {'brightness': 200})
+    hass.states.set('light.hall', 'off', {'brightness': 100})
+    hass.states.set('light.kitchen', 'off', {'brightness': 200})
+    hass.block_till_done()
+    hass.data[DATA_INSTANCE].block_till_done()
+
+    with util.session_scope(hass=hass) as session:
+        query = session.query(States).order_by(States.last_updated)
+        states = util.execute_states(query)
+        assert states == util.execute(query)
+        assert list(util.stream_states(query, 2)) == states
+
+    assert len(states) == 4
+    # Equal attributes are decoded once
+    assert states[0].attributes is states[2].attributes
+    assert states[1].attributes is states[3].attributes
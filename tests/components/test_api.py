@@ -245,6 +245,14 @@ def test_api_get_components(hass, mock_api_client):
     assert set(result) == hass.config.components
 
 
+async def test_api_get_setup_timings(hass, mock_api_client):
+    """Test the return of the setup timings of components."""
+    resp = await mock_api_client.get(const.URL_API_SETUP_TIMINGS)
+    result = await resp.json()
+    assert set(result) == hass.config.components
+    assert all(seconds >= 0 for seconds in result.values())
+
+
 @asyncio.coroutine
 def test_api_get_event_listeners(hass, mock_api_client):
     """Test if we can get the list of events being listened for."""
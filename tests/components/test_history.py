@@ -8,6 +8,9 @@ from homeassistant.setup import setup_component, async_setup_component
 import homeassistant.core as ha
 import homeassistant.util.dt as dt_util
 from homeassistant.components import history, recorder
+from homeassistant.components.recorder.statistics import (
+    PERIOD_5MINUTE, StatisticsCollector, period_start, write_statistics)
+from homeassistant.components.recorder.util import session_scope
 
 from tests.common import (
     init_recorder_component, mock_state_change_event, get_test_home_assistant)
@@ -428,6 +431,94 @@ class TestComponentHistory(unittest.TestCase):
                     history.CONF_ENTITIES: ['media_player.test']}}})
         self.check_significant_states(zero, four, states, config)
 
+    def test_stream_significant_states(self):
+        """Test streaming significant states one entity at a time."""
+        zero, four, states = self.record_states()
+        streamed = list(history.stream_significant_states(
+            self.hass, zero, four, filters=history.Filters()))
+
+        assert [entity_states[0].entity_id for entity_states in streamed] == \
+            sorted(states)
+        for entity_states in streamed:
+            assert states[entity_states[0].entity_id] == entity_states
+
+    def test_stream_significant_states_max_points_no_end(self):
+        """Test downsampling streamed states up to now."""
+        zero, four, states = self.record_states()
+        with patch('homeassistant.components.history.dt_util.utcnow',
+                   return_value=four):
+            streamed = list(history.stream_significant_states(
+                self.hass, zero, filters=history.Filters(), max_points=100))
+
+        assert streamed == list(history.stream_significant_states(
+            self.hass, zero, four, filters=history.Filters(), max_points=100))
+
+    def test_downsample_states(self):
+        """Test downsampling numeric states into buckets."""
+        start = dt_util.utcnow()
+        end = start + timedelta(minutes=10)
+        states = [
+            ha.State('sensor.power', value, last_changed=moment,
+                     last_updated=moment)
+            for value, moment in (
+                ('1', start), ('3', start + timedelta(minutes=1)),
+                ('unavailable', start + timedelta(minutes=2)),
+                ('4', start + timedelta(minutes=3)),
+                ('6', start + timedelta(minutes=7)),
+                ('8', start + timedelta(minutes=8)))]
+
+        points = list(history.downsample_states(states, start, end, 2))
+
+        assert len(points) == 4
+        assert points[0]['state'] == '2.0'
+        assert points[0]['min'] == 1
+        assert points[0]['max'] == 3
+        assert points[0]['count'] == 2
+        assert points[0]['last_updated'] == start
+        assert points[1] is states[2]
+        assert points[2] is states[3]
+        assert points[3]['mean'] == 7
+        assert points[3]['last_updated'] == start + timedelta(minutes=7)
+
+    def test_get_significant_states_statistics(self):
+        """Test periods with statistics are returned as statistics."""
+        zero, four, states = self.record_states()
+        start = period_start(four, 300) + timedelta(minutes=5)
+        end = start + timedelta(minutes=10)
+        collector = StatisticsCollector([300])
+        buckets = []
+        for value, moment in (('2', start),
+                              ('4', start + timedelta(seconds=150)),
+                              ('9', start + timedelta(minutes=6))):
+            buckets.extend(collector.add_state(ha.State(
+                'media_player.test', value, last_changed=moment,
+                last_updated=moment)))
+        buckets.extend(collector.flush(end))
+        with session_scope(hass=self.hass) as session:
+            write_statistics(session, buckets)
+
+        two = zero + timedelta(seconds=2)
+        with patch('homeassistant.components.history.dt_util.utcnow',
+                   return_value=end):
+            hist = history.get_significant_states(
+                self.hass, two, end, filters=history.Filters(),
+                statistics_period=PERIOD_5MINUTE)
+            streamed = list(history.stream_significant_states(
+                self.hass, two, end, filters=history.Filters(),
+                statistics_period=PERIOD_5MINUTE))
+
+        start_state, netflix, *points = hist['media_player.test']
+        assert start_state.last_updated == two
+        assert netflix == states['media_player.test'][-1]
+        # The 4 is held into the second period
+        assert [point['mean'] for point in points] == [3, 8]
+        assert [point['count'] for point in points] == [2, 1]
+        assert [point['last_updated'] for point in points] == \
+            [start, start + timedelta(minutes=5)]
+        assert points[0]['attributes'] == netflix.attributes
+        assert {entity_states[0].entity_id: entity_states
+                for entity_states in streamed} == hist
+
     def check_significant_states(self, zero, four, states, config): \
             # pylint: disable=no-self-use
         """Check if significant states are retrieved."""
@@ -526,3 +617,88 @@ async def test_fetch_period_api(hass, aiohttp_client):
     response = await client.get(
         '/api/history/period/{}'.format(dt_util.utcnow().isoformat()))
     assert response.status == 200
+
+
+async def test_fetch_period_api_max_points(hass, aiohttp_client):
+    """Test the fetch period view rejects an invalid max_points."""
+    await hass.async_add_job(init_recorder_component, hass)
+    await async_setup_component(hass, 'history', {})
+    await hass.components.recorder.wait_connection_ready()
+    await hass.async_add_job(hass.data[recorder.DATA_INSTANCE].block_till_done)
+    client = await aiohttp_client(hass.http.app)
+    response = await client.get(
+        '/api/history/period/{}?max_points=0'.format(
+            dt_util.utcnow().isoformat()))
+    assert response.status == 400
+
+    response = await client.get(
+        '/api/history/period/{}?max_points=100'.format(
+            dt_util.utcnow().isoformat()))
+    assert response.status == 200
+
+    response = await client.get(
+        '/api/history/period/{}?statistics=day'.format(
+            dt_util.utcnow().isoformat()))
+    assert response.status == 400
+
+    response = await client.get(
+        '/api/history/period/{}?statistics=hour'.format(
+            dt_util.utcnow().isoformat()))
+    assert response.status == 200
+
+
+async def test_stream_period_api(hass, aiohttp_client):
+    """Test the stream view for history."""
+    await hass.async_add_job(init_recorder_component, hass)
+    await async_setup_component(hass, 'history', {})
+    await hass.components.recorder.wait_connection_ready()
+    hass.states.async_set('sensor.power', '10')
+    await hass.async_block_till_done()
+    await hass.async_add_job(hass.data[recorder.DATA_INSTANCE].block_till_done)
+    client = await aiohttp_client(hass.http.app)
+    response = await client.get(
+        '/api/history/stream/{}'.format(
+            (dt_util.utcnow() - timedelta(hours=1)).isoformat()))
+    assert response.status == 200
+    result = await response.json()
+    assert len(result) == 1
+    assert result[0][0]['entity_id'] == 'sensor.power'
+    assert result[0][0]['state'] == '10'
+
+
+async def test_stream_period_api_full_buffer(hass, aiohttp_client):
+    """Test the stream view with more entities than the buffer holds."""
+    await hass.async_add_job(init_recorder_component, hass)
+    await async_setup_component(hass, 'history', {})
+    await hass.components.recorder.wait_connection_ready()
+    for idx in range(5):
+        hass.states.async_set('sensor.power_{}'.format(idx), str(idx))
+    await hass.async_block_till_done()
+    await hass.async_add_job(hass.data[recorder.DATA_INSTANCE].block_till_done)
+    client = await aiohttp_client(hass.http.app)
+
+    with patch.object(history, 'STREAM_QUEUE_SIZE', 1):
+        response = await client.get(
+            '/api/history/stream/{}'.format(
+                (dt_util.utcnow() - timedelta(hours=1)).isoformat()))
+        assert response.status == 200
+        result = await response.json()
+
+    assert [states[0]['state'] for states in result] == \
+        ['0', '1', '2', '3', '4']
+
+
+async def test_stream_period_api_error(hass, aiohttp_client):
+    """Test the stream view reports errors before streaming."""
+    await hass.async_add_job(init_recorder_component, hass)
+    await async_setup_component(hass, 'history', {})
+    await hass.components.recorder.wait_connection_ready()
+    client = await aiohttp_client(hass.http.app)
+
+    with patch.object(history, 'stream_significant_states',
+                      side_effect=ValueError):
+        response = await client.get(
+            '/api/history/stream/{}'.format(
+                (dt_util.utcnow() - timedelta(hours=1)).isoformat()))
+
+    assert response.status == 500
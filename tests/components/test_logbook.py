@@ -3,12 +3,13 @@
 import logging
 from datetime import timedelta
 import unittest
+from unittest.mock import patch
 
 from homeassistant.components import sun
 import homeassistant.core as ha
 from homeassistant.const import (
     EVENT_STATE_CHANGED, EVENT_HOMEASSISTANT_START, EVENT_HOMEASSISTANT_STOP,
-    ATTR_HIDDEN, STATE_NOT_HOME, STATE_ON, STATE_OFF)
+    ATTR_FRIENDLY_NAME, ATTR_HIDDEN, STATE_NOT_HOME, STATE_ON, STATE_OFF)
 import homeassistant.util.dt as dt_util
 from homeassistant.components import logbook, recorder
 from homeassistant.setup import setup_component, async_setup_component
@@ -68,6 +69,24 @@ class TestComponentLogbook(unittest.TestCase):
         self.assertEqual('switch.test_switch', last_call.data.get(
             logbook.ATTR_ENTITY_ID))
 
+    def test_get_events_restores_attributes(self):
+        """Test state changes are read with the attributes of the state."""
+        start = dt_util.utcnow()
+        for state in (STATE_OFF, STATE_ON):
+            self.hass.states.set(
+                'light.kitchen', state, {ATTR_FRIENDLY_NAME: 'Kitchen'})
+            self.hass.states.set('light.hall', state, {ATTR_HIDDEN: True})
+        self.hass.block_till_done()
+        self.hass.data[recorder.DATA_INSTANCE].block_till_done()
+
+        entries = list(logbook._get_events(
+            self.hass, self.EMPTY_CONFIG, start,
+            dt_util.utcnow() + timedelta(hours=1)))
+
+        self.assertEqual(1, len(entries))
+        self.assertEqual('Kitchen', entries[0].name)
+        self.assertEqual('light.kitchen', entries[0].entity_id)
+
     def test_service_call_create_log_book_entry_no_message(self):
         """Test if service call create log book entry without message."""
         calls = []
@@ -567,3 +586,51 @@ async def test_logbook_view(hass, aiohttp_client):
     response = await client.get(
         '/api/logbook/{}'.format(dt_util.utcnow().isoformat()))
     assert response.status == 200
+
+
+async def test_logbook_view_pages(hass, aiohttp_client):
+    """Test fetching the logbook in pages for a single entity."""
+    await hass.async_add_job(init_recorder_component, hass)
+    await async_setup_component(hass, 'logbook', {
+        logbook.DOMAIN: {logbook.CONF_EXCLUDE: {
+            logbook.CONF_DOMAINS: ['switch']}}})
+    await hass.components.recorder.wait_connection_ready()
+    start = dt_util.utcnow()
+    for group in range(4):
+        moment = start + timedelta(minutes=group * logbook.GROUP_BY_MINUTES)
+        state = 'on' if group % 2 else 'off'
+        with patch('homeassistant.core.dt_util.utcnow', return_value=moment):
+            for entity_id in ('light.kitchen', 'light.hall', 'switch.tv'):
+                hass.states.async_set(entity_id, state)
+            await hass.async_block_till_done()
+    await hass.async_add_job(hass.data[recorder.DATA_INSTANCE].block_till_done)
+    client = await aiohttp_client(hass.http.app)
+    url = '/api/logbook/{}'.format(start.isoformat())
+
+    response = await client.get(url, params={'limit': '0'})
+    assert response.status == 400
+
+    response = await client.get(url, params={'cursor': 'yesterday'})
+    assert response.status == 400
+
+    entries = []
+    params = {'entity_id': 'light.kitchen', 'limit': '1'}
+    while True:
+        response = await client.get(url, params=params)
+        assert response.status == 200
+        page = await response.json()
+        assert len(page['entries']) == 1
+        entries.extend(page['entries'])
+        if page['cursor'] is None:
+            break
+        params['cursor'] = page['cursor']
+
+    # The first state of an entity is not logged
+    assert [entry['message'] for entry in entries] == \
+        ['turned on', 'turned off', 'turned on']
+    assert all(entry['entity_id'] == 'light.kitchen' for entry in entries)
+
+    response = await client.get(url)
+    entries = await response.json()
+    assert len(entries) == 6
+    assert all(entry['domain'] == 'light' for entry in entries)
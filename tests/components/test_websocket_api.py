@@ -1,5 +1,6 @@
 """Tests for the Home Assistant Websocket API."""
 import asyncio
+import threading
 from unittest.mock import patch
 
 from aiohttp import WSMsgType
@@ -215,6 +216,165 @@ def test_subscribe_unsubscribe_events(hass, websocket_client):
     assert sum(hass.bus.async_listeners().values()) == init_count
 
 
+async def test_subscriptions_share_listener(hass, websocket_client):
+    """Test subscriptions to the same event type share a bus listener."""
+    init_count = sum(hass.bus.async_listeners().values())
+
+    for iden in (5, 6):
+        await websocket_client.send_json({
+            'id': iden,
+            'type': wapi.TYPE_SUBSCRIBE_EVENTS,
+            'event_type': 'test_event'
+        })
+        msg = await websocket_client.receive_json()
+        assert msg['success']
+
+    assert sum(hass.bus.async_listeners().values()) == init_count + 1
+
+    with patch('homeassistant.core.Event.as_dict', autospec=True,
+               return_value={'event_type': 'test_event'}) as mock_as_dict:
+        hass.bus.async_fire('test_event', {'hello': 'world'})
+
+        with timeout(3, loop=hass.loop):
+            msgs = [await websocket_client.receive_json() for _ in range(2)]
+
+    assert len(mock_as_dict.mock_calls) == 1
+    assert sorted(msg['id'] for msg in msgs) == [5, 6]
+    assert all(msg['event'] == {'event_type': 'test_event'} for msg in msgs)
+
+    await websocket_client.send_json({
+        'id': 7,
+        'type': wapi.TYPE_UNSUBSCRIBE_EVENTS,
+        'subscription': 5
+    })
+    msg = await websocket_client.receive_json()
+    assert msg['success']
+    assert sum(hass.bus.async_listeners().values()) == init_count + 1
+
+
+async def test_events_forwarded_in_event_loop(hass, websocket_client):
+    """Test events are forwarded to subscriptions in the event loop."""
+    await websocket_client.send_json({
+        'id': 5,
+        'type': wapi.TYPE_SUBSCRIBE_EVENTS,
+        'event_type': 'test_event'
+    })
+    msg = await websocket_client.receive_json()
+    assert msg['success']
+
+    threads = []
+
+    def as_dict(event):
+        """Record the thread serializing the event."""
+        threads.append(threading.current_thread())
+        return {'event_type': event.event_type}
+
+    with patch('homeassistant.core.Event.as_dict', autospec=True,
+               side_effect=as_dict):
+        hass.bus.async_fire('test_event')
+
+        with timeout(3, loop=hass.loop):
+            msg = await websocket_client.receive_json()
+
+    assert msg['id'] == 5
+    assert threads == [threading.current_thread()]
+
+
+async def test_coalesce_messages(hass, websocket_client):
+    """Test queued messages are sent in one frame if supported."""
+    await websocket_client.send_json({
+        'id': 5,
+        'type': wapi.TYPE_SUPPORTED_FEATURES,
+        'features': {wapi.FEATURE_COALESCE_MESSAGES: 1}
+    })
+    msg = await websocket_client.receive_json()
+    assert msg['success']
+
+    await websocket_client.send_json({
+        'id': 6,
+        'type': wapi.TYPE_SUBSCRIBE_EVENTS,
+        'event_type': 'test_event'
+    })
+    msg = await websocket_client.receive_json()
+    assert msg['success']
+
+    hass.bus.async_fire('test_event', {'count': 1})
+    hass.bus.async_fire('test_event', {'count': 2})
+
+    with timeout(3, loop=hass.loop):
+        msgs = await websocket_client.receive_json()
+
+    assert [msg['id'] for msg in msgs] == [6, 6]
+    assert [msg['event']['data'] for msg in msgs] == [
+        {'count': 1}, {'count': 2}]
+
+
+async def test_subscribe_entities(hass, websocket_client):
+    """Test subscribe entities command sends snapshot and changes."""
+    hass.states.async_set('light.kitchen', 'on', {'brightness': 100})
+    hass.states.async_set('switch.fan', 'off')
+    hass.states.async_set('sensor.temperature', '20')
+
+    await websocket_client.send_json({
+        'id': 5,
+        'type': wapi.TYPE_SUBSCRIBE_ENTITIES,
+        'entity_ids': ['light.kitchen'],
+        'domains': ['switch'],
+    })
+
+    msg = await websocket_client.receive_json()
+    assert msg['id'] == 5
+    assert msg['success']
+
+    msg = await websocket_client.receive_json()
+    assert msg['id'] == 5
+    assert msg['type'] == wapi.TYPE_EVENT
+    snapshot = msg['event']['add']
+    assert set(snapshot) == {'light.kitchen', 'switch.fan'}
+    assert snapshot['light.kitchen']['state'] == 'on'
+    assert snapshot['light.kitchen']['attributes'] == {'brightness': 100}
+
+    hass.states.async_set('sensor.temperature', '21')
+    hass.states.async_set('light.kitchen', 'on', {
+        'brightness': 200, 'friendly_name': 'Kitchen'})
+
+    with timeout(3, loop=hass.loop):
+        msg = await websocket_client.receive_json()
+
+    change = msg['event']['change']['light.kitchen']
+    assert change['+']['attributes'] == {
+        'brightness': 200, 'friendly_name': 'Kitchen'}
+    assert 'state' not in change['+']
+    assert '-' not in change
+
+    hass.states.async_set('light.kitchen', 'off', {'brightness': 200})
+
+    with timeout(3, loop=hass.loop):
+        msg = await websocket_client.receive_json()
+
+    change = msg['event']['change']['light.kitchen']
+    assert change['+']['state'] == 'off'
+    assert 'attributes' not in change['+']
+    assert change['-'] == {'attributes': ['friendly_name']}
+
+    hass.states.async_remove('switch.fan')
+
+    with timeout(3, loop=hass.loop):
+        msg = await websocket_client.receive_json()
+
+    assert msg['event'] == {'remove': ['switch.fan']}
+
+    await websocket_client.send_json({
+        'id': 6,
+        'type': wapi.TYPE_UNSUBSCRIBE_EVENTS,
+        'subscription': 5
+    })
+
+    msg = await websocket_client.receive_json()
+    assert msg['id'] == 6
+    assert msg['success']
+
+
 @asyncio.coroutine
 def test_get_states(hass, websocket_client):
     """Test get_states command."""
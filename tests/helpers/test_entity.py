@@ -400,3 +400,63 @@ def test_async_remove_no_platform(hass):
     assert len(hass.states.async_entity_ids()) == 1
     yield from ent.async_remove()
     assert len(hass.states.async_entity_ids()) == 0
+
+
+async def test_unchanged_state_write_elided(hass):
+    """Test writing an unchanged state is elided."""
+    ent = entity.Entity()
+    ent.hass = hass
+    ent.entity_id = 'test.test'
+
+    with patch.object(hass.states, 'async_set',
+                      wraps=hass.states.async_set) as mock_set:
+        await ent.async_update_ha_state()
+        await ent.async_update_ha_state()
+        assert len(mock_set.mock_calls) == 1
+        assert entity.async_get_state_write_stats(hass) == {
+            'writes': 1, 'elided_writes': 1}
+
+        # The state was changed by someone else
+        hass.states.async_set('test.test', 'other')
+        await ent.async_update_ha_state()
+        assert hass.states.get('test.test').state == 'unknown'
+
+        with patch.object(entity.Entity, 'name', 'Test'):
+            await ent.async_update_ha_state()
+        assert hass.states.get('test.test').name == 'Test'
+
+    assert entity.async_get_state_write_stats(hass) == {
+        'writes': 3, 'elided_writes': 1}
+
+
+async def test_reports_changes(hass):
+    """Test entities reporting changes are only written when changed."""
+    class ReportingEntity(entity.Entity):
+        """Entity that counts reads of its state."""
+
+        reports_changes = True
+        entity_id = 'test.test'
+        reads = 0
+
+        @property
+        def state(self):
+            """Return the state."""
+            self.reads += 1
+            return 'on'
+
+    ent = ReportingEntity()
+    ent.hass = hass
+
+    await ent.async_update_ha_state()
+    await ent.async_update_ha_state()
+    assert ent.reads == 1
+
+    ent.mark_changed('state')
+    await ent.async_update_ha_state()
+    assert ent.reads == 2
+
+    await ent.async_update_ha_state()
+    assert ent.reads == 2
+    # The marked update did not change the attributes either
+    assert entity.async_get_state_write_stats(hass) == {
+        'writes': 1, 'elided_writes': 3}
@@ -139,9 +139,8 @@ class TestHelpersEntityComponent(unittest.TestCase):
         assert ('platform_test', {}, {'msg': 'discovery_info'}) == \
             mock_setup.call_args[0]
 
-    @patch('homeassistant.helpers.entity_platform.'
-           'async_track_time_interval')
-    def test_set_scan_interval_via_config(self, mock_track):
+    @patch('homeassistant.helpers.entity_platform.async_call_later')
+    def test_set_scan_interval_via_config(self, mock_call_later):
         """Test the setting of the scan interval via configuration."""
         def platform_setup(hass, config, add_devices, discovery_info=None):
             """Test the platform setup."""
@@ -160,8 +159,8 @@ class TestHelpersEntityComponent(unittest.TestCase):
         })
 
         self.hass.block_till_done()
-        assert mock_track.called
-        assert timedelta(seconds=30) == mock_track.call_args[0][2]
+        assert mock_call_later.called
+        assert 27 <= mock_call_later.call_args[0][1] <= 30
 
     def test_set_entity_namespace_via_config(self):
         """Test setting an entity namespace."""
@@ -415,3 +414,49 @@ async def test_unload_entry_fails_if_never_loaded(hass):
 
     with pytest.raises(ValueError):
         await component.async_unload_entry(entry)
+
+
+async def test_entity_index(hass):
+    """Test entities are indexed when added and removed."""
+    component = EntityComponent(_LOGGER, DOMAIN, hass)
+    await component.async_add_entities([
+        MockEntity(name='test_1'),
+        MockEntity(name='test_2'),
+    ])
+
+    entity = component.get_entity('test_domain.test_2')
+    assert entity.name == 'test_2'
+
+    call = ha.ServiceCall('test', 'service', {
+        'entity_id': ['test_domain.test_2', 'test_domain.test_2']
+    })
+    assert component.async_extract_from_service(call) == [entity]
+
+    await component.async_remove_entity('test_domain.test_2')
+
+    assert component.get_entity('test_domain.test_2') is None
+    assert component.async_extract_from_service(call) == []
+    assert [ent.entity_id for ent in component.entities] == \
+        ['test_domain.test_1']
+
+
+async def test_group_updated_once(hass):
+    """Test entities added in the same iteration update the group once."""
+    component = EntityComponent(_LOGGER, DOMAIN, hass,
+                                group_name='everyone')
+
+    with patch('homeassistant.components.group.async_set_group') as set_group:
+        await asyncio.wait([
+            component.async_add_entities([MockEntity(name='test_1')]),
+            component.async_add_entities([MockEntity(name='test_2')]),
+        ], loop=hass.loop)
+        await hass.async_block_till_done()
+
+        assert len(set_group.mock_calls) == 1
+        assert set_group.mock_calls[0][2]['entity_ids'] == \
+            ['test_domain.test_1', 'test_domain.test_2']
+
+        # Members did not change
+        component._async_update_group()
+        await hass.async_block_till_done()
+        assert len(set_group.mock_calls) == 1
@@ -2,9 +2,11 @@
 import asyncio
 import logging
 import unittest
-from unittest.mock import patch, Mock, MagicMock
+from unittest.mock import patch, Mock, MagicMock, PropertyMock
 from datetime import timedelta
 
+import pytest
+
 from homeassistant.exceptions import PlatformNotReady
 import homeassistant.loader as loader
 from homeassistant.helpers.entity import generate_entity_id
@@ -136,9 +138,8 @@ class TestHelpersEntityPlatform(unittest.TestCase):
         assert 1 == len(self.hass.states.entity_ids())
         assert not ent.update.called
 
-    @patch('homeassistant.helpers.entity_platform.'
-           'async_track_time_interval')
-    def test_set_scan_interval_via_platform(self, mock_track):
+    @patch('homeassistant.helpers.entity_platform.async_call_later')
+    def test_set_scan_interval_via_platform(self, mock_call_later):
         """Test the setting of the scan interval via platform."""
         def platform_setup(hass, config, add_devices, discovery_info=None):
             """Test the platform setup."""
@@ -158,8 +159,8 @@ class TestHelpersEntityPlatform(unittest.TestCase):
         })
 
         self.hass.block_till_done()
-        assert mock_track.called
-        assert timedelta(seconds=30) == mock_track.call_args[0][2]
+        assert mock_call_later.called
+        assert 27 <= mock_call_later.call_args[0][1] <= 30
 
     def test_adding_entities_with_generator_and_thread_callback(self):
         """Test generator in add_entities that calls thread method.
@@ -602,3 +603,54 @@ def test_not_fails_with_adding_empty_entities_(hass):
     yield from component.async_add_entities([])
 
     assert len(hass.states.async_entity_ids()) == 0
+
+
+async def test_polling_backs_off_unchanged_entity(hass):
+    """Test an entity whose state does not change is polled less often."""
+    platform = MockEntityPlatform(hass, scan_interval=timedelta(seconds=10))
+    entity = MockEntity(should_poll=True)
+
+    with patch.object(entity_platform, 'async_call_later') as mock_call_later:
+        await platform.async_add_entities([entity])
+        poll = platform._polls[entity.entity_id]
+
+        for _ in range(entity_platform.POLL_UNCHANGED_BACKOFF):
+            await platform._async_poll_entity(poll)
+
+        assert poll.backoff == 2
+        assert 18 <= mock_call_later.call_args[0][1] <= 20
+        assert platform.polling_stats['polls'] == 5
+        assert platform.polling_stats['backed_off_entities'] == 1
+
+        # A changed state restores the scan interval
+        hass.states.async_set(entity.entity_id, 'changed')
+        await platform._async_poll_entity(poll)
+
+        assert poll.backoff == 1
+        assert 9 <= mock_call_later.call_args[0][1] <= 10
+
+        await platform.async_remove_entity(entity.entity_id)
+
+    assert platform.polling_stats['polled_entities'] == 0
+    assert mock_call_later.return_value.called
+
+
+async def test_polling_continues_after_failed_state_write(hass):
+    """Test an entity is polled again if writing its state fails."""
+    platform = MockEntityPlatform(hass, scan_interval=timedelta(seconds=10))
+    entity = MockEntity(should_poll=True)
+
+    with patch.object(entity_platform, 'async_call_later') as mock_call_later:
+        await platform.async_add_entities([entity])
+        poll = platform._polls[entity.entity_id]
+        mock_call_later.reset_mock()
+
+        with patch.object(MockEntity, 'state', new_callable=PropertyMock,
+                          side_effect=ValueError), \
+                pytest.raises(ValueError):
+            await platform._async_poll_entity(poll)
+
+        assert mock_call_later.called
+        assert platform.polling_stats['polls'] == 1
+
+        await platform.async_remove_entity(entity.entity_id)
@@ -13,6 +13,8 @@ import homeassistant.core as ha
 from homeassistant.const import MATCH_ALL
 from homeassistant.helpers.event import (
     async_call_later,
+    async_track_point_in_utc_time,
+    async_track_utc_time_change,
     track_point_in_utc_time,
     track_point_in_time,
     track_utc_time_change,
@@ -20,6 +22,7 @@ from homeassistant.helpers.event import (
     track_state_change,
     track_time_interval,
     track_template,
+    async_track_template,
     track_same_state,
     track_sunrise,
     track_sunset,
@@ -663,3 +666,99 @@ def test_async_call_later(hass):
     assert p_action is action
     assert p_point == now + timedelta(seconds=3)
     assert remove is mock()
+
+
+@asyncio.coroutine
+def test_time_trackers_share_one_listener(hass):
+    """Test time trackers use a single time changed listener."""
+    runs = []
+    point = datetime(2017, 12, 19, 15, 40, 0, tzinfo=dt_util.UTC)
+
+    unsubs = [
+        async_track_point_in_utc_time(
+            hass, callback(lambda x: runs.append(1)), point)
+        for _ in range(10)
+    ]
+    unsubs.append(async_track_utc_time_change(
+        hass, callback(lambda x: runs.append(2)), second=0))
+
+    assert hass.bus.async_listeners()[ha.EVENT_TIME_CHANGED] == 1
+
+    hass.bus.async_fire(ha.EVENT_TIME_CHANGED, {ha.ATTR_NOW: point})
+    yield from hass.async_block_till_done()
+    assert runs.count(1) == 10
+    assert runs.count(2) == 1
+
+    for unsub in unsubs:
+        unsub()
+
+    assert ha.EVENT_TIME_CHANGED not in hass.bus.async_listeners()
+
+
+@asyncio.coroutine
+def test_time_pattern_repeated_and_backwards_time(hass):
+    """Test time patterns when time repeats or goes backwards."""
+    runs = []
+
+    async_track_utc_time_change(
+        hass, callback(lambda x: runs.append(x)), minute=0, second=0)
+
+    now = datetime(2017, 12, 19, 15, 0, 0, tzinfo=dt_util.UTC)
+
+    for _ in range(2):
+        hass.bus.async_fire(ha.EVENT_TIME_CHANGED, {ha.ATTR_NOW: now})
+    yield from hass.async_block_till_done()
+    assert len(runs) == 2
+
+    hass.bus.async_fire(ha.EVENT_TIME_CHANGED,
+                        {ha.ATTR_NOW: now + timedelta(minutes=30)})
+    yield from hass.async_block_till_done()
+    assert len(runs) == 2
+
+    hass.bus.async_fire(ha.EVENT_TIME_CHANGED,
+                        {ha.ATTR_NOW: now - timedelta(hours=1)})
+    yield from hass.async_block_till_done()
+    assert len(runs) == 3
+
+    hass.bus.async_fire(ha.EVENT_TIME_CHANGED,
+                        {ha.ATTR_NOW: now + timedelta(hours=1)})
+    yield from hass.async_block_till_done()
+    assert len(runs) == 4
+
+
+@asyncio.coroutine
+def test_track_template_follows_rendered_states(hass):
+    """Test template tracking only listens to the states rendered."""
+    runs = []
+    template = Template(
+        "{% if is_state('input_boolean.use_domain', 'on') %}"
+        "{{ states.switch | selectattr('state', 'eq', 'on') | list | count }}"
+        "{% else %}{{ is_state('switch.one', 'on') }}{% endif %}", hass)
+    hass.states.async_set('input_boolean.use_domain', 'off')
+    hass.states.async_set('switch.one', 'off')
+
+    with patch.object(template, 'async_render_to_info',
+                      wraps=template.async_render_to_info) as mock_render:
+        async_track_template(
+            hass, template, callback(lambda *args: runs.append(args)))
+        assert len(mock_render.mock_calls) == 1
+
+        hass.states.async_set('switch.two', 'on')
+        hass.states.async_set('sensor.other', 'on')
+        yield from hass.async_block_till_done()
+        assert len(mock_render.mock_calls) == 1
+
+        hass.states.async_set('switch.one', 'on')
+        yield from hass.async_block_till_done()
+        assert len(mock_render.mock_calls) == 2
+        assert len(runs) == 1
+
+        # Now the template iterates over all switches
+        hass.states.async_set('input_boolean.use_domain', 'on')
+        yield from hass.async_block_till_done()
+        assert len(mock_render.mock_calls) == 3
+
+        hass.states.async_set('switch.three', 'on')
+        hass.states.async_set('sensor.other', 'off')
+        yield from hass.async_block_till_done()
+        assert len(mock_render.mock_calls) == 4
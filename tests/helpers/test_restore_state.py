@@ -1,7 +1,8 @@
 """The tests for the Restore component."""
 import asyncio
 from datetime import timedelta
-from unittest.mock import patch, MagicMock
+import json
+from unittest.mock import patch, Mock, MagicMock
 
 from homeassistant.setup import setup_component
 from homeassistant.const import EVENT_HOMEASSISTANT_START
@@ -10,7 +11,9 @@ import homeassistant.util.dt as dt_util
 from homeassistant.components import input_boolean, recorder
 from homeassistant.helpers.restore_state import (
     async_get_last_state, DATA_RESTORE_CACHE)
+from homeassistant.components.recorder.const import DATA_INSTANCE
 from homeassistant.components.recorder.models import RecorderRuns, States
+from homeassistant.remote import JSONEncoder
 
 from tests.common import (
     get_test_home_assistant, mock_coro, init_recorder_component,
@@ -51,6 +54,37 @@ def test_caching_data(hass):
     assert DATA_RESTORE_CACHE not in hass.data
 
 
+async def test_loading_last_states(hass):
+    """Test the cache is loaded from the states stored by the recorder."""
+    mock_component(hass, 'recorder')
+    hass.state = CoreState.starting
+
+    states = [
+        State('input_boolean.b0', 'on'),
+        State('input_boolean.b1', 'off', {'test_attr': 5}),
+    ]
+    hass.data[DATA_INSTANCE] = Mock(
+        last_states=json.loads(json.dumps(states, cls=JSONEncoder)))
+
+    with patch('homeassistant.helpers.restore_state.last_recorder_run') \
+            as mock_last_run, \
+            patch('homeassistant.helpers.restore_state.wait_connection_ready',
+                  side_effect=asyncio.TimeoutError) as mock_wait:
+        state = await async_get_last_state(hass, 'input_boolean.b1')
+        assert await async_get_last_state(hass, 'input_boolean.b2') is None
+
+    assert not mock_wait.called
+    assert not mock_last_run.called
+    assert hass.data[DATA_RESTORE_CACHE] == {st.entity_id: st for st in states}
+    assert state == states[1]
+    assert state.last_updated == states[1].last_updated
+
+    hass.bus.async_fire(EVENT_HOMEASSISTANT_START)
+    await hass.async_block_till_done()
+
+    assert DATA_RESTORE_CACHE not in hass.data
+
+
 @asyncio.coroutine
 def test_hass_running(hass):
     """Test that cache cannot be accessed while hass is running."""
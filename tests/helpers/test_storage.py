@@ -1,7 +1,8 @@
 """Tests for the storage helper."""
 import asyncio
 from datetime import timedelta
-from unittest.mock import patch
+import threading
+from unittest.mock import Mock, patch
 
 import pytest
 
@@ -177,3 +178,50 @@ async def test_migrator_transforming_config(hass, store, hass_storage):
         'version': MOCK_VERSION,
         'data': data,
     }
+
+
+async def test_delay_save_creates_data_once(hass, store, hass_storage):
+    """Test delayed saves only create the data when writing it."""
+    data_func = Mock(return_value={'delay': 'yes'})
+    store.async_delay_save(data_func, 1)
+    store.async_delay_save(data_func, 1)
+    assert store.key not in hass_storage
+    assert len(data_func.mock_calls) == 0
+
+    async_fire_time_changed(hass, dt.utcnow() + timedelta(seconds=1))
+    await hass.async_block_till_done()
+    assert len(data_func.mock_calls) == 1
+    assert hass_storage[store.key] == {
+        'version': MOCK_VERSION,
+        'key': MOCK_KEY,
+        'data': {'delay': 'yes'},
+    }
+
+
+async def test_saves_combined_while_writing(hass, store, hass_storage):
+    """Test saves made during a write are combined in the next write."""
+    writes = []
+    write_started = asyncio.Event(loop=hass.loop)
+    release_write = threading.Event()
+
+    def write_data(path, data):
+        """Record the written data, blocking the first write."""
+        writes.append(data['data'])
+        hass.loop.call_soon_threadsafe(write_started.set)
+        release_write.wait()
+
+    with patch.object(store, '_write_data', side_effect=write_data):
+        first = hass.async_add_job(store.async_save({'save': 1}))
+        await write_started.wait()
+
+        # Both saves wait for the lock held by the first write
+        second = hass.async_add_job(store.async_save({'save': 2}))
+        await asyncio.sleep(0)
+        third = hass.async_add_job(store.async_save({'save': 3}))
+        await asyncio.sleep(0)
+
+        release_write.set()
+        await asyncio.gather(first, second, third, loop=hass.loop)
+
+    # The second save is replaced by the third
+    assert writes == [{'save': 1}, {'save': 3}]
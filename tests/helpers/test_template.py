@@ -1019,3 +1019,42 @@ def test_length_of_states(hass):
 
     tpl = template.Template('{{ states.sensor | length }}', hass)
     assert tpl.async_render() == '2'
+
+
+@asyncio.coroutine
+def test_render_to_info_records_accessed_states(hass):
+    """Test the entities and domains accessed by a render are recorded."""
+    hass.states.async_set('light.kitchen', 'on')
+    hass.states.async_set('sensor.temperature', '20')
+    hass.states.async_set('switch.fan', 'off')
+
+    info = template.Template(
+        "{{ is_state('light.Kitchen', 'on') }} "
+        "{{ states.sensor.temperature.state }} "
+        "{{ state_attr('sensor.humidity', 'unit') }}", hass
+    ).async_render_to_info()
+    assert info.result == 'True 20 None'
+    assert info.entities == {
+        'light.kitchen', 'sensor.temperature', 'sensor.humidity'}
+    assert info.domains == set()
+    assert not info.all_states
+
+    info = template.Template(
+        '{{ states.switch | map(attribute="state") | join }}', hass
+    ).async_render_to_info()
+    assert info.result == 'off'
+    assert info.domains == {'switch'}
+    assert not info.all_states
+
+    info = template.Template('{{ states | length }}', hass) \
+        .async_render_to_info()
+    assert info.result == '3'
+    assert info.all_states
+
+    info = template.Template('{{ states.sensor.missing.state.lower() }}',
+                             hass) \
+        .async_render_to_info()
+    assert info.result is None
+    assert isinstance(info.exception, TemplateError)
+    assert info.entities == {'sensor.missing'}
+    assert template._RENDER_INFO not in hass.data
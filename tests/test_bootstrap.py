@@ -9,7 +9,10 @@ import homeassistant.config as config_util
 from homeassistant import bootstrap
 import homeassistant.util.dt as dt_util
 
-from tests.common import patch_yaml_files, get_test_config_dir, mock_coro
+from homeassistant import loader
+
+from tests.common import (
+    patch_yaml_files, get_test_config_dir, mock_coro, MockModule)
 
 ORIG_TIMEZONE = dt_util.DEFAULT_TIME_ZONE
 VERSION_PATH = os.path.join(get_test_config_dir(), config_util.VERSION_FILE)
@@ -54,6 +57,91 @@ def test_home_assistant_core_config_validation(hass):
     assert result is None
 
 
+async def test_setup_components_when_dependencies_ready(hass):
+    """Test components are set up as soon as their dependencies are."""
+    order = []
+    slow_setup = asyncio.Event(loop=hass.loop)
+
+    def mock_async_setup(domain, wait=False):
+        """Return a setup that records the order of setups."""
+        async def async_setup(hass, config):
+            """Record the start and end of the setup."""
+            order.append((domain, 'start'))
+            if wait:
+                await slow_setup.wait()
+            order.append((domain, 'done'))
+            return True
+        return async_setup
+
+    loader.set_component(hass, 'comp_slow', MockModule(
+        'comp_slow', async_setup=mock_async_setup('comp_slow', True)))
+    loader.set_component(hass, 'comp_dep', MockModule(
+        'comp_dep', async_setup=mock_async_setup('comp_dep')))
+    loader.set_component(hass, 'comp_a', MockModule(
+        'comp_a', dependencies=['comp_dep'],
+        async_setup=mock_async_setup('comp_a')))
+    loader.set_component(hass, 'comp_b', MockModule(
+        'comp_b', dependencies=['comp_slow'],
+        async_setup=mock_async_setup('comp_b')))
+
+    assert bootstrap.component_dependency_graph(
+        hass, ['comp_a', 'comp_b']) == {
+            'comp_dep': [], 'comp_a': ['comp_dep'],
+            'comp_slow': [], 'comp_b': ['comp_slow']}
+
+    setup = hass.loop.create_task(bootstrap.async_setup_components(
+        hass, ['comp_a', 'comp_b'], {}))
+    for _ in range(20):
+        await asyncio.sleep(0, loop=hass.loop)
+
+    # comp_a does not wait for the unrelated slow component
+    assert ('comp_a', 'done') in order
+    assert ('comp_b', 'start') not in order
+
+    slow_setup.set()
+    await setup
+
+    assert order.index(('comp_slow', 'done')) < \
+        order.index(('comp_b', 'start'))
+    assert order.index(('comp_dep', 'done')) < \
+        order.index(('comp_a', 'start'))
+    assert {'comp_slow', 'comp_dep', 'comp_a', 'comp_b'} <= \
+        hass.config.components
+
+
+async def test_setup_first_init_components_first(hass):
+    """Test components wait for the first init components."""
+    recorder_setup = asyncio.Event(loop=hass.loop)
+    recorder_loaded = []
+
+    async def async_setup_recorder(hass, config):
+        """Set up the recorder slowly."""
+        await recorder_setup.wait()
+        return True
+
+    async def async_setup_input(hass, config):
+        """Record if the recorder was set up."""
+        recorder_loaded.append('recorder' in hass.config.components)
+        return True
+
+    loader.set_component(hass, 'recorder', MockModule(
+        'recorder', async_setup=async_setup_recorder))
+    loader.set_component(hass, 'comp_input', MockModule(
+        'comp_input', async_setup=async_setup_input))
+
+    setup = hass.loop.create_task(bootstrap.async_setup_components(
+        hass, ['comp_input', 'recorder'], {}))
+    for _ in range(20):
+        await asyncio.sleep(0, loop=hass.loop)
+
+    assert recorder_loaded == []
+
+    recorder_setup.set()
+    await setup
+
+    assert recorder_loaded == [True]
+
+
 def test_from_config_dict_not_mount_deps_folder(loop):
     """Test that we do not mount the deps folder inside from_config_dict."""
     with patch('homeassistant.bootstrap.is_virtual_env', return_value=False), \
@@ -433,6 +433,19 @@ class TestConfig(unittest.TestCase):
         assert len(self.hass.config.whitelist_external_dirs) == 2
         assert '/tmp' in self.hass.config.whitelist_external_dirs
 
+    def test_loading_configuration_executors(self):
+        """Test setting the executor limits from the core config."""
+        run_coroutine_threadsafe(
+            config_util.async_process_ha_core_config(self.hass, {
+                'executors': {
+                    'device_io': 32,
+                    'database': 2,
+                },
+            }), self.hass.loop).result()
+
+        assert self.hass.executor_limits['device_io'] == 32
+        assert self.hass.executor_limits['database'] == 2
+
     def test_loading_configuration_temperature_unit(self):
         """Test backward compatibility when loading core config."""
         self.hass.config = mock.Mock()
@@ -3,6 +3,7 @@
 import asyncio
 import logging
 import os
+import threading
 import unittest
 from unittest.mock import patch, MagicMock, sentinel
 from datetime import datetime, timedelta
@@ -453,6 +454,11 @@ class TestState(unittest.TestCase):
         state = ha.State('domain.hello', 'world', {'some': 'attr'})
         self.assertEqual(state, ha.State.from_dict(state.as_dict()))
 
+    def test_as_dict_cached(self):
+        """Test the dict of a state is only created once."""
+        state = ha.State('domain.hello', 'world', {'some': 'attr'})
+        self.assertIs(state.as_dict(), state.as_dict())
+
     def test_dict_conversion_with_wrong_data(self):
         """Test conversion with wrong data."""
         self.assertIsNone(ha.State.from_dict(None))
@@ -585,6 +591,22 @@ class TestStateMachine(unittest.TestCase):
         self.hass.block_till_done()
         self.assertEqual(1, len(events))
 
+    def test_unchanged_attributes_shared(self):
+        """Test new states share the attributes if they did not change."""
+        self.states.set('sensor.power', '10', {'unit_of_measurement': 'W'})
+        state = self.states.get('sensor.power')
+
+        self.states.set('sensor.power', '12', {'unit_of_measurement': 'W'})
+        state2 = self.states.get('sensor.power')
+        self.assertEqual('12', state2.state)
+        self.assertIs(state.attributes, state2.attributes)
+        self.assertIs(state.domain, state2.domain)
+
+        self.states.set('sensor.power', '12', {'unit_of_measurement': 'kW'})
+        state3 = self.states.get('sensor.power')
+        self.assertEqual({'unit_of_measurement': 'kW'}, state3.attributes)
+        self.assertEqual(state2.last_changed, state3.last_changed)
+
 
 class TestServiceCall(unittest.TestCase):
     """Test ServiceCall class."""
@@ -954,3 +976,77 @@ def test_track_task_functions(loop):
         assert hass._track_task
     finally:
         yield from hass.async_stop()
+
+
+async def test_bus_entity_state_changed_listeners(hass):
+    """Test state changed listeners are only called for their entities."""
+    calls = []
+
+    @ha.callback
+    def listener(event):
+        """Mock listener."""
+        calls.append(event)
+
+    init_count = hass.bus.async_listeners().get(EVENT_STATE_CHANGED, 0)
+
+    unsub = hass.bus.async_listen_state_changed(
+        ('light.kitchen', 'light.bowl'), listener)
+
+    assert hass.bus.async_listeners()[EVENT_STATE_CHANGED] == init_count + 1
+
+    hass.states.async_set('light.living_room', 'on')
+    await hass.async_block_till_done()
+    assert len(calls) == 0
+
+    hass.states.async_set('light.kitchen', 'on')
+    hass.states.async_set('light.bowl', 'on')
+    await hass.async_block_till_done()
+    assert len(calls) == 2
+    assert calls[0].data['entity_id'] == 'light.kitchen'
+    assert calls[1].data['entity_id'] == 'light.bowl'
+
+    unsub()
+
+    assert hass.bus.async_listeners().get(EVENT_STATE_CHANGED, 0) == \
+        init_count
+
+    hass.states.async_set('light.kitchen', 'off')
+    await hass.async_block_till_done()
+    assert len(calls) == 2
+
+
+async def test_executor_job_runs_in_annotated_executor(hass):
+    """Test executor jobs run in the executor of their annotation."""
+    @ha.in_executor(ha.EXECUTOR_FILE_IO)
+    def write_file():
+        """Pretend to write a file."""
+        return 'written'
+
+    assert await hass.async_add_executor_job(write_file) == 'written'
+
+    stats = hass.async_executor_stats()
+    assert stats[ha.EXECUTOR_FILE_IO]['jobs'] == 1
+    assert stats[ha.EXECUTOR_FILE_IO]['max_workers'] == \
+        ha.EXECUTOR_LIMITS[ha.EXECUTOR_FILE_IO]
+
+    hass.async_set_executor_limit(ha.EXECUTOR_FILE_IO, 5)
+    assert hass.async_executor_stats()[ha.EXECUTOR_FILE_IO][
+        'max_workers'] == 5
+
+
+async def test_device_jobs_limited_per_integration(hass):
+    """Test device jobs of an integration are limited."""
+    hass.integration_executor_limit = 1
+    release = threading.Event()
+
+    tasks = [hass.async_add_device_job('demo', release.wait, 5)
+             for _ in range(2)]
+    other = hass.async_add_device_job('other', lambda: 'done')
+
+    assert await other == 'done'
+    await asyncio.sleep(0.1, loop=hass.loop)
+    assert hass.async_executor_stats()[ha.EXECUTOR_DEVICE_IO]['jobs'] == 2
+
+    release.set()
+    await asyncio.wait(tasks, loop=hass.loop)
+    assert hass.async_executor_stats()[ha.EXECUTOR_DEVICE_IO]['jobs'] == 3
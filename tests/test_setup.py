@@ -459,3 +459,20 @@ def test_platform_no_warn_slow(hass):
             hass, 'test_component1', {})
         assert result
         assert not mock_call.called
+
+
+async def test_setup_timings_recorded(hass):
+    """Test the setup time of components is recorded."""
+    loader.set_component(
+        hass, 'test_component1', MockModule('test_component1'))
+    loader.set_component(
+        hass, 'test_component2',
+        MockModule('test_component2', setup=lambda hass, config: False))
+
+    assert await setup.async_setup_component(hass, 'test_component1', {})
+    assert not await setup.async_setup_component(
+        hass, 'test_component2', {})
+
+    timings = setup.async_get_setup_timings(hass)
+    assert set(timings) == {'test_component1', 'test_component2'}
+    assert all(seconds >= 0 for seconds in timings.values())
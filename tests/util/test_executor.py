@@ -0,0 +1,47 @@
+"""Test Home Assistant executor util methods."""
+import threading
+from unittest.mock import patch
+
+from homeassistant.util import executor as executor_util
+
+
+def test_executor_stats():
+    """Test the executor measures the queue wait of jobs."""
+    executor = executor_util.InstrumentedExecutor('test', 1)
+    started = threading.Event()
+    release = threading.Event()
+
+    def block():
+        """Block the only thread of the executor."""
+        started.set()
+        release.wait()
+
+    executor.submit(block)
+    started.wait()
+    second = executor.submit(lambda: 'done')
+
+    stats = executor.stats
+    assert stats['running'] == 1
+    assert stats['queued'] == 1
+
+    with patch.object(executor_util, 'QUEUE_WAIT_WARNING', 0), \
+            patch.object(executor_util._LOGGER, 'warning') as mock_warning:
+        release.set()
+        assert second.result() == 'done'
+
+    assert mock_warning.called
+
+    stats = executor.stats
+    assert stats['running'] == 0
+    assert stats['queued'] == 0
+    assert stats['jobs'] == 2
+    assert stats['max_queue_wait'] > 0
+    executor.shutdown()
+
+
+def test_executor_max_workers():
+    """Test changing the maximum number of threads."""
+    executor = executor_util.InstrumentedExecutor('test', 1)
+    executor.max_workers = 3
+    assert executor.stats['max_workers'] == 3
+    executor.shutdown()
@@ -0,0 +1,84 @@
+"""Test Home Assistant json utility functions."""
+import os
+import stat
+from tempfile import mkdtemp
+import unittest
+from unittest.mock import patch
+
+from homeassistant.util.json import (
+    SerializationError, WriteError, load_json, save_json)
+
+# Test data that can be saved as JSON
+TEST_JSON_A = {"a": 1, "B": "two"}
+TEST_JSON_B = {"a": "one", "B": 2}
+# Test data that can not be saved as JSON (keys must be strings)
+TEST_BAD_OBJECT = {("A",): 1}
+
+
+class TestJSON(unittest.TestCase):
+    """Test util.json save and load."""
+
+    def setUp(self):
+        """Set up for tests."""
+        self.tmp_dir = mkdtemp()
+
+    def tearDown(self):
+        """Clean up after tests."""
+        for fname in os.listdir(self.tmp_dir):
+            os.remove(os.path.join(self.tmp_dir, fname))
+        os.rmdir(self.tmp_dir)
+
+    def _path_for(self, leaf_name):
+        return os.path.join(self.tmp_dir, leaf_name+".json")
+
+    def test_save_and_load(self):
+        """Test saving and loading back."""
+        fname = self._path_for("test1")
+        save_json(fname, TEST_JSON_A)
+        data = load_json(fname)
+        self.assertEqual(data, TEST_JSON_A)
+        self.assertEqual(
+            stat.S_IMODE(os.stat(fname).st_mode), 0o644)
+
+    def test_save_private(self):
+        """Test private files can only be read by their owner."""
+        fname = self._path_for("test2")
+        save_json(fname, TEST_JSON_A, private=True)
+        self.assertEqual(load_json(fname), TEST_JSON_A)
+        self.assertEqual(
+            stat.S_IMODE(os.stat(fname).st_mode), 0o600)
+
+    def test_save_compact(self):
+        """Test compact files are written without whitespace."""
+        fname = self._path_for("test3")
+        save_json(fname, TEST_JSON_A, compact=True)
+        with open(fname) as fdesc:
+            self.assertNotIn(' ', fdesc.read())
+        self.assertEqual(load_json(fname), TEST_JSON_A)
+
+    def test_overwrite_and_reload(self):
+        """Test that we can overwrite an existing file and read back."""
+        fname = self._path_for("test4")
+        save_json(fname, TEST_JSON_A)
+        save_json(fname, TEST_JSON_B)
+        self.assertEqual(load_json(fname), TEST_JSON_B)
+        self.assertEqual(os.listdir(self.tmp_dir), ['test4.json'])
+
+    def test_save_bad_data(self):
+        """Test error from trying to save unserialisable data."""
+        fname = self._path_for("test5")
+        with self.assertRaises(SerializationError):
+            save_json(fname, TEST_BAD_OBJECT)
+        self.assertEqual(os.listdir(self.tmp_dir), [])
+
+    def test_failed_write_keeps_file(self):
+        """Test a failed write does not change or truncate the file."""
+        fname = self._path_for("test6")
+        save_json(fname, TEST_JSON_A)
+
+        with patch('os.fsync', side_effect=OSError), \
+                self.assertRaises(WriteError):
+            save_json(fname, TEST_JSON_B)
+
+        self.assertEqual(load_json(fname), TEST_JSON_A)
+        self.assertEqual(os.listdir(self.tmp_dir), ['test6.json'])
@@ -426,3 +426,53 @@ def test_duplicate_key(caplog):
     with patch_yaml_files(files):
         load_yaml_config_file(YAML_CONFIG_FILE)
     assert 'contains duplicate key' in caplog.text
+
+
+def test_parse_cache(tmpdir):
+    """Test only changed files are parsed again."""
+    config_file = tmpdir.join(YAML_CONFIG_FILE)
+    config_file.write('group: !include groups.yaml\n'
+                      'name: !env_var NAME\n'
+                      'password: !secret password')
+    groups_file = tmpdir.join('groups.yaml')
+    groups_file.write('kitchen: [light.kitchen]')
+    tmpdir.join(yaml.SECRET_YAML).write('password: pwhome')
+    parsed = []
+
+    def compose(fname):
+        """Record the parsed files."""
+        parsed.append(os.path.basename(fname))
+        return compose_orig(fname)
+
+    compose_orig = yaml._compose  # pylint: disable=protected-access
+    cache = yaml.ParseCache()
+
+    with patch.object(yaml, '_PARSE_CACHE', cache), \
+            patch.object(yaml, '_compose', compose), \
+            patch.dict(os.environ, {'NAME': 'home'}):
+        conf = load_yaml_config_file(str(config_file))
+        assert conf == {'group': {'kitchen': ['light.kitchen']},
+                        'name': 'home', 'password': 'pwhome'}
+        assert sorted(parsed) == [
+            'configuration.yaml', 'groups.yaml', 'secrets.yaml']
+        # Secret files are never cached
+        assert sorted(os.path.basename(fname) for fname in cache.files) == \
+            ['configuration.yaml', 'groups.yaml']
+        assert not os.path.exists(str(tmpdir.join('.yaml_parse_cache')))
+
+        parsed.clear()
+        yaml.clear_secret_cache()
+        os.environ['NAME'] = 'away'
+        conf = load_yaml_config_file(str(config_file))
+        assert conf['name'] == 'away'
+        assert parsed == ['secrets.yaml']
+
+        parsed.clear()
+        yaml.clear_secret_cache()
+        groups_file.write('living_room: [light.couch]')
+        conf = load_yaml_config_file(str(config_file))
+        assert conf['group'] == {'living_room': ['light.couch']}
+        assert conf['group'].__line__ == 0
+        assert sorted(parsed) == ['groups.yaml', 'secrets.yaml']
+
+    yaml.clear_secret_cache()